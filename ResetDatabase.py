@@ -35,6 +35,10 @@ def deleteDB():
         dbPath = os.path.join(dbPath, 'source.db')
 
         delete_file(dbPath)
+        # a write-ahead log left behind would be applied to the next database
+        delete_file(dbPath + '-wal')
+        delete_file(dbPath + '-shm')
+        delete_file(os.path.join(os.path.dirname(dbPath), 'guide.bin'))
 
         passed = not os.path.exists(dbPath)
 
@@ -78,6 +82,7 @@ if __name__ == '__main__':
             xbmcvfs.delete('special://profile/addon_data/script.tvguide.fullscreen/folders.list')
             xbmcvfs.delete('special://profile/addon_data/script.tvguide.fullscreen/tvdb.pickle')
             xbmcvfs.delete('special://profile/addon_data/script.tvguide.fullscreen/tvdb_banners.pickle')
+            xbmcvfs.delete('special://profile/addon_data/script.tvguide.fullscreen/artwork.db')
             path = 'special://profile/addon_data/script.tvguide.fullscreen/'
             dirs, files = xbmcvfs.listdir(path)
             for f in files:
@@ -86,6 +91,7 @@ if __name__ == '__main__':
         if mode == 3:
             xbmcvfs.delete('special://profile/addon_data/script.tvguide.fullscreen/tvdb.pickle')
             xbmcvfs.delete('special://profile/addon_data/script.tvguide.fullscreen/tvdb_banners.pickle')
+            xbmcvfs.delete('special://profile/addon_data/script.tvguide.fullscreen/artwork.db')
         if mode in [2,4]:
             dirs, files = xbmcvfs.listdir('special://profile/addon_data/script.tvguide.fullscreen/logos')
             for f in files:
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+#
+#      Copyright (C) 2026 derandere
+#      Python 3 update by derandere
+#      moddet by derandere
+#
+#  This Program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This Program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this Program; see the file LICENSE.txt.  If not, write to
+#  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
+#  http://www.gnu.org/copyleft/gpl.html
+#
+from array import array
+
+import xbmc
+
+BLOCK_SIZE = 16
+# the native backends are handed this much at a time
+CHUNK_SIZE = 1 << 20
+
+
+def log(x):
+    xbmc.log(repr(x), xbmc.LOGERROR)
+
+
+def makeKey(text):
+    """
+    Turn the key from the settings into an AES key the way the mapping
+    files have always been encrypted: ascii, NUL padded to 16 bytes.
+    """
+    key = text.encode('ascii')
+    if len(key) < BLOCK_SIZE:
+        key += b'\0' * (BLOCK_SIZE - len(key))
+    return key
+
+
+def pad(data):
+    """
+    Pad with 1 to 16 newlines like pyaes did, readers ignore the trailing
+    blank lines.
+    """
+    return data + b'\n' * (BLOCK_SIZE - len(data) % BLOCK_SIZE)
+
+
+class CryptographyBackend(object):
+    name = 'cryptography'
+
+    def __init__(self):
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+        self.cipher = lambda key: Cipher(algorithms.AES(key), modes.ECB())
+
+    def encrypt(self, key, data):
+        return self._run(self.cipher(key).encryptor(), data)
+
+    def decrypt(self, key, data):
+        return self._run(self.cipher(key).decryptor(), data)
+
+    def _run(self, context, data):
+        view = memoryview(data)
+        out = [context.update(view[offset:offset + CHUNK_SIZE]) for offset in range(0, len(data), CHUNK_SIZE)]
+        out.append(context.finalize())
+        return b''.join(out)
+
+
+class PycryptodomeBackend(object):
+    name = 'pycryptodome'
+
+    def __init__(self):
+        try:
+            from Cryptodome.Cipher import AES
+        except ImportError:
+            from Crypto.Cipher import AES
+        self.aes = AES
+
+    def encrypt(self, key, data):
+        return self._run(self.aes.new(key, self.aes.MODE_ECB).encrypt, data)
+
+    def decrypt(self, key, data):
+        return self._run(self.aes.new(key, self.aes.MODE_ECB).decrypt, data)
+
+    def _run(self, function, data):
+        view = memoryview(data)
+        return b''.join(function(view[offset:offset + CHUNK_SIZE]) for offset in range(0, len(data), CHUNK_SIZE))
+
+
+class PyaesBackend(object):
+    """
+    The bundled pure Python implementation, block by block. Drives
+    pyaes.AES directly as its ECBMode is still written for Python 2.
+    """
+    name = 'pyaes'
+
+    def __init__(self):
+        import pyaes
+        self.pyaes = pyaes
+
+    def encrypt(self, key, data):
+        return self._run(self.pyaes.AES(key).encrypt_block, data)
+
+    def decrypt(self, key, data):
+        return self._run(self.pyaes.AES(key).decrypt_block, data)
+
+    def _run(self, function, data):
+        data = array('B', data)
+        for offset in range(0, len(data), BLOCK_SIZE):
+            block = data[offset:offset + BLOCK_SIZE]
+            function(block)
+            data[offset:offset + BLOCK_SIZE] = block
+        return data.tobytes()
+
+
+# in order of preference
+BACKENDS = [CryptographyBackend, PycryptodomeBackend, PyaesBackend]
+
+_backend = None
+
+
+def getBackend(name=None):
+    """
+    @param name: a backend name to insist on, None for the fastest available
+    """
+    global _backend
+    if name is None and _backend is not None:
+        return _backend
+    for backendClass in BACKENDS:
+        if name is not None and backendClass.name != name:
+            continue
+        try:
+            backend = backendClass()
+        except ImportError:
+            continue
+        if name is None:
+            _backend = backend
+        return backend
+    raise ImportError('no AES backend %s' % (name or ''))
+
+
+def encrypt(key, data, backend=None):
+    """
+    @param key: the key text from the settings
+    @param data: bytes, padded here
+    """
+    return (backend or getBackend()).encrypt(makeKey(key), pad(data))
+
+
+def decrypt(key, data, backend=None):
+    """
+    @return: the plain bytes up to the first NUL, with the newline padding
+    """
+    if len(data) % BLOCK_SIZE:
+        raise ValueError('encrypted data length must be a multiple of %d' % BLOCK_SIZE)
+    return (backend or getBackend()).decrypt(makeKey(key), data).split(b'\0')[0]
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+#
+#      Copyright (C) 2026 derandere
+#      Python 3 update by derandere
+#      moddet by derandere
+#
+#  This Program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This Program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this Program; see the file LICENSE.txt.  If not, write to
+#  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
+#  http://www.gnu.org/copyleft/gpl.html
+#
+import os
+import re
+import time
+import pickle
+import sqlite3
+import threading
+import urllib.parse
+from collections import OrderedDict, deque
+
+import xbmc
+import xbmcvfs
+
+
+def log(x):
+    xbmc.log(repr(x), xbmc.LOGERROR)
+
+
+class ArtworkCache(object):
+    """
+    Persistent programme artwork cache.
+
+    Entries live in an in-memory LRU (OrderedDict) for O(1) lookups and are
+    written through to artwork.db so they survive restarts. Found images and
+    failed lookups are cached with separate TTLs so a programme that has no
+    artwork is not scraped again on every focus.
+    """
+    ARTWORK_DB = 'artwork.db'
+    LEGACY_PICKLE = 'tvdb.pickle'
+
+    MAX_ENTRIES = 5000
+    HIT_TTL = 30 * 24 * 3600
+    MISS_TTL = 24 * 3600
+
+    def __init__(self, profilePath, maxEntries=MAX_ENTRIES, hitTTL=HIT_TTL, missTTL=MISS_TTL):
+        self.maxEntries = maxEntries
+        self.hitTTL = hitTTL
+        self.missTTL = missTTL
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.touched = set()
+
+        if not os.path.exists(profilePath):
+            os.makedirs(profilePath)
+        self.databasePath = os.path.join(profilePath, ArtworkCache.ARTWORK_DB)
+        self.conn = sqlite3.connect(self.databasePath, check_same_thread=False)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS artwork(key TEXT PRIMARY KEY, image TEXT, plot TEXT, expires INTEGER, accessed INTEGER)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS artwork_accessed_idx ON artwork(accessed)')
+        self.conn.commit()
+
+        self._importLegacyPickle(profilePath)
+        self._load()
+
+    @staticmethod
+    def makeKey(title, year='', season='', episode=''):
+        """
+        Normalize title/year/season/episode into a stable cache key, so
+        "The  Wire" and "the wire" share an entry.
+        """
+        title = re.sub(r"\[/?[BI]\]", '', title or '')
+        title = re.sub(r"\s+", ' ', title).strip().lower()
+        return '%s|%s|%s|%s' % (title, year or '', season or '', episode or '')
+
+    @staticmethod
+    def programKey(program):
+        title = program.title or ''
+        year = ''
+        match = re.search(r'(.*?) \(([0-9]{4})\)', title)
+        if match:
+            title = match.group(1)
+            year = match.group(2)
+        return ArtworkCache.makeKey(title, year, program.season, program.episode)
+
+    def _load(self):
+        now = int(time.time())
+        c = self.conn.cursor()
+        c.execute('DELETE FROM artwork WHERE expires<?', [now])
+        c.execute('SELECT key, image, plot, expires FROM artwork ORDER BY accessed DESC LIMIT ?', [self.maxEntries])
+        rows = c.fetchall()
+        for key, image, plot, expires in reversed(rows):
+            self.entries[key] = (image or '', plot or '', expires)
+        c.execute('DELETE FROM artwork WHERE key NOT IN (SELECT key FROM artwork ORDER BY accessed DESC LIMIT ?)', [self.maxEntries])
+        self.conn.commit()
+        c.close()
+
+    def _importLegacyPickle(self, profilePath):
+        path = os.path.join(profilePath, ArtworkCache.LEGACY_PICKLE)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'rb') as f:
+                urls = pickle.load(f)
+            now = int(time.time())
+            rows = []
+            for title, image in list(urls.items()):
+                if isinstance(title, bytes):
+                    title = title.decode('utf8', 'ignore')
+                expires = now + (self.hitTTL if image else self.missTTL)
+                rows.append((self.makeKey(title), image or '', '', expires, now))
+            self.conn.executemany('INSERT OR IGNORE INTO artwork(key, image, plot, expires, accessed) VALUES(?, ?, ?, ?, ?)', rows)
+            self.conn.commit()
+        except Exception as e:
+            log(e)
+        xbmcvfs.delete(path)
+
+    def get(self, key):
+        """
+        @return: (image, plot) for a cached entry, image is '' for a cached miss.
+                 None if the key is unknown or expired and must be looked up.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] < time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            self.touched.add(key)
+            return entry[0], entry[1]
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def getImage(self, key):
+        entry = self.get(key)
+        if entry:
+            return entry[0]
+        return ''
+
+    def set(self, key, image, plot=''):
+        if image:
+            expires = int(time.time()) + self.hitTTL
+        else:
+            expires = int(time.time()) + self.missTTL
+        self._store(key, image or '', plot or '', expires)
+
+    def setMiss(self, key):
+        self.set(key, '')
+
+    def _store(self, key, image, plot, expires):
+        now = int(time.time())
+        with self.lock:
+            self.entries[key] = (image, plot, expires)
+            self.entries.move_to_end(key)
+            self.touched.discard(key)
+            evicted = []
+            while len(self.entries) > self.maxEntries:
+                evicted.append(self.entries.popitem(last=False)[0])
+            try:
+                self.conn.execute('INSERT OR REPLACE INTO artwork(key, image, plot, expires, accessed) VALUES(?, ?, ?, ?, ?)',
+                                  [key, image, plot, expires, now])
+                if evicted:
+                    self.conn.executemany('DELETE FROM artwork WHERE key=?', [(k,) for k in evicted])
+                self.conn.commit()
+            except sqlite3.Error as e:
+                log(e)
+
+    def forget(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+            self.touched.discard(key)
+            try:
+                self.conn.execute('DELETE FROM artwork WHERE key=?', [key])
+                self.conn.commit()
+            except sqlite3.Error as e:
+                log(e)
+
+    def flush(self):
+        # access times are only needed for LRU ordering on the next load
+        now = int(time.time())
+        with self.lock:
+            touched = [(now, key) for key in self.touched]
+            self.touched = set()
+            if not touched:
+                return
+            try:
+                self.conn.executemany('UPDATE artwork SET accessed=? WHERE key=?', touched)
+                self.conn.commit()
+            except sqlite3.Error as e:
+                log(e)
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            try:
+                self.conn.close()
+            except sqlite3.Error:
+                pass
+
+
+class HostRateLimiter(object):
+    """
+    Spaces out requests to the same host by at least interval seconds,
+    shared between all threads that scrape artwork.
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.nextSlot = {}
+
+    def wait(self, url):
+        host = urllib.parse.urlparse(url).netloc
+        with self.lock:
+            now = time.time()
+            slot = max(now, self.nextSlot.get(host, 0))
+            self.nextSlot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ArtworkPrefetcher(object):
+    """
+    Resolves artwork for programmes before they get focus.
+
+    prefetch() replaces the queue with the programmes of the page being
+    shown, so work for a page the user has already scrolled past is dropped.
+    Lookups already in flight are allowed to finish since their result is
+    cached either way.
+    """
+    WORKERS = 2
+    HOST_INTERVAL = 1.0
+
+    def __init__(self, cache, resolve, workers=WORKERS, hostInterval=HOST_INTERVAL):
+        self.cache = cache
+        self.resolve = resolve
+        self.limiter = HostRateLimiter(hostInterval)
+        self.condition = threading.Condition()
+        self.queue = deque()
+        self.queued = set()
+        self.generation = 0
+        self.closed = False
+        self.threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name='ArtworkPrefetcher-%d' % i)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def prefetch(self, programs):
+        """
+        Drop any queued work and queue programs in the given order.
+        @return: generation token to pass to extend()
+        """
+        with self.condition:
+            self.generation += 1
+            self.queue.clear()
+            self.queued = set()
+            self._enqueue(programs)
+            return self.generation
+
+    def extend(self, generation, programs):
+        """
+        Queue more programs behind the current ones, unless the page
+        changed since generation was handed out.
+        """
+        with self.condition:
+            if generation != self.generation:
+                return False
+            self._enqueue(programs)
+            return True
+
+    def _enqueue(self, programs):
+        for program in programs:
+            if not program.title:
+                continue
+            key = ArtworkCache.programKey(program)
+            if key in self.queued or key in self.cache:
+                continue
+            self.queued.add(key)
+            self.queue.append((key, program))
+        self.condition.notify_all()
+
+    def cancel(self):
+        with self.condition:
+            self.generation += 1
+            self.queue.clear()
+            self.queued = set()
+
+    def _worker(self):
+        while True:
+            with self.condition:
+                while not self.queue and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                key, program = self.queue.popleft()
+            if key in self.cache:
+                continue
+            try:
+                self.resolve(program)
+            except Exception as e:
+                log(e)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.queue.clear()
+            self.condition.notify_all()
@@ -22,11 +22,12 @@
 #  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
 #  http://www.gnu.org/copyleft/gpl.html
 #
-import datetime
 import os
+import time
 import xbmc
 import xbmcgui, xbmcaddon
 import source as src
+from scheduler import notifyService
 
 from strings import *
 
@@ -46,40 +47,37 @@ class Autoplay(object):
         return 'tvguide-%s-%s' % (programTitle, startTime)
         
     def scheduleAutoplays(self):
-        for program in self.database.getFullAutoplays():
-            self._scheduleAutoplay(program.channel.id, program.title, program.startDate, program.endDate)
+        # the background service owns the alarms
+        notifyService('autoplay')
 
+    def getAlarms(self):
+        """
+        @return: (key, when, action, args) for the service scheduler
+        """
+        alarms = []
+        for program in self.database.getFullAutoplays():
+            alarms.extend(self._autoplayAlarms(program.channel.id, program.title, program.startDate, program.endDate))
+        return alarms
 
-    def _scheduleAutoplay(self, channelId, programTitle, startTime, endTime):
-        t = startTime - datetime.datetime.now()
-        timeToAutoplay = ((t.days * 86400) + t.seconds) / 60
-        if timeToAutoplay < 0:
-            return
-        #timeToAutoplay = 1
+    def _autoplayAlarms(self, channelId, programTitle, startTime, endTime):
         name = self.createAlarmClockName(programTitle, startTime)
-        xbmc.executebuiltin('AlarmClock(%s-start,RunScript(special://home/addons/script.tvguide.fullscreen/play.py,%s,%s),%d,True)' %
-        (name.encode('utf-8', 'replace'), channelId.encode('utf-8'), startTime, timeToAutoplay - int(ADDON.getSetting('autoplays.before'))))
-
-        t = endTime - datetime.datetime.now()
-        timeToAutoplay = ((t.days * 86400) + t.seconds) / 60
-        #timeToAutoplay = 0
+        start = time.mktime(startTime.timetuple()) - 60 * int(ADDON.getSetting('autoplays.before') or 0)
+        alarms = [('%s-start' % name, start, self._runScript, ('play.py', channelId, startTime))]
         if ADDON.getSetting('autoplays.stop') == 'true':
-            xbmc.executebuiltin('AlarmClock(%s-stop,RunScript(special://home/addons/script.tvguide.fullscreen/stop.py,%s,%s),%d,True)' %
-            (name.encode('utf-8', 'replace'), channelId.encode('utf-8'), startTime, timeToAutoplay + int(ADDON.getSetting('autoplays.after'))))
-
+            stop = time.mktime(endTime.timetuple()) + 60 * int(ADDON.getSetting('autoplays.after') or 0)
+            alarms.append(('%s-stop' % name, stop, self._runScript, ('stop.py', channelId, startTime)))
+        return alarms
 
-    def _unscheduleAutoplay(self, programTitle, startTime):
-        name = self.createAlarmClockName(programTitle, startTime)
-        xbmc.executebuiltin('CancelAlarm(%s-start,True)' % name.encode('utf-8', 'replace'))
-        xbmc.executebuiltin('CancelAlarm(%s-stop,True)' % name.encode('utf-8', 'replace'))
+    def _runScript(self, script, channelId, startTime):
+        xbmc.executebuiltin('RunScript(special://home/addons/script.tvguide.fullscreen/%s,%s,%s)' % (script, channelId, startTime))
 
     def addAutoplay(self, program,type):
         self.database.addAutoplay(program,type)
-        self._scheduleAutoplay(program.channel.id, program.title, program.startDate, program.endDate)
+        notifyService('autoplay')
 
     def removeAutoplay(self, program):
         self.database.removeAutoplay(program)
-        self._unscheduleAutoplay(program.title, program.startDate)
+        notifyService('autoplay')
 
 
 if __name__ == '__main__':
@@ -91,6 +89,7 @@ if __name__ == '__main__':
     def onInitialized(success):
         if success:
             database.clearAllAutoplays()
+            notifyService('autoplay')
             database.close(onAutoplaysCleared)
             ADDON.setSetting('playing.channel','')
             ADDON.setSetting('playing.start','')
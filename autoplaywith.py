@@ -19,12 +19,13 @@
 #  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
 #  http://www.gnu.org/copyleft/gpl.html
 #
-import datetime,time
+import time
 import os
 import xbmc
 import xbmcgui, xbmcaddon, xbmcvfs
 import source as src
 import re
+from scheduler import notifyService
 
 from strings import *
 
@@ -44,43 +45,38 @@ class Autoplaywith(object):
         return 'tvguide-%s-%s' % (programTitle, startTime)
 
     def scheduleAutoplaywiths(self):
+        # the background service owns the alarms
+        notifyService('autoplaywith')
+
+    def getAlarms(self):
+        """
+        @return: (key, when, action, args) for the service scheduler
+        """
+        alarms = []
         for program in self.database.getFullAutoplaywiths():
-            self._scheduleAutoplaywith(program.channel.id, program.title, program.startDate, program.endDate)
+            alarms.extend(self._autoplaywithAlarms(program.channel.id, program.title, program.startDate, program.endDate))
+        return alarms
 
-    def _scheduleAutoplaywith(self, channelId, programTitle, startTime, endTime):
-        t = startTime - datetime.datetime.now()
-        timeToAutoplaywith = ((t.days * 86400) + t.seconds) / 60
-        if timeToAutoplaywith < 0:
-            return
-        #timeToAutoplaywith = 1
+    def _autoplaywithAlarms(self, channelId, programTitle, startTime, endTime):
         name = self.createAlarmClockName(programTitle, startTime)
         timestamp = time.mktime(startTime.timetuple())
-        xbmc.executebuiltin('AlarmClock(%s-start,RunScript(special://home/addons/script.tvguide.fullscreen/playwith.py,%s,%s),%d,True)' %
-        (name.encode('utf-8', 'replace'), channelId.encode('utf-8'), timestamp, timeToAutoplaywith - int(ADDON.getSetting('autoplaywiths.before'))))
-
-        t = endTime - datetime.datetime.now()
-        timeToAutoplaywith = ((t.days * 86400) + t.seconds) / 60
-        #timeToAutoplaywith = 0
+        start = timestamp - 60 * int(ADDON.getSetting('autoplaywiths.before') or 0)
+        alarms = [('%s-start' % name, start, self._runScript, ('playwith.py', channelId, timestamp))]
         if ADDON.getSetting('autoplaywiths.stop') == 'true':
-            xbmc.executebuiltin('AlarmClock(%s-stop,RunScript(special://home/addons/script.tvguide.fullscreen/stopwith.py,%s,%s),%d,True)' %
-            (name.encode('utf-8', 'replace'), channelId.encode('utf-8'), timestamp, timeToAutoplaywith + int(ADDON.getSetting('autoplaywiths.after'))))
+            stop = time.mktime(endTime.timetuple()) + 60 * int(ADDON.getSetting('autoplaywiths.after') or 0)
+            alarms.append(('%s-stop' % name, stop, self._runScript, ('stopwith.py', channelId, timestamp)))
+        return alarms
 
-
-    def _unscheduleAutoplaywith(self, programTitle, startTime):
-        name = self.createAlarmClockName(programTitle, startTime)
-        xbmc.executebuiltin('CancelAlarm(%s-start,True)' % name.encode('utf-8', 'replace'))
-        xbmc.executebuiltin('CancelAlarm(%s-stop,True)' % name.encode('utf-8', 'replace'))
+    def _runScript(self, script, channelId, timestamp):
+        xbmc.executebuiltin('RunScript(special://home/addons/script.tvguide.fullscreen/%s,%s,%s)' % (script, channelId, timestamp))
 
     def addAutoplaywith(self, program,type):
         self.database.addAutoplaywith(program,type)
-        if type == 0:
-            self._scheduleAutoplaywith(program.channel.id, program.title, program.startDate, program.endDate)
-        else:
-            self.scheduleAutoplaywiths()
+        notifyService('autoplaywith')
 
     def removeAutoplaywith(self, program):
         self.database.removeAutoplaywith(program)
-        self._unscheduleAutoplaywith(program.title, program.startDate)
+        notifyService('autoplaywith')
 
 if __name__ == '__main__':
     database = src.Database()
@@ -91,6 +87,7 @@ if __name__ == '__main__':
     def onInitialized(success):
         if success:
             database.clearAllAutoplaywiths()
+            notifyService('autoplaywith')
             database.close(onAutoplaywithsCleared)
             ADDON.setSetting('playing.channel','')
             ADDON.setSetting('playing.start','')
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+#
+#      Copyright (C) 2026 derandere
+#      Python 3 update by derandere
+#      moddet by derandere
+#
+#  This Program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This Program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this Program; see the file LICENSE.txt.  If not, write to
+#  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
+#  http://www.gnu.org/copyleft/gpl.html
+#
+"""Build the guide database in a Python process of its own.
+
+Usage: python3 builder.py --userdata DIR --home DIR [--force] [--reset] [--maintain]
+                          [--parent PID] [--verbose]
+
+Fetches, parses and imports the configured source into source.db the way
+the service does, on another core than Kodi. Progress goes to stdout as
+JSON lines, {"progress": 42.0} while parsing and {"done": true, "failed":
+false} at the end. The same lines are sent to every process attached on a
+localhost socket whose port is in builder.port in the addon profile while
+the builder runs, see attach().
+
+BuilderProcess starts it from Kodi with the Python of the builder.python
+setting, Kodi's own interpreter can not run scripts as a process.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+
+PORT_FILE = 'builder.port'
+
+
+def profilePath():
+    import xbmc
+    import xbmcaddon
+    return xbmc.translatePath(xbmcaddon.Addon(id='script.tvguide.fullscreen.reborn').getAddonInfo('profile'))
+
+
+class ProgressServer(object):
+    """
+    Writes progress messages to stdout and to the attached processes.
+    """
+
+    def __init__(self, profile, output):
+        self.output = output
+        self.portFile = os.path.join(profile, PORT_FILE)
+        self.clients = []
+        self.lock = threading.Lock()
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.bind(('127.0.0.1', 0))
+        self.socket.listen(4)
+        with open(self.portFile, 'w') as f:
+            f.write(str(self.socket.getsockname()[1]))
+        threading.Thread(name='Builder progress', target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                client, address = self.socket.accept()
+            except OSError:
+                return  # closed
+            with self.lock:
+                self.clients.append(client)
+
+    def send(self, message):
+        line = json.dumps(message) + '\n'
+        self.output.write(line)
+        self.output.flush()
+        with self.lock:
+            for client in list(self.clients):
+                try:
+                    client.sendall(line.encode('utf8'))
+                except OSError:
+                    self.clients.remove(client)
+
+    def close(self):
+        try:
+            os.remove(self.portFile)
+        except OSError:
+            pass
+        self.socket.close()
+        with self.lock:
+            for client in self.clients:
+                client.close()
+            self.clients = []
+
+
+def build(server, force, reset, maintain=False, parent=None):
+    """
+    Runs the import through the Database event loop, as the service does.
+    The import is cancelled when the process parent exits, e.g. Kodi.
+
+    @return: True if programmes were imported
+    """
+    import source
+
+    done = threading.Event()
+    result = {'cancelled': False}
+
+    def onInitialized(success):
+        result['initialized'] = success
+        done.set()
+
+    def onProgress(percent):
+        server.send({'progress': round(percent, 1)})
+        if parent is not None and os.getppid() != parent:
+            result['cancelled'] = True
+        return not result['cancelled']
+
+    database = source.Database(force)
+    database.initialize(onInitialized)
+    done.wait()
+    if result['initialized']:
+        if reset:
+            # the launching process has already stored the changed settings
+            database.settingsChanged = True
+        done.clear()
+        database.updateChannelAndProgramListCaches(done.set, progress_callback=onProgress)
+        done.wait()
+        if maintain and not database.updateFailed and not result['cancelled']:
+            done.clear()
+            database.maintain(done.set)
+            done.wait()
+    done.clear()
+    database.close(done.set)
+    done.wait()
+    return result['initialized'] and not database.updateFailed and not result['cancelled']
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--userdata', required=True, help='the Kodi userdata directory, special://profile')
+    parser.add_argument('--home', required=True, help='the Kodi home directory, special://home')
+    parser.add_argument('--force', action='store_true', help='fetch the source files even if they are recent')
+    parser.add_argument('--reset', action='store_true', help='the source settings changed, replace the channels')
+    parser.add_argument('--maintain', action='store_true', help='compact and analyze source.db after the import')
+    parser.add_argument('--parent', type=int, default=None, help='cancel the import when this process exits')
+    parser.add_argument('--verbose', action='store_true', help='log to stderr')
+    args = parser.parse_args(argv)
+
+    import standalone
+    standalone.install(args.userdata, args.home, args.verbose)
+    profile = profilePath()
+    if not os.path.exists(profile):
+        os.makedirs(profile)
+
+    # the addon modules print their own progress, keep stdout for the messages
+    output, sys.stdout = sys.stdout, sys.stderr
+    server = ProgressServer(profile, output)
+    try:
+        success = build(server, args.force, args.reset, args.maintain, args.parent)
+        server.send({'done': True, 'failed': not success})
+    except Exception as detail:
+        server.send({'done': True, 'failed': True, 'error': str(detail)})
+        success = False
+    finally:
+        server.close()
+    return 0 if success else 1
+
+
+# used in Kodi
+
+
+def attach(profile=None):
+    """
+    @return: generator of the progress messages of the running builder,
+             None if no builder runs
+    """
+    try:
+        with open(os.path.join(profile or profilePath(), PORT_FILE)) as f:
+            port = int(f.read())
+        connection = socket.create_connection(('127.0.0.1', port), timeout=5)
+    except (IOError, OSError, ValueError):
+        return None
+    connection.settimeout(None)
+    return _readMessages(connection.makefile('r', encoding='utf8'), connection)
+
+
+def _readMessages(lines, closeable):
+    try:
+        for line in lines:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            yield message
+            if message.get('done'):
+                return
+    finally:
+        closeable.close()
+
+
+class BuilderProcess(object):
+    """
+    The builder started as a child process of Kodi.
+    """
+
+    def __init__(self, python):
+        self.python = python
+        self.process = None
+
+    def start(self, force=False, reset=False, maintain=False):
+        """
+        @raise OSError: python can not be run
+        """
+        import xbmc
+        command = [self.python, os.path.abspath(__file__),
+                   '--userdata', xbmc.translatePath('special://profile'), '--home', xbmc.translatePath('special://home'),
+                   '--parent', str(os.getpid())]
+        if force:
+            command.append('--force')
+        if reset:
+            command.append('--reset')
+        if maintain:
+            command.append('--maintain')
+        self.process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        stdin=subprocess.DEVNULL, universal_newlines=True)
+
+    def messages(self):
+        """
+        @return: generator of the progress messages until the builder exits
+        """
+        return _readMessages(self.process.stdout, self.process.stdout)
+
+    def wait(self):
+        """
+        @return: True if the builder imported the guide
+        """
+        return self.process.wait() == 0
+
+    def terminate(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -27,11 +27,9 @@ import xbmcvfs
 import xbmcgui
 import xbmcaddon
 import os
-import urllib.request, urllib.error, urllib.parse
 import datetime,time
 import zlib
 import gzip
-import requests
 import hashlib
 
 ADDON = xbmcaddon.Addon(id='script.tvguide.fullscreen.reborn')
@@ -80,6 +78,7 @@ class FileFetcher(object):
             os.makedirs(self.basePath)
 
     def fetchFile(self,force=False):
+        import requests
         retVal = self.FETCH_NOT_NEEDED
         fetch = False
         if not os.path.exists(self.filePath):  # always fetch if file doesn't exist!
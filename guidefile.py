@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+#
+#      Copyright (C) 2026 derandere
+#      Python 3 update by derandere
+#      moddet by derandere
+#
+#  This Program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This Program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this Program; see the file LICENSE.txt.  If not, write to
+#  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
+#  http://www.gnu.org/copyleft/gpl.html
+#
+import array
+import mmap
+import os
+import struct
+import sys
+import time
+
+# the guide file: the programmes of an import in a binary file the listings
+# read through mmap, without SQL or parsing. All numbers are little endian.
+#
+#   header    HEADER
+#   channels  CHANNEL per channel: id string, first record, record count
+#   records   FIELDS unsigned 32 bit integers per programme, by channel and start
+#   strings   STRING_COUNT + 1 offsets into the string data, then the UTF-8 data
+#
+# Strings are stored once and referenced by their number, NONE is None.
+# END_MAX is the largest end of the records of a channel up to this one, it
+# only grows, so the programmes around a time are found by bisection even
+# if some overlap.
+
+MAGIC = b'TVGF'
+FORMAT = 1
+HEADER = struct.Struct('<4sHHqqIIIIQQQQ')
+CHANNEL = struct.Struct('<III')
+NONE = 0xFFFFFFFF
+
+START, END, END_MAX, TITLE, SUB_TITLE, DESCRIPTION, CATEGORIES, IMAGE_LARGE, IMAGE_SMALL, SEASON, EPISODE, IS_NEW, IS_MOVIE, LANGUAGE = range(14)
+FIELDS = 14
+STRING_FIELDS = range(TITLE, FIELDS)
+
+# the columns of the rows given to write(), by channel and start_date
+COLUMNS = ('channel, start_date, end_date, title, sub_title, description, categories, image_large, image_small, '
+           'season, episode, is_new, is_movie, language')
+
+
+class GuideFileError(Exception):
+    pass
+
+
+def newToken():
+    """
+    @return: random positive 63 bit integer identifying a guide file
+    """
+    return int.from_bytes(os.urandom(8), 'little') >> 1
+
+
+def _littleEndian(values):
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+def write(path, token, rows):
+    """
+    Writes the guide file atomically.
+
+    @param rows: iterable of tuples of COLUMNS, ordered by channel and start_date
+    @return: number of programmes written
+    """
+    strings = {}
+    channels = []
+    records = array.array('I')
+
+    def string(value):
+        if value is None:
+            return NONE
+        number = strings.get(value)
+        if number is None:
+            number = strings[value] = len(strings)
+        return number
+
+    channelId = None
+    endMax = 0
+    for row in rows:
+        if row[0] != channelId:
+            channelId = row[0]
+            channels.append([string(channelId), len(records) // FIELDS, 0])
+            endMax = 0
+        channels[-1][2] += 1
+        endMax = max(endMax, row[2])
+        records.extend((row[1], row[2], endMax))
+        records.extend(string(value) for value in row[3:])
+
+    texts = [value.encode('utf-8', 'surrogatepass') for value in sorted(strings, key=strings.get)]
+    offsets = array.array('I', [0])
+    for text in texts:
+        offsets.append(offsets[-1] + len(text))
+
+    channelsOffset = HEADER.size
+    recordsOffset = channelsOffset + CHANNEL.size * len(channels)
+    stringOffsetsOffset = recordsOffset + records.itemsize * len(records)
+    stringDataOffset = stringOffsetsOffset + offsets.itemsize * len(offsets)
+    programCount = len(records) // FIELDS
+
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT, 0, token, int(time.time()), len(channels), programCount, len(texts), 0,
+                            channelsOffset, recordsOffset, stringOffsetsOffset, stringDataOffset))
+        for channel in channels:
+            f.write(CHANNEL.pack(*channel))
+        f.write(_littleEndian(records))
+        f.write(_littleEndian(offsets))
+        for text in texts:
+            f.write(text)
+        # on disk before the token of the import names it
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+    return programCount
+
+
+class GuideFile(object):
+    """
+    A guide file mapped into memory. The programme methods return tuples of
+    the COLUMNS after channel.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            try:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise GuideFileError('empty guide file')
+        self.records = self.offsets = self.data = None
+        view = None
+        try:
+            (magic, format, _, self.token, self.created, channelCount, programCount, stringCount, _,
+             channelsOffset, recordsOffset, stringOffsetsOffset, stringDataOffset) = HEADER.unpack_from(self.map)
+            if magic != MAGIC or format != FORMAT:
+                raise GuideFileError('not a guide file of format %d' % FORMAT)
+            # a truncated file, e.g. after a crash, must not be read past its end
+            size = len(self.map)
+            sections = [(channelsOffset, CHANNEL.size * channelCount),
+                        (recordsOffset, 4 * FIELDS * programCount),
+                        (stringOffsetsOffset, 4 * (stringCount + 1)),
+                        (stringDataOffset, 0)]
+            for offset, length in sections:
+                if offset < HEADER.size or offset + length > size:
+                    raise GuideFileError('truncated guide file')
+            view = memoryview(self.map)
+            self.records = self._integers(view[recordsOffset:recordsOffset + 4 * FIELDS * programCount])
+            self.offsets = self._integers(view[stringOffsetsOffset:stringOffsetsOffset + 4 * (stringCount + 1)])
+            if self.offsets[stringCount] > size - stringDataOffset:
+                raise GuideFileError('truncated guide file')
+            self.data = view[stringDataOffset:]
+            view.release()
+            self.channels = {}
+            for n in range(channelCount):
+                idNumber, first, count = CHANNEL.unpack_from(self.map, channelsOffset + n * CHANNEL.size)
+                if idNumber >= stringCount or first + count > programCount:
+                    raise GuideFileError('corrupt channel table')
+                self.channels[self.string(idNumber)] = (first, count)
+        except (struct.error, IndexError, ValueError, TypeError, BufferError, GuideFileError) as detail:
+            # the views into the map have to go before it can be closed
+            if view is not None:
+                view.release()
+            self.close()
+            if isinstance(detail, GuideFileError):
+                raise
+            raise GuideFileError(detail)
+
+    @staticmethod
+    def _integers(view):
+        if sys.byteorder == 'little':
+            return view.cast('I')
+        values = array.array('I', view)
+        values.byteswap()
+        return values
+
+    def close(self):
+        if self.map is not None:
+            # the views into the map have to go before it can be closed
+            self.records = self.offsets = self.data = None
+            self.map.close()
+            self.map = None
+
+    def string(self, number):
+        if number == NONE:
+            return None
+        return str(self.data[self.offsets[number]:self.offsets[number + 1]], 'utf-8', 'surrogatepass')
+
+    def program(self, index):
+        base = index * FIELDS
+        record = self.records[base:base + FIELDS]
+        string = self.string
+        return (record[START], record[END]) + tuple(string(number) for number in record[TITLE:])
+
+    def _bisect(self, first, count, field, value):
+        """
+        @return: index of the first record of the channel with field >= value
+        """
+        records = self.records
+        low, high = first, first + count
+        while low < high:
+            middle = (low + high) // 2
+            if records[middle * FIELDS + field] < value:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def programs(self, channelId, start, end):
+        """
+        @return: programmes of the channel ending after start and starting before end
+        """
+        first, count = self.channels.get(channelId, (0, 0))
+        records = self.records
+        programs = []
+        for index in range(self._bisect(first, count, END_MAX, start + 1), first + count):
+            base = index * FIELDS
+            if records[base + START] >= end:
+                break
+            if records[base + END] > start:
+                programs.append(self.program(index))
+        return programs
+
+    def now(self, channelId, epoch):
+        """
+        @return: programmes of the channel starting at or before epoch and ending at or after it
+        """
+        first, count = self.channels.get(channelId, (0, 0))
+        records = self.records
+        programs = []
+        for index in range(self._bisect(first, count, END_MAX, epoch), first + count):
+            base = index * FIELDS
+            if records[base + START] > epoch:
+                break
+            if records[base + END] >= epoch:
+                programs.append(self.program(index))
+        return programs
+
+    def next(self, channelId, epoch):
+        """
+        @return: the first programme of the channel starting at or after epoch, None if there is none
+        """
+        first, count = self.channels.get(channelId, (0, 0))
+        records = self.records
+        for index in range(self._bisect(first, count, START, epoch), first + count):
+            if records[index * FIELDS + END] >= epoch:
+                return self.program(index)
+        return None
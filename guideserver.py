@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+#
+#      Copyright (C) 2026 derandere
+#      Python 3 update by derandere
+#      moddet by derandere
+#
+#  This Program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This Program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this Program; see the file LICENSE.txt.  If not, write to
+#  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
+#  http://www.gnu.org/copyleft/gpl.html
+#
+"""Build the guide once and serve it to the Kodi boxes of a LAN.
+
+Usage: python3 guideserver.py --userdata DIR --home DIR [--port 8642] [--interval 3600]
+                              [--bind 0.0.0.0] [--verbose]
+
+Imports the source configured in the addon settings of DIR like builder.py,
+every --interval seconds, and publishes each new guide as a compressed
+snapshot over HTTP:
+
+  /snapshot.json    version, size and sha256 of the snapshot
+  /snapshot.db.gz   the channels, programmes and texts of the guide
+
+The snapshot answers If-None-Match with 304 for the version a client has.
+Clients use the Guide Server data source with the url of this server,
+see GuideServerSource in source.py.
+"""
+import argparse
+import gzip
+import hashlib
+import http.server
+import json
+import os
+import shutil
+import socketserver
+import sqlite3
+import sys
+import threading
+import time
+
+SNAPSHOT_DIR = 'guideserver'
+SNAPSHOT_FILE = 'snapshot.db.gz'
+SNAPSHOT_INFO = 'snapshot.json'
+
+# the snapshot database, read by GuideServerSource
+SNAPSHOT_SCHEMA = '''
+CREATE TABLE info(key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE channels(id TEXT, title TEXT, logo TEXT, stream_url TEXT, visible BOOLEAN, weight INTEGER);
+CREATE TABLE programs(channel TEXT, title TEXT, sub_title TEXT, start_date INTEGER, end_date INTEGER, description_key INTEGER,
+                      categories_key INTEGER, image_large TEXT, image_small_key INTEGER, season TEXT, episode TEXT, is_new TEXT,
+                      is_movie TEXT, language TEXT);
+CREATE TABLE texts(hash INTEGER PRIMARY KEY, text TEXT);
+'''
+
+
+def guideVersion(databasePath):
+    """
+    @return: version of the guide in source.db, changes with each import,
+             None if there is no guide
+    """
+    conn = sqlite3.connect(databasePath)
+    try:
+        row = conn.execute('SELECT u.source, u.id, u.programs_updated FROM updates u JOIN sources s ON s.id = u.source '
+                           'WHERE s.channels_updated <> 0 ORDER BY u.id DESC LIMIT 1').fetchone()
+    except sqlite3.DatabaseError:
+        row = None
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return '%s-%d-%d' % row
+
+
+def exportSnapshot(databasePath, path, version):
+    """
+    Writes the guide of the source that was imported last to a new database.
+
+    @return: (channels, programs)
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(SNAPSHOT_SCHEMA)
+        conn.execute('ATTACH DATABASE ? AS guide', [databasePath])
+        source = version.rsplit('-', 2)[0]
+        conn.execute('INSERT INTO info(key, value) VALUES(?, ?)', ['version', version])
+        conn.execute('INSERT INTO info(key, value) VALUES(?, ?)', ['source', source])
+        conn.execute('INSERT INTO channels SELECT id, title, logo, stream_url, visible, weight FROM guide.channels '
+                     'WHERE source=? ORDER BY weight', [source])
+        conn.execute('INSERT INTO programs SELECT c.id, p.title, p.sub_title, p.start_date, p.end_date, p.description_key, '
+                     'p.categories_key, p.image_large, p.image_small_key, p.season, p.episode, p.is_new, p.is_movie, p.language '
+                     'FROM guide.program_rows p JOIN guide.channels c ON c.key = p.channel_key '
+                     'WHERE c.source=? ORDER BY c.weight, p.start_date', [source])
+        conn.execute('INSERT INTO texts SELECT hash, text FROM guide.texts WHERE hash IN '
+                     '(SELECT description_key FROM programs UNION SELECT categories_key FROM programs '
+                     'UNION SELECT image_small_key FROM programs)')
+        conn.commit()
+        conn.execute('DETACH DATABASE guide')
+        return (conn.execute('SELECT COUNT(*) FROM channels').fetchone()[0],
+                conn.execute('SELECT COUNT(*) FROM programs').fetchone()[0])
+    finally:
+        conn.close()
+
+
+def publish(databasePath, snapshotDir):
+    """
+    Replaces the published snapshot if source.db has a newer guide.
+
+    @return: the info of the published snapshot, None if there is none
+    """
+    infoPath = os.path.join(snapshotDir, SNAPSHOT_INFO)
+    info = readInfo(infoPath)
+    version = guideVersion(databasePath)
+    if version is None or (info is not None and info['version'] == version):
+        return info
+
+    exported = os.path.join(snapshotDir, 'export.db')
+    channels, programs = exportSnapshot(databasePath, exported, version)
+    digest = hashlib.sha256()
+    compressed = os.path.join(snapshotDir, SNAPSHOT_FILE + '.tmp')
+    with open(exported, 'rb') as source, gzip.open(compressed, 'wb', compresslevel=6) as target:
+        shutil.copyfileobj(source, target)
+    os.remove(exported)
+    with open(compressed, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    info = {'version': version, 'sha256': digest.hexdigest(), 'size': os.path.getsize(compressed),
+            'created': int(time.time()), 'channels': channels, 'programs': programs}
+    # downloads in progress keep reading the file they opened
+    os.replace(compressed, os.path.join(snapshotDir, SNAPSHOT_FILE))
+    with open(infoPath + '.tmp', 'w') as f:
+        json.dump(info, f)
+    os.replace(infoPath + '.tmp', infoPath)
+    return info
+
+
+def readInfo(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
+
+
+class SnapshotHandler(http.server.BaseHTTPRequestHandler):
+    snapshotDir = None
+
+    def do_GET(self):
+        if self.path == '/' + SNAPSHOT_INFO:
+            self.sendFile(SNAPSHOT_INFO, 'application/json')
+        elif self.path == '/' + SNAPSHOT_FILE:
+            self.sendFile(SNAPSHOT_FILE, 'application/gzip')
+        else:
+            self.send_error(404)
+
+    def sendFile(self, name, contentType):
+        info = readInfo(os.path.join(self.snapshotDir, SNAPSHOT_INFO))
+        if info is None:
+            self.send_error(503, 'no guide published yet')
+            return
+        etag = '"%s"' % info['sha256']
+        if name == SNAPSHOT_FILE and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        try:
+            f = open(os.path.join(self.snapshotDir, name), 'rb')
+        except IOError:
+            self.send_error(404)
+            return
+        with f:
+            self.send_response(200)
+            self.send_header('Content-Type', contentType)
+            self.send_header('Content-Length', str(os.fstat(f.fileno()).st_size))
+            if name == SNAPSHOT_FILE:
+                self.send_header('ETag', etag)
+            self.end_headers()
+            shutil.copyfileobj(f, self.wfile)
+
+    def log_message(self, format, *args):
+        sys.stderr.write('%s %s\n' % (self.address_string(), format % args))
+
+
+class SnapshotServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--userdata', required=True, help='the Kodi userdata directory with the addon settings')
+    parser.add_argument('--home', required=True, help='the Kodi home directory, special://home')
+    parser.add_argument('--port', type=int, default=8642)
+    parser.add_argument('--bind', default='0.0.0.0')
+    parser.add_argument('--interval', type=int, default=3600, help='seconds between two imports')
+    parser.add_argument('--verbose', action='store_true', help='log to stderr')
+    args = parser.parse_args(argv)
+
+    import standalone
+    standalone.install(args.userdata, args.home, args.verbose)
+    import builder
+    import source
+    profile = builder.profilePath()
+    snapshotDir = os.path.join(profile, SNAPSHOT_DIR)
+    if not os.path.exists(snapshotDir):
+        os.makedirs(snapshotDir)
+    databasePath = os.path.join(profile, source.Database.SOURCE_DB)
+
+    SnapshotHandler.snapshotDir = snapshotDir
+    httpd = SnapshotServer((args.bind, args.port), SnapshotHandler)
+    threading.Thread(name='Guide server', target=httpd.serve_forever, daemon=True).start()
+    sys.stderr.write('serving %s on %s:%d\n' % (snapshotDir, args.bind, args.port))
+
+    output, sys.stdout = sys.stdout, sys.stderr
+    try:
+        while True:
+            server = builder.ProgressServer(profile, output)
+            try:
+                builder.build(server, False, False, maintain=True)
+            except Exception as detail:
+                sys.stderr.write('import failed: %s\n' % detail)
+            finally:
+                server.close()
+            info = publish(databasePath, snapshotDir)
+            if info is not None:
+                sys.stderr.write('published %(version)s, %(channels)d channels, %(programs)d programmes, %(size)d bytes\n' % info)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+#
+#      Copyright (C) 2026 derandere
+#      Python 3 update by derandere
+#      moddet by derandere
+#
+#  This Program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This Program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this Program; see the file LICENSE.txt.  If not, write to
+#  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
+#  http://www.gnu.org/copyleft/gpl.html
+#
+import os
+import re
+import sqlite3
+import threading
+
+import xbmc
+import xbmcvfs
+
+
+def log(x):
+    xbmc.log(repr(x), xbmc.LOGERROR)
+
+
+# same split as ConfigParser: the first '=' or ':' separates label and stream
+OPTION_RE = re.compile(r'(?P<option>.*?)\s*[=:]\s*(?P<value>.*)$')
+
+
+class IniStore(object):
+    """
+    Indexed copy of addons.ini and icons.ini.
+
+    The ini files stay the format users edit and share. Each one is imported
+    into ini.db when its size or mtime differs from the last import, so
+    opening the guide and mapping streams are indexed queries instead of a
+    full parse of the file.
+    """
+    INI_DB = 'ini.db'
+    ADDONS_INI = 'addons.ini'
+    ICONS_INI = 'icons.ini'
+
+    def __init__(self, profilePath=None):
+        if profilePath is None:
+            profilePath = xbmc.translatePath('special://profile/addon_data/script.tvguide.fullscreen/')
+        if not os.path.exists(profilePath):
+            os.makedirs(profilePath)
+        self.profilePath = profilePath
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(profilePath, IniStore.INI_DB), timeout=10, check_same_thread=False)
+        c = self.conn.cursor()
+        c.execute('CREATE TABLE IF NOT EXISTS ini_files(name TEXT PRIMARY KEY, mtime REAL, size INTEGER)')
+        c.execute('CREATE TABLE IF NOT EXISTS addon_streams(section TEXT, label TEXT, stream TEXT, position INTEGER, PRIMARY KEY(section, label))')
+        c.execute('CREATE INDEX IF NOT EXISTS addon_streams_position_idx ON addon_streams(section, position)')
+        c.execute('CREATE TABLE IF NOT EXISTS addon_sections(section TEXT PRIMARY KEY, position INTEGER)')
+        c.execute('CREATE TABLE IF NOT EXISTS icons(url TEXT PRIMARY KEY, icon TEXT)')
+        self.conn.commit()
+        c.close()
+
+    def _path(self, name):
+        return os.path.join(self.profilePath, name)
+
+    def _stat(self, name):
+        try:
+            st = os.stat(self._path(name))
+            return st.st_mtime, st.st_size
+        except OSError:
+            return None, None
+
+    def _isCurrent(self, c, name):
+        mtime, size = self._stat(name)
+        c.execute('SELECT mtime, size FROM ini_files WHERE name=?', [name])
+        row = c.fetchone()
+        return row is not None and row[0] == mtime and row[1] == size
+
+    def _markCurrent(self, c, name):
+        mtime, size = self._stat(name)
+        c.execute('INSERT OR REPLACE INTO ini_files(name, mtime, size) VALUES(?, ?, ?)', [name, mtime, size])
+
+    def _readLines(self, name):
+        path = self._path(name)
+        if not os.path.exists(path):
+            return []
+        with open(path, 'rb') as f:
+            return f.read().decode('utf8', 'ignore').splitlines()
+
+    def refreshAddons(self):
+        with self.lock:
+            c = self.conn.cursor()
+            if self._isCurrent(c, IniStore.ADDONS_INI):
+                c.close()
+                return
+            sections = []
+            streams = []
+            section = None
+            for line in self._readLines(IniStore.ADDONS_INI):
+                if not line.strip() or line[0] in '#;':
+                    continue
+                if line.startswith('['):
+                    section = line.strip('[] \t')
+                    if section not in sections:
+                        sections.append(section)
+                    continue
+                match = OPTION_RE.match(line)
+                if section is None or not match:
+                    continue
+                streams.append((section, match.group('option').strip(), match.group('value').strip(), len(streams)))
+            try:
+                c.execute('DELETE FROM addon_sections')
+                c.execute('DELETE FROM addon_streams')
+                c.executemany('INSERT OR REPLACE INTO addon_sections(section, position) VALUES(?, ?)',
+                              [(s, i) for i, s in enumerate(sections)])
+                c.executemany('INSERT OR REPLACE INTO addon_streams(section, label, stream, position) VALUES(?, ?, ?, ?)', streams)
+                self._markCurrent(c, IniStore.ADDONS_INI)
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                log(e)
+            c.close()
+
+    def refreshIcons(self):
+        with self.lock:
+            c = self.conn.cursor()
+            if self._isCurrent(c, IniStore.ICONS_INI):
+                c.close()
+                return
+            icons = []
+            for line in self._readLines(IniStore.ICONS_INI):
+                if line.startswith('[') or line.startswith('#'):
+                    continue
+                url_icon = line.rsplit('|', 1)
+                if len(url_icon) == 2:
+                    url, icon = url_icon
+                    if icon and icon != "nothing":
+                        icons.append((url, icon.rstrip('/')))
+            try:
+                c.execute('DELETE FROM icons')
+                # later lines win, as with the old line scan
+                c.executemany('INSERT OR REPLACE INTO icons(url, icon) VALUES(?, ?)', icons)
+                self._markCurrent(c, IniStore.ICONS_INI)
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                log(e)
+            c.close()
+
+    def getAddonsVersion(self):
+        """
+        Changes whenever addon_streams is reimported or written, so callers
+        can drop anything derived from it.
+        """
+        self.refreshAddons()
+        with self.lock:
+            c = self.conn.execute('SELECT mtime, size FROM ini_files WHERE name=?', [IniStore.ADDONS_INI])
+            return c.fetchone()
+
+    def getSections(self):
+        self.refreshAddons()
+        with self.lock:
+            c = self.conn.execute('SELECT section FROM addon_sections ORDER BY position')
+            return [row[0] for row in c.fetchall()]
+
+    def getStreams(self, section):
+        self.refreshAddons()
+        with self.lock:
+            c = self.conn.execute('SELECT label, stream FROM addon_streams WHERE section=? ORDER BY position', [section])
+            return c.fetchall()
+
+    def getAllStreams(self):
+        """
+        @return: (section, label, stream) for every stream, in file order
+        """
+        self.refreshAddons()
+        with self.lock:
+            c = self.conn.execute('SELECT s.section, s.label, s.stream FROM addon_streams s '
+                                  'JOIN addon_sections a ON a.section = s.section ORDER BY a.position, s.position')
+            return c.fetchall()
+
+    def setStream(self, section, label, stream):
+        self.refreshAddons()
+        with self.lock:
+            c = self.conn.cursor()
+            c.execute('INSERT OR IGNORE INTO addon_sections(section, position) VALUES(?, (SELECT COUNT(*) FROM addon_sections))', [section])
+            c.execute('UPDATE addon_streams SET stream=? WHERE section=? AND label=?', [stream, section, label])
+            if c.rowcount == 0:
+                c.execute('INSERT INTO addon_streams(section, label, stream, position) '
+                          'VALUES(?, ?, ?, (SELECT IFNULL(MAX(position), -1) + 1 FROM addon_streams))', [section, label, stream])
+            self._writeAddons(c)
+            self._markCurrent(c, IniStore.ADDONS_INI)
+            self.conn.commit()
+            c.close()
+
+    def _writeAddons(self, c):
+        lines = []
+        c.execute('SELECT section FROM addon_sections ORDER BY position')
+        for (section,) in c.fetchall():
+            lines.append("[%s]" % section)
+            c.execute('SELECT label, stream FROM addon_streams WHERE section=? ORDER BY position', [section])
+            for label, stream in c.fetchall():
+                lines.append("%s = %s" % (label, stream))
+            lines.append("")
+        f = xbmcvfs.File(self._path(IniStore.ADDONS_INI), 'wb')
+        f.write("\n".join(lines).encode("utf8"))
+        f.close()
+
+    def getIcon(self, url):
+        self.refreshIcons()
+        with self.lock:
+            c = self.conn.execute('SELECT icon FROM icons WHERE url=?', [url])
+            row = c.fetchone()
+            if row:
+                return row[0]
+            return ''
+
+    def close(self):
+        with self.lock:
+            try:
+                self.conn.close()
+            except sqlite3.Error:
+                pass
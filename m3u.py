@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#
+#      Copyright (C) 2026 derandere
+#      Python 3 update by derandere
+#      moddet by derandere
+#
+#  This Program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This Program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this Program; see the file LICENSE.txt.  If not, write to
+#  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
+#  http://www.gnu.org/copyleft/gpl.html
+#
+import re
+from collections import namedtuple
+
+ATTRIBUTE_RE = re.compile(r'([\w-]+)="(.*?)"')
+
+CHUNK_SIZE = 64 * 1024
+
+M3UEntry = namedtuple('M3UEntry', ['id', 'name', 'url', 'logo', 'group'])
+
+
+def _decode(line):
+    if isinstance(line, bytes):
+        return line.decode('utf8', 'ignore')
+    return line
+
+
+def iterFileLines(f, chunkSize=CHUNK_SIZE):
+    """
+    Lines of an open xbmcvfs.File, read a chunk at a time.
+    """
+    rest = b''
+    while True:
+        chunk = f.readBytes(chunkSize)
+        if not chunk:
+            break
+        chunk = bytes(chunk)
+        lines = (rest + chunk).split(b'\n')
+        rest = lines.pop()
+        for line in lines:
+            yield _decode(line)
+    if rest:
+        yield _decode(rest)
+
+
+def iterResponseLines(r):
+    """
+    Lines of a requests response opened with stream=True.
+    """
+    for line in r.iter_lines(chunk_size=CHUNK_SIZE):
+        yield _decode(line)
+
+
+def iterTextLines(data):
+    for line in _decode(data).splitlines():
+        yield line
+
+
+def parseM3U(lines):
+    """
+    Parse an M3U playlist one line at a time.
+
+    @param lines: iterable of str lines
+    @return: generator of M3UEntry, in playlist order
+    """
+    extinf = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#EXTINF:'):
+            extinf = line[8:]
+            continue
+        if line.startswith('#') or extinf is None:
+            continue
+
+        attributes, _, name = extinf.partition(',')
+        extinf = None
+        attributes = dict((k.lower(), v) for k, v in ATTRIBUTE_RE.findall(attributes))
+        name = name.strip()
+        id = name.replace("'", "")
+        if attributes.get('tvg-id'):
+            id = attributes['tvg-id'].replace("'", "")
+        group = attributes.get('group-title')
+        if group is not None:
+            group = group.replace('=', '-')
+        yield M3UEntry(id.replace('=', '-').strip(), name.replace('=', '-'), line, attributes.get('tvg-logo', ''), group)
@@ -19,11 +19,11 @@
 #  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
 #  http://www.gnu.org/copyleft/gpl.html
 #
-import datetime
 import os
-import xbmc
+import time
 import xbmcgui, xbmcaddon
 import source as src
+from scheduler import notifyService
 
 from strings import *
 
@@ -42,38 +42,36 @@ class Notification(object):
         return 'tvguide-%s-%s' % (programTitle, startTime)
        
     def scheduleNotifications(self):
-        for program in self.database.getFullNotifications():
-            self._scheduleNotification(program.channel.id, program.title, program.startDate)
+        # the background service owns the alarms
+        notifyService('notification')
 
-            
-    def _scheduleNotification(self, channelTitle, programTitle, startTime):
-        t = startTime - datetime.datetime.now()
-        timeToNotification = ((t.days * 86400) + t.seconds) / 60
-        if timeToNotification < 0:
-            return
+    def getAlarms(self):
+        """
+        @return: (key, when, action, args) for the service scheduler
+        """
+        alarms = []
+        for program in self.database.getFullNotifications():
+            alarms.extend(self._notificationAlarms(program.channel.title, program.title, program.startDate))
+        return alarms
 
+    def _notificationAlarms(self, channelTitle, programTitle, startTime):
         name = self.createAlarmClockName(programTitle, startTime)
+        start = time.mktime(startTime.timetuple())
+        return [
+            ('%s-5mins' % name, start - 300, self._notify, (programTitle, strings(NOTIFICATION_5_MINS, channelTitle))),
+            ('%s-now' % name, start, self._notify, (programTitle, strings(NOTIFICATION_NOW, channelTitle))),
+        ]
 
-        description = strings(NOTIFICATION_5_MINS, channelTitle)
-        xbmc.executebuiltin('AlarmClock(%s-5mins,Notification(%s,%s,10000,%s),%d,True)' %
-            (name.encode('utf-8', 'replace'), programTitle.encode('utf-8', 'replace'), description.encode('utf-8', 'replace'), self.icon, timeToNotification - 5))
-
-        description = strings(NOTIFICATION_NOW, channelTitle)
-        xbmc.executebuiltin('AlarmClock(%s-now,Notification(%s,%s,10000,%s),%d,True)' %
-                            (name.encode('utf-8', 'replace'), programTitle.encode('utf-8', 'replace'), description.encode('utf-8', 'replace'), self.icon, timeToNotification))
-
-    def _unscheduleNotification(self, programTitle, startTime):
-        name = self.createAlarmClockName(programTitle, startTime)
-        xbmc.executebuiltin('CancelAlarm(%s-5mins,True)' % name.encode('utf-8', 'replace'))
-        xbmc.executebuiltin('CancelAlarm(%s-now,True)' % name.encode('utf-8', 'replace'))
+    def _notify(self, programTitle, description):
+        xbmcgui.Dialog().notification(programTitle, description, self.icon, 10000)
 
     def addNotification(self, program, type):
         self.database.addNotification(program, type)
-        self._scheduleNotification(program.channel.title, program.title, program.startDate)
+        notifyService('notification')
 
     def removeNotification(self, program):
         self.database.removeNotification(program)
-        self._unscheduleNotification(program.title, program.startDate)
+        notifyService('notification')
 
 
 if __name__ == '__main__':
@@ -85,6 +83,7 @@ if __name__ == '__main__':
     def onInitialized(success):
         if success:
             database.clearAllNotifications()
+            notifyService('notification')
             database.close(onNotificationsCleared)
         else:
             database.close()
@@ -203,7 +203,7 @@ episode = program["episode"]
 if season and episode:
     title = f"{title} S{season}E{episode}"
 
-end_date = program["end_date"]
+end_date = convert_datetime(program["end_date"])
 duration = end_date - start_date
 
 before = int(ADDON.getSetting('autoplaywiths.before'))
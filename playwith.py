@@ -114,7 +114,7 @@ if ffmpeg:
         episode = row["episode"]
         if season and episode:
             title += " S%sE%s" % (season, episode)
-        endDate = row["end_date"]
+        endDate = convert_datetime(row["end_date"])
         duration = endDate - startDate
         before = int(ADDON.getSetting('autoplaywiths.before'))
         after = int(ADDON.getSetting('autoplaywiths.after'))
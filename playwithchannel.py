@@ -191,7 +191,7 @@ episode = program["episode"]
 if season and episode:
     title = f"{title} S{season}E{episode}"
 
-end_date = program["end_date"]
+end_date = convert_datetime(program["end_date"])
 duration = end_date - start_date
 
 before = int(ADDON.getSetting('autoplaywiths.before'))
@@ -316,7 +316,7 @@ if ffmpeg:
         episode = row["episode"]
         if season and episode:
             title += " S%sE%s" % (season, episode)
-        endDate = row["end_date"]
+        endDate = convert_datetime(row["end_date"])
         duration = endDate - startDate
         before = int(ADDON.getSetting('autoplaywiths.before'))
         after = int(ADDON.getSetting('autoplaywiths.after'))
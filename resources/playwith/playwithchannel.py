@@ -34,7 +34,7 @@ startDate = datetime.datetime.fromtimestamp(float(start))
 c.execute('SELECT DISTINCT * FROM programs WHERE channel=? AND start_date = ?', [channel,startDate])
 for row in c:
     title = row["title"]
-    endDate = row["end_date"]
+    endDate = convert_datetime(row["end_date"])
     duration = endDate - startDate
     before = int(ADDON.getSetting('autoplaywiths.before'))
     after = int(ADDON.getSetting('autoplaywiths.after'))
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+#
+#      Copyright (C) 2026 derandere
+#      Python 3 update by derandere
+#      moddet by derandere
+#
+#  This Program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This Program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this Program; see the file LICENSE.txt.  If not, write to
+#  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
+#  http://www.gnu.org/copyleft/gpl.html
+#
+import datetime
+import re
+import time
+
+# rule types, as stored in the type column of the rule tables
+ONCE = 0
+ALWAYS = 1
+NEW = 2
+DAILY = 3
+PATTERN = 4
+
+# rule kind -> table holding its rules
+RULE_TABLES = {
+    'notification': 'notifications',
+    'autoplay': 'autoplays',
+    'autoplaywith': 'autoplaywiths',
+}
+
+# types that only count for programmes ending inside the listing window
+WINDOWED_TYPES = (ALWAYS, DAILY, PATTERN)
+
+
+def likeToRegex(pattern):
+    """
+    Translate an SQL LIKE pattern into an equivalent regular expression.
+    """
+    parts = []
+    for char in pattern:
+        if char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return ''.join(parts)
+
+
+def epoch(date):
+    """
+    Integer epoch of a rule's start date, the way the programs table stores
+    programme times. Rules keep their start date as a datetime.
+    """
+    if isinstance(date, datetime.datetime):
+        return int(time.mktime(date.timetuple()))
+    return date
+
+
+def timeOfDay(seconds):
+    return time.localtime(seconds)[3:6]
+
+
+class RuleEngine(object):
+    """
+    Reminder and autoplay rules compiled for matching programmes one at a
+    time while they are imported.
+
+    Title rules are kept in a dict keyed by title and all LIKE patterns of
+    a kind are joined into a single regex, so matching a programme costs a
+    dict lookup and at most one regex match per kind no matter how many
+    rules exist.
+    """
+    def __init__(self, rules):
+        """
+        @param rules: iterable of (kind, channel, program_title, start_date, type)
+        """
+        self.byTitle = {}
+        patterns = {}
+        for kind, channel, title, startDate, type in rules:
+            try:
+                type = int(type)
+            except (TypeError, ValueError):
+                continue
+            if type == PATTERN:
+                if title:
+                    patterns.setdefault(kind, []).append(likeToRegex(title))
+                continue
+            startDate = epoch(startDate)
+            if type == DAILY:
+                startDate = None if startDate is None else timeOfDay(startDate)
+            self.byTitle.setdefault(title, []).append((kind, type, startDate, channel))
+        # LIKE is case insensitive and matches the whole title
+        self.patterns = [(kind, re.compile('|'.join('(?:%s)' % p for p in kindPatterns), re.IGNORECASE | re.DOTALL))
+                         for kind, kindPatterns in patterns.items()]
+
+    def __bool__(self):
+        return bool(self.byTitle or self.patterns)
+
+    def match(self, channel, title, startDate, isNew):
+        """
+        @param startDate: programme start as an integer epoch
+        @return: set of (kind, type, onChannel) for the rules matching the
+                 programme, onChannel tells if the rule was set on the
+                 programme's channel. Pattern rules apply to every channel.
+        """
+        matches = set()
+        for kind, type, ruleStart, ruleChannel in self.byTitle.get(title, ()):
+            if type == ONCE:
+                matched = ruleStart == startDate
+            elif type == NEW:
+                matched = isNew == 'New'
+            elif type == DAILY:
+                matched = ruleStart is not None and startDate is not None and ruleStart == timeOfDay(startDate)
+            else:
+                matched = type == ALWAYS
+            if matched:
+                matches.add((kind, type, ruleChannel == channel))
+        if title:
+            for kind, regex in self.patterns:
+                if regex.fullmatch(title):
+                    matches.add((kind, PATTERN, True))
+        return matches
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+#
+#      Copyright (C) 2026 derandere
+#      Python 3 update by derandere
+#      moddet by derandere
+#
+#  This Program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This Program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this Program; see the file LICENSE.txt.  If not, write to
+#  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
+#  http://www.gnu.org/copyleft/gpl.html
+#
+import heapq
+import itertools
+import threading
+import time
+
+import xbmc
+
+SENDER = 'script.tvguide.fullscreen'
+SCHEDULE_MESSAGE = 'schedule'
+
+
+def log(x):
+    xbmc.log(repr(x), xbmc.LOGERROR)
+
+
+def notifyService(group=''):
+    """
+    Ask the background service to reload its alarms for group, or for
+    every group when group is empty.
+    """
+    message = SCHEDULE_MESSAGE
+    if group:
+        message = '%s.%s' % (SCHEDULE_MESSAGE, group)
+    xbmc.executebuiltin('NotifyAll(%s,%s)' % (SENDER, message))
+
+
+def parseNotification(sender, method):
+    """
+    @return: the group named by a notifyService() message, '' for all
+             groups, None if the notification is not one of ours
+    """
+    if sender != SENDER:
+        return None
+    message = method.split('.', 1)[-1] if method.startswith('Other.') else method
+    if message == SCHEDULE_MESSAGE:
+        return ''
+    if message.startswith(SCHEDULE_MESSAGE + '.'):
+        return message[len(SCHEDULE_MESSAGE) + 1:]
+    return None
+
+
+class Alarm(object):
+    __slots__ = ['when', 'seq', 'key', 'group', 'action', 'args', 'cancelled']
+
+    def __init__(self, when, seq, key, group, action, args):
+        self.when = when
+        self.seq = seq
+        self.key = key
+        self.group = group
+        self.action = action
+        self.args = args
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.when, self.seq) < (other.when, other.seq)
+
+
+class Scheduler(object):
+    """
+    Timer heap for the alarms of the background service.
+
+    Alarms are keyed like the old AlarmClock names within their group, so
+    scheduling the same key twice keeps a single alarm. Replaced and
+    cancelled alarms are only flagged and dropped when they reach the top
+    of the heap. Each group (notifications, autoplays, ...) keeps at most
+    maxPerGroup upcoming alarms; the caller reloads a group once
+    nextReload() for it is due.
+    """
+    MAX_PER_GROUP = 200
+
+    def __init__(self, maxPerGroup=MAX_PER_GROUP):
+        self.maxPerGroup = maxPerGroup
+        self.lock = threading.RLock()
+        self.heap = []
+        self.alarms = {}
+        self.groups = {}
+        self.reloadAt = {}
+        self.counter = itertools.count()
+
+    def schedule(self, key, when, action, *args, **kwargs):
+        """
+        @param when: epoch seconds
+        """
+        group = kwargs.get('group', '')
+        with self.lock:
+            alarm = self.alarms.get((group, key))
+            if alarm is not None:
+                if alarm.when == when:
+                    alarm.action = action
+                    alarm.args = args
+                    return
+                self._cancel(alarm)
+            alarm = Alarm(when, next(self.counter), key, group, action, args)
+            self.alarms[(group, key)] = alarm
+            self.groups.setdefault(group, set()).add(key)
+            heapq.heappush(self.heap, alarm)
+
+    def cancel(self, key, group=''):
+        with self.lock:
+            alarm = self.alarms.get((group, key))
+            if alarm is not None:
+                self._cancel(alarm)
+
+    def _cancel(self, alarm):
+        alarm.cancelled = True
+        del self.alarms[(alarm.group, alarm.key)]
+        self.groups.get(alarm.group, set()).discard(alarm.key)
+
+    def replaceGroup(self, group, items, now=None):
+        """
+        Make items the alarms of group. Alarms that did not change are left
+        alone, the rest of the group is cancelled.
+
+        @param items: iterable of (key, when, action, args)
+        """
+        if now is None:
+            now = time.time()
+        items = sorted((item for item in items if item[1] >= now), key=lambda item: item[1])
+        reloadAt = None
+        if len(items) > self.maxPerGroup:
+            items = items[:self.maxPerGroup]
+            reloadAt = items[-1][1]
+        with self.lock:
+            keep = set(item[0] for item in items)
+            for key in list(self.groups.get(group, ())):
+                if key not in keep:
+                    self._cancel(self.alarms[(group, key)])
+            for key, when, action, args in items:
+                self.schedule(key, when, action, *args, group=group)
+            self.reloadAt[group] = reloadAt
+
+    def nextReload(self):
+        """
+        @return: (when, group) of the earliest group that ran out of loaded
+                 alarms, or None
+        """
+        with self.lock:
+            due = [(when, group) for group, when in self.reloadAt.items() if when is not None]
+        if due:
+            return min(due)
+        return None
+
+    def nextDue(self):
+        with self.lock:
+            while self.heap and self.heap[0].cancelled:
+                heapq.heappop(self.heap)
+            if self.heap:
+                return self.heap[0].when
+        return None
+
+    def runDue(self, now=None):
+        """
+        Run every alarm that is due, in time order.
+        @return: number of alarms run
+        """
+        count = 0
+        while True:
+            if now is None:
+                current = time.time()
+            else:
+                current = now
+            with self.lock:
+                while self.heap and self.heap[0].cancelled:
+                    heapq.heappop(self.heap)
+                if not self.heap or self.heap[0].when > current:
+                    return count
+                alarm = heapq.heappop(self.heap)
+                self._cancel(alarm)
+            try:
+                alarm.action(*alarm.args)
+            except Exception as e:
+                log(e)
+            count += 1
+
+    def __len__(self):
+        with self.lock:
+            return len(self.alarms)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Headless performance regression suite for the guide database.
+
+Usage: python3 scripts/benchmark.py [--channels N] [--days N] [--per-day N]
+                                    [--mirrors N] [--repeat N] [--output results.json]
+                                    [--thresholds FILE] [--update-thresholds]
+
+Generates a synthetic guide with scripts/guidegen.py and times the hot paths
+of source.Database on the Kodi stubs from backups/stubs_backup.tar.gz (see
+scripts/headless.py): full and incremental XMLTV import, M3U import, EPG
+pages, now/next lists, searches and the reminder scan. The size of the
+database after the last import is reported with them.
+
+Each scenario runs --repeat times. The results go to JSON and the best run
+is compared with scripts/benchmark_thresholds.json: a scenario fails when it
+exceeds the recorded baseline by more than the tolerance. Baselines are only
+compared for the workload they were recorded with and are machine specific;
+--update-thresholds records the current best runs as the new baselines.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import db_report  # noqa: E402
+import guidegen  # noqa: E402
+import headless  # noqa: E402
+
+THRESHOLDS = ROOT / 'scripts' / 'benchmark_thresholds.json'
+TOLERANCE = 0.25
+SLACK_MS = 5.0
+
+# reminder rules: (title, type) with the types of rules.py
+RULES = [(guidegen.title(n), n % 4) for n in range(0, guidegen.TITLES, 50)] + [('Show 12%', 4)]
+
+
+class Bench(object):
+
+    def __init__(self, workdir, xmltv, m3uFile):
+        import source
+        self.source = source
+        self.workdir = workdir
+        self.xmltv = xmltv
+        self.m3uFile = m3uFile
+        self.db = None
+
+    def makeSource(self):
+        source = self.source
+
+        class BenchSource(source.XMLTVSource):
+            def __init__(self, xmltvFile):
+                self.needReset = False
+                self.fetchError = False
+                self.xmltvFile = xmltvFile
+                self.xmltv2File = self.xmltv3File = None
+                self.logoSource = 0
+                self.logoFolder = None
+                self.updated = True
+
+            def isUpdated(self, channelsLastUpdated, programLastUpdate):
+                return self.updated
+
+        return BenchSource(self.xmltv)
+
+    def openDatabase(self):
+        """
+        A Database on a fresh file, used directly without its event loop.
+        """
+        source = self.source
+        if self.db is not None:
+            self.db.conn.close()
+            if self.db.guideFile is not None:
+                self.db.guideFile.close()
+        path = os.path.join(self.workdir, 'source.db')
+        for suffix in ['', '-wal', '-shm', '-journal']:
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        db = source.Database.__new__(source.Database)
+        db.guideFilePath = os.path.join(self.workdir, source.Database.GUIDE_FILE)
+        db.guideFile = None
+        db.source = self.makeSource()
+        db.eventQueue = []
+        db.rulesChanged = 0
+        db.channelList = None
+        db.category = 'Any'
+        db.iniStore = None
+        db.updateInProgress = False
+        db.updateFailed = False
+        db.settingsChanged = False
+        sqlite3.register_adapter(datetime.datetime, db.adapt_datetime)
+        sqlite3.register_converter('timestamp', db.convert_datetime)
+        db.conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+        db.conn.execute('PRAGMA foreign_keys = ON')
+        db.conn.row_factory = sqlite3.Row
+        db._createTables()
+        now = datetime.datetime.now()
+        c = db.conn.cursor()
+        c.execute('INSERT OR IGNORE INTO sources(id, channels_updated) VALUES(?, ?)', [db.source.KEY, 0])
+        c.execute('INSERT INTO channels(id, title, source, visible, weight) VALUES(?, ?, ?, 1, 0)',
+                  [guidegen.channelId(1), 'Channel 1', db.source.KEY])
+        for table in ['notifications', 'autoplays']:
+            c.executemany('INSERT INTO %s(channel, program_title, source, start_date, type) VALUES(?, ?, ?, ?, ?)' % table,
+                          [(guidegen.channelId(1), title, db.source.KEY, now, type) for title, type in RULES])
+        db.conn.commit()
+        self.db = db
+        return db
+
+    def importGuide(self, clearExistingProgramList, date):
+        self.db.source.updated = True
+        self.db._updateChannelAndProgramListCaches(date, None, clearExistingProgramList)
+        self.db.source.updated = False
+        if self.db.updateFailed:
+            raise RuntimeError('import failed')
+
+    # scenarios, each returns the number of items it produced
+
+    def fullImport(self):
+        self.openDatabase()
+        self.importGuide(True, datetime.datetime.now())
+        return self.db.conn.execute('SELECT COUNT(*) FROM programs').fetchone()[0]
+
+    def incrementalImport(self):
+        self.importGuide(False, datetime.datetime.now() + datetime.timedelta(days=1))
+        return self.db.conn.execute('SELECT COUNT(*) FROM programs').fetchone()[0]
+
+    def m3uImport(self):
+        import m3u
+        import utils
+        import xbmcvfs
+        channels = {}
+        streamUrls = []
+        f = xbmcvfs.File(self.m3uFile, 'rb')
+        for entry in m3u.parseM3U(m3u.iterFileLines(f)):
+            if entry.id and entry.url:
+                streamUrls.append((entry.id, entry.url))
+                channels.setdefault(entry.id, utils.Channel(entry.id, entry.name, None, entry.logo, entry.url, visible=True, weight=-1))
+        f.close()
+        self.db._importM3U(list(channels.values()), streamUrls, False)
+        return len(streamUrls)
+
+    def epgPages(self):
+        date = datetime.datetime.now().replace(minute=0, second=0, microsecond=0)
+        count = 0
+        perPage = self.source.Database.CHANNELS_PER_PAGE
+        for page in range(10):
+            channelStart, channels, programs = self.db._getEPGView(page * perPage, date, None, False, 'Any')
+            count += len(programs)
+        return count
+
+    def nowNext(self):
+        return len(self.db._getNowList()) + len(self.db._getNextList())
+
+    def search(self):
+        return (len(self.db._programSearch('Show 12')) + len(self.db._descriptionSearch('topic 99'))
+                + len(self.db._programSearch('nothing matches this')))
+
+    def notificationScan(self):
+        return len(self.db._getFullNotifications(7)) + len(self.db._getFullAutoplays(7))
+
+
+# in run order, full_import starts each round on a fresh database
+SCENARIOS = [
+    ('full_import', 'fullImport'),
+    ('incremental_import', 'incrementalImport'),
+    ('m3u_import', 'm3uImport'),
+    ('epg_pages', 'epgPages'),
+    ('now_next', 'nowNext'),
+    ('search', 'search'),
+    ('notification_scan', 'notificationScan'),
+]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    items = fn()
+    return (time.perf_counter() - start) * 1000, items
+
+
+def run(args, workdir):
+    headless.install(workdir)
+    xmltv, m3uFile = guidegen.generate(os.path.join(workdir, 'guide'), args.channels, args.days, args.per_day,
+                                       mirrors=args.mirrors)
+    bench = Bench(workdir, xmltv, m3uFile)
+    results = {}
+    for repeat in range(args.repeat):
+        for name, method in SCENARIOS:
+            ms, items = timed(getattr(bench, method))
+            result = results.setdefault(name, {'runs_ms': [], 'items': items})
+            result['runs_ms'].append(round(ms, 2))
+    for name, result in results.items():
+        result['median_ms'] = round(statistics.median(result['runs_ms']), 2)
+        result['min_ms'] = min(result['runs_ms'])
+    database = {'bytes': db_report.fileSize(bench.db.conn), 'free_bytes': db_report.freeSize(bench.db.conn),
+                'objects': db_report.objectSizes(bench.db.conn)}
+    bench.db.conn.close()
+    if bench.db.guideFile is not None:
+        bench.db.guideFile.close()
+    return results, database
+
+
+def workload(args):
+    return {'channels': args.channels, 'days': args.days, 'per_day': args.per_day, 'mirrors': args.mirrors}
+
+
+def loadThresholds(path):
+    if not os.path.exists(path):
+        return {'tolerance': TOLERANCE, 'slack_ms': SLACK_MS, 'workload': None, 'scenarios': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, thresholds, currentWorkload):
+    """
+    @return: list of (name, min_ms, limit_ms) of scenarios over their limit
+    """
+    if thresholds.get('workload') != currentWorkload:
+        print('thresholds were recorded for workload %s, not compared' % thresholds.get('workload'))
+        return []
+    failures = []
+    for name, result in results.items():
+        threshold = thresholds['scenarios'].get(name)
+        if not threshold:
+            continue
+        tolerance = threshold.get('tolerance', thresholds.get('tolerance', TOLERANCE))
+        limit = threshold['baseline_ms'] * (1 + tolerance) + thresholds.get('slack_ms', SLACK_MS)
+        if result['min_ms'] > limit:
+            failures.append((name, result['min_ms'], limit))
+    return failures
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--channels', type=int, default=200)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--per-day', type=int, default=48)
+    parser.add_argument('--mirrors', type=int, default=0, help='channels repeating another channel an hour later')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=None, help='write the results as JSON to this file')
+    parser.add_argument('--thresholds', default=str(THRESHOLDS))
+    parser.add_argument('--update-thresholds', action='store_true')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results, database = run(args, workdir)
+
+    print(f'{"scenario":<22} {"median ms":>10} {"min ms":>10} {"items":>9}')
+    for name, result in results.items():
+        print(f'{name:<22} {result["median_ms"]:10.1f} {result["min_ms"]:10.1f} {result["items"]:9d}')
+    print(f'database {database["bytes"] / 1024.0 / 1024.0:.1f} MB, {database["free_bytes"] / 1024.0 / 1024.0:.1f} MB free')
+
+    report = {
+        'workload': workload(args),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sqlite': sqlite3.sqlite_version,
+        'scenarios': results,
+        'database': database,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    thresholds = loadThresholds(args.thresholds)
+    if args.update_thresholds:
+        thresholds['workload'] = workload(args)
+        for name, result in results.items():
+            thresholds['scenarios'].setdefault(name, {})['baseline_ms'] = result['min_ms']
+        with open(args.thresholds, 'w') as f:
+            json.dump(thresholds, f, indent=2, sort_keys=True)
+            f.write('\n')
+        return 0
+
+    failures = compare(results, thresholds, workload(args))
+    for name, best, limit in failures:
+        print(f'{name} is slower: {best:.1f} ms, limit {limit:.1f} ms')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Report the size of a guide database and the time of its main read queries.
+
+Usage: python3 scripts/db_report.py [source.db]
+
+Works on a copy of source.db from any schema version, the programs view of
+1.4.6 keeps the columns of the old programs table. Run it on a database
+before and after it was upgraded to compare the two. Sizes per table and
+index need SQLite built with the dbstat table, otherwise only the file size
+is shown.
+"""
+import os
+import sqlite3
+import sys
+import time
+
+PATH = os.path.expanduser('~/.kodi/userdata/addon_data/script.tvguide.fullscreen/source.db')
+RUNS = 5
+
+# representative reads: an EPG page, now/next, a title search and a channel listing
+QUERIES = [
+    ('epg_page', 'SELECT * FROM programs WHERE channel IN (%(channels)s) AND source=? AND end_date > ? AND start_date < ?',
+     lambda now: [now, now + 7200]),
+    ('now', 'SELECT * FROM programs WHERE channel IN (%(channels)s) AND source=? AND end_date >= ? AND start_date <= ?',
+     lambda now: [now, now]),
+    ('title_search', 'SELECT * FROM programs WHERE channel IN (%(channels)s) AND source=? AND title LIKE ?',
+     lambda now: ['%News%']),
+    ('channel_listing', 'SELECT * FROM programs WHERE channel=? AND source=? AND end_date > ? AND start_date < ?',
+     lambda now: [now, now + 7 * 86400]),
+]
+
+
+def objectSizes(conn):
+    """
+    @return: list of (name, bytes) of tables and indexes, largest first,
+             or None without dbstat
+    """
+    try:
+        rows = conn.execute('SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY 2 DESC').fetchall()
+    except sqlite3.OperationalError:
+        return None
+    return [(name, size) for name, size in rows]
+
+
+def fileSize(conn):
+    pageSize = conn.execute('PRAGMA page_size').fetchone()[0]
+    return conn.execute('PRAGMA page_count').fetchone()[0] * pageSize
+
+
+def freeSize(conn):
+    pageSize = conn.execute('PRAGMA page_size').fetchone()[0]
+    return conn.execute('PRAGMA freelist_count').fetchone()[0] * pageSize
+
+
+def timeQueries(conn):
+    """
+    @return: list of (name, best ms, rows)
+    """
+    source = conn.execute('SELECT id FROM sources LIMIT 1').fetchone()[0]
+    channels = [row[0] for row in conn.execute('SELECT id FROM channels WHERE source=? ORDER BY weight LIMIT 20', [source])]
+    # programme times may be epoch floats in old schema versions, compare them as numbers
+    now = int(time.time())
+    results = []
+    for name, sql, params in QUERIES:
+        if '%(channels)s' in sql:
+            sql = sql % {'channels': ','.join('?' * len(channels))}
+            args = channels + [source] + params(now)
+        else:
+            args = channels[:1] + [source] + params(now)
+        best = None
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            rows = len(conn.execute(sql, args).fetchall())
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        results.append((name, best, rows))
+    return results
+
+
+def main(path):
+    conn = sqlite3.connect('file:%s?mode=ro' % path, uri=True)
+    version = conn.execute('SELECT major, minor, patch FROM version').fetchone()
+    print('%s, schema %d.%d.%d, %.1f MB, %.1f MB free' % (path, version[0], version[1], version[2], fileSize(conn) / 1024.0 / 1024.0,
+                                                        freeSize(conn) / 1024.0 / 1024.0))
+
+    sizes = objectSizes(conn)
+    if sizes is None:
+        print('no dbstat in this SQLite, sizes per table are not available')
+    else:
+        print(f'\n{"table or index":<36} {"MB":>8}')
+        for name, size in sizes:
+            if size >= 64 * 1024:
+                print(f'{name:<36} {size / 1024.0 / 1024.0:8.2f}')
+
+    print(f'\n{"query":<20} {"best ms":>9} {"rows":>7}')
+    for name, ms, rows in timeQueries(conn):
+        print(f'{name:<20} {ms:9.2f} {rows:7d}')
+    conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1] if len(sys.argv) > 1 else PATH))
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Generate a synthetic XMLTV guide and M3U playlist for benchmarks.
+
+Usage: python3 scripts/guidegen.py OUTDIR [channels] [days] [programmes_per_day] [mirrors]
+
+Writes OUTDIR/guide.xml and OUTDIR/playlist.m3u. Defaults to 200 channels,
+7 days and 48 programmes per channel per day, starting at midnight today.
+The output only depends on the arguments and the start date, titles are drawn
+from a fixed pool so searches and reminder rules hit a predictable share of
+the programmes.
+
+Mirrors are extra channels airing the schedule of one of the first channels
+an hour later, with the same descriptions and icons, like the +1 and
+regional variants of multi-region feeds. There are none by default.
+"""
+import datetime
+import os
+import random
+import sys
+from xml.sax.saxutils import escape, quoteattr
+
+TITLES = 5000
+CATEGORIES = ['News', 'Sports', 'Movie', 'Documentary', 'Kids', 'Drama', 'Comedy', 'Music']
+
+
+def title(n):
+    return 'Show %d' % n
+
+
+def channelId(n):
+    return 'ch%d' % n
+
+
+def startOfToday():
+    return datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def xmltvDate(date):
+    return date.strftime('%Y%m%d%H%M%S') + ' +0000'
+
+
+def programme(ch, programmeStart, programmeEnd, n, topic, isNew):
+    category = CATEGORIES[n % len(CATEGORIES)]
+    parts = ['  <programme start="%s" stop="%s" channel=%s>\n' % (
+                 xmltvDate(programmeStart), xmltvDate(programmeEnd), quoteattr(channelId(ch))),
+             '    <title lang="en">%s</title>\n' % escape(title(n)),
+             '    <desc lang="en">Episode of %s about topic %d.</desc>\n' % (escape(title(n)), topic),
+             '    <category lang="en">%s</category>\n' % category]
+    if category == 'Movie':
+        parts.append('    <date>%d</date>\n' % (1950 + n % 70))
+    if isNew:
+        parts.append('    <new/>\n')
+    parts.append('  </programme>\n')
+    return ''.join(parts)
+
+
+def iterXmltv(channels, days, perDay, start, seed=0, mirrors=0):
+    """
+    @return: generator of XMLTV document chunks
+    """
+    rnd = random.Random(seed)
+    length = datetime.timedelta(minutes=24 * 60 // perDay)
+    shift = datetime.timedelta(hours=1)
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n<tv generator-info-name="guidegen">\n'
+    for ch in range(channels + mirrors):
+        yield ('  <channel id=%s>\n    <display-name>Channel %d</display-name>\n'
+               '    <icon src="http://logo.example/%d.png"/>\n  </channel>\n' % (quoteattr(channelId(ch)), ch, ch))
+    # schedules of the channels that are mirrored
+    schedules = {}
+    for ch in range(channels):
+        programmeStart = start
+        for _ in range(days * perDay):
+            programmeEnd = programmeStart + length
+            n = rnd.randrange(TITLES)
+            topic = rnd.randrange(1000)
+            isNew = rnd.random() < 0.1
+            if ch < mirrors:
+                schedules.setdefault(ch, []).append((programmeStart, programmeEnd, n, topic, isNew))
+            yield programme(ch, programmeStart, programmeEnd, n, topic, isNew)
+            programmeStart = programmeEnd
+    for mirror in range(mirrors):
+        for programmeStart, programmeEnd, n, topic, isNew in schedules.get(mirror % channels, []):
+            yield programme(channels + mirror, programmeStart + shift, programmeEnd + shift, n, topic, isNew)
+    yield '</tv>\n'
+
+
+def iterM3u(channels):
+    yield '#EXTM3U\n'
+    for ch in range(channels):
+        yield ('#EXTINF:-1 tvg-id="%s" tvg-name="Channel %d" tvg-logo="http://logo.example/%d.png" group-title="Group %d",Channel %d\n'
+               'http://stream.example/live/%d.m3u8\n' % (channelId(ch), ch, ch, ch % 20, ch, ch))
+
+
+def write(path, chunks):
+    with open(path, 'w', encoding='utf8') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return path
+
+
+def generate(outdir, channels=200, days=7, perDay=48, start=None, mirrors=0):
+    """
+    @return: (xmltv path, m3u path)
+    """
+    if start is None:
+        start = startOfToday()
+    if not os.path.isdir(outdir):
+        os.makedirs(outdir)
+    return (write(os.path.join(outdir, 'guide.xml'), iterXmltv(channels, days, perDay, start, mirrors=mirrors)),
+            write(os.path.join(outdir, 'playlist.m3u'), iterM3u(channels + mirrors)))
+
+
+def main(argv):
+    if not argv:
+        print(__doc__)
+        return 2
+    numbers = [int(a) for a in argv[1:5]]
+    for path in generate(argv[0], *numbers[:3], mirrors=numbers[3] if len(numbers) > 3 else 0):
+        print('%s %.1f MB' % (path, os.path.getsize(path) / 1024.0 / 1024.0))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
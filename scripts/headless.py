@@ -0,0 +1,231 @@
+"""Run the addon modules on plain Linux, outside Kodi, for the benchmarks.
+
+install() extracts the Kodi stubs shipped in backups/stubs_backup.tar.gz,
+puts them first on sys.path and adds what the stubs leave out but the import
+and query paths touch: special:// paths mapped into a scratch directory,
+xbmcvfs files that can be read in chunks, settings answered with the defaults
+from resources/settings.xml and a quiet xbmc.log.
+
+Import source and the other addon modules only after install().
+"""
+import os
+import shutil
+import sys
+import tarfile
+from pathlib import Path
+from xml.etree import ElementTree
+
+ROOT = Path(__file__).resolve().parent.parent
+STUBS_ARCHIVE = ROOT / 'backups' / 'stubs_backup.tar.gz'
+ADDON_ID = 'script.tvguide.fullscreen.reborn'
+
+# settings that differ from resources/settings.xml for headless runs
+SETTINGS = {
+    'update.progress': 'false',
+}
+
+
+def defaultSettings():
+    settings = {}
+    for setting in ElementTree.parse(str(ROOT / 'resources' / 'settings.xml')).iter('setting'):
+        if 'id' in setting.attrib:
+            settings[setting.attrib['id']] = setting.attrib.get('default', '')
+    settings.update(SETTINGS)
+    return settings
+
+
+class SpecialPaths(object):
+    """
+    Maps special://profile, special://home and the rest of special:// into
+    a scratch directory.
+    """
+
+    def __init__(self, workdir):
+        self.workdir = str(workdir)
+
+    def translate(self, path):
+        path = str(path)
+        if not path.startswith('special://'):
+            return path
+        rest = path[len('special://'):]
+        translated = os.path.join(self.workdir, rest)
+        return translated + os.sep if path.endswith('/') else translated
+
+
+def install(workdir, settings=None):
+    """
+    @param workdir: scratch directory for the stubs and special:// paths
+    @param settings: extra setting overrides
+    @return: SpecialPaths of workdir
+    """
+    workdir = Path(workdir)
+    stubs = workdir / 'stubs'
+    with tarfile.open(str(STUBS_ARCHIVE)) as tar:
+        tar.extractall(str(stubs))
+    sys.path.insert(0, str(ROOT))
+    sys.path.insert(0, str(stubs / 'tests' / 'stubs'))
+    paths = SpecialPaths(workdir / 'special')
+    os.makedirs(paths.translate('special://profile/addon_data/script.tvguide.fullscreen/'), exist_ok=True)
+    values = defaultSettings()
+    values.update(settings or {})
+
+    import xbmc
+    import xbmcaddon
+    import xbmcgui
+    import xbmcvfs
+    _completeXbmc(xbmc, paths)
+    _completeXbmcvfs(xbmcvfs, paths)
+    _completeXbmcgui(xbmcgui)
+    _completeXbmcaddon(xbmcaddon, paths, values)
+    return paths
+
+
+def _completeXbmc(xbmc, paths):
+    xbmc.LOGINFO = getattr(xbmc, 'LOGINFO', 1)
+    xbmc.LOGWARNING = getattr(xbmc, 'LOGWARNING', 2)
+    xbmc.log = lambda msg, level=0: None
+    xbmc.executebuiltin = lambda *args: None
+    xbmc.translatePath = paths.translate
+    xbmc.getCondVisibility = lambda condition: False
+
+    class Monitor(object):
+        def abortRequested(self):
+            return False
+
+        def waitForAbort(self, timeout=0):
+            return False
+
+    class Player(object):
+        def isPlaying(self):
+            return False
+
+    xbmc.Monitor = Monitor
+    xbmc.Player = Player
+
+
+def _completeXbmcvfs(xbmcvfs, paths):
+    translate = paths.translate
+
+    class File(object):
+        def __init__(self, path, mode='r'):
+            self.path = translate(path)
+            self.handle = None
+            try:
+                if 'w' in mode:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    self.handle = open(self.path, 'wb')
+                else:
+                    self.handle = open(self.path, 'rb')
+            except IOError:
+                pass
+
+        def read(self, count=-1):
+            if self.handle is None:
+                return b''
+            return self.handle.read(count)
+
+        readBytes = read
+
+        def write(self, data):
+            if self.handle is None:
+                return False
+            self.handle.write(data.encode('utf8') if isinstance(data, str) else data)
+            return True
+
+        def size(self):
+            return os.path.getsize(self.path) if self.handle is not None else 0
+
+        def close(self):
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
+
+        def __bool__(self):
+            return self.handle is not None
+
+    class Stat(object):
+        def __init__(self, path):
+            self.stat = os.stat(translate(path))
+
+        def st_mtime(self):
+            return self.stat.st_mtime
+
+        def st_size(self):
+            return self.stat.st_size
+
+    def delete(path):
+        try:
+            os.remove(translate(path))
+            return True
+        except OSError:
+            return False
+
+    def copy(source, destination):
+        try:
+            shutil.copyfile(translate(source), translate(destination))
+            return True
+        except IOError:
+            return False
+
+    def mkdirs(path):
+        os.makedirs(translate(path), exist_ok=True)
+        return True
+
+    def listdir(path):
+        path = translate(path)
+        if not os.path.isdir(path):
+            return [], []
+        names = os.listdir(path)
+        return ([n for n in names if os.path.isdir(os.path.join(path, n))],
+                [n for n in names if not os.path.isdir(os.path.join(path, n))])
+
+    xbmcvfs.File = File
+    xbmcvfs.Stat = Stat
+    xbmcvfs.exists = lambda path: os.path.exists(translate(path))
+    xbmcvfs.delete = delete
+    xbmcvfs.copy = copy
+    xbmcvfs.mkdir = mkdirs
+    xbmcvfs.mkdirs = mkdirs
+    xbmcvfs.listdir = listdir
+    xbmcvfs.rename = lambda source, destination: os.replace(translate(source), translate(destination)) or True
+    xbmcvfs.translatePath = translate
+
+
+def _completeXbmcgui(xbmcgui):
+    class DialogProgressBG(object):
+        def create(self, *args, **kwargs):
+            pass
+
+        def update(self, *args, **kwargs):
+            pass
+
+        def close(self):
+            pass
+
+        def isFinished(self):
+            return False
+
+    xbmcgui.DialogProgressBG = DialogProgressBG
+    xbmcgui.DialogProgress = DialogProgressBG
+    xbmcgui.Dialog.notification = lambda self, *args, **kwargs: None
+
+
+def _completeXbmcaddon(xbmcaddon, paths, values):
+    info = {
+        'id': ADDON_ID,
+        'name': 'TV Guide Fullscreen',
+        'path': str(ROOT),
+        'profile': 'special://profile/addon_data/script.tvguide.fullscreen/',
+    }
+
+    def getSetting(self, key):
+        return values.get(key, '')
+
+    def setSetting(self, key, value):
+        values[key] = value
+
+    xbmcaddon.Addon.getSetting = getSetting
+    xbmcaddon.Addon.setSetting = setSetting
+    xbmcaddon.Addon.getSettingBool = lambda self, key: values.get(key, '') == 'true'
+    xbmcaddon.Addon.getAddonInfo = lambda self, key: info.get(key, '')
+    xbmcaddon.Addon.getLocalizedString = lambda self, id: str(id)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Report what importing a module of the addon costs, like python -X importtime.
+
+Usage: python3 scripts/import_report.py [module] [--budget MS]
+
+Imports the module (default gui) in fresh interpreters with -X importtime, on
+the Kodi stubs of scripts/headless.py, and prints the imports with the highest
+cumulative time from the fastest run. The first run only warms the bytecode
+cache, as Kodi does after the first start.
+
+Exits with 1 when the import takes longer than --budget ms (default 100) or
+pulls in one of the modules that are only meant to be loaded on first use.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+RUNS = 5
+TOP = 15
+
+# the Kodi modules are there before the addon is imported, as in Kodi
+CHILD = '''
+import sys
+sys.path.insert(0, %r)
+import headless
+headless.install(%r)
+import %s
+'''
+
+# network and scraping helpers that must not be loaded before the first EPG frame
+LAZY_MODULES = ['requests', 'bs4', 'dateutil', 'sdAPI', 'vpnapi', 'resources.lib.pytz', 'builder']
+
+
+def run_importtime(module, workdir):
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    code = CHILD % (str(ROOT / 'scripts'), str(workdir), module)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=str(ROOT), env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit('importing %s failed' % module)
+    return parse_importtime(result.stderr)
+
+
+def parse_importtime(output):
+    """
+    @return: list of (name, depth, self_us, cumulative_us) in import order
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def subtree(entries, module):
+    """
+    @return: the entry of module and of everything imported while importing it
+    """
+    index = next(i for i, e in enumerate(entries) if e[0] == module)
+    depth = entries[index][1]
+    start = index
+    while start > 0 and entries[start - 1][1] > depth:
+        start -= 1
+    return entries[start:index + 1]
+
+
+def report(module, budget_ms, workdir):
+    run_importtime(module, workdir)
+    runs = [run_importtime(module, workdir) for _ in range(RUNS)]
+    totals = [next(e[3] for e in run if e[0] == module) for run in runs]
+    best = subtree(runs[totals.index(min(totals))], module)
+
+    print(f'{"self ms":>9} {"cumul ms":>9}  module')
+    for name, depth, self_us, cumulative_us in sorted(best, key=lambda e: e[3], reverse=True)[:TOP]:
+        print(f'{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {"  " * depth}{name}')
+
+    total_ms = min(totals) / 1000
+    print(f'\nimport {module}: {total_ms:.1f} ms (best of {RUNS}), budget {budget_ms:.0f} ms')
+
+    failed = False
+    loaded = set(e[0] for e in best)
+    eager = [m for m in LAZY_MODULES if m in loaded]
+    if eager:
+        print('loaded eagerly: %s' % ', '.join(eager))
+        failed = True
+    if total_ms > budget_ms:
+        print('over budget')
+        failed = True
+    return 1 if failed else 0
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('module', nargs='?', default='gui', help='the addon module to import')
+    parser.add_argument('--budget', type=float, default=100.0, help='import time allowed, in ms')
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix='tvguide-import-') as workdir:
+        return report(args.module, args.budget, workdir)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -8,7 +8,8 @@
 
 import time
 import datetime
-import base64
+import sqlite3
+import threading
 
 import xbmc
 import xbmcgui
@@ -18,7 +19,10 @@ import xbmcvfs
 import notification
 import autoplay
 import autoplaywith
+import builder
 import source
+from scheduler import Scheduler, parseNotification
+from settings import SETTINGS
 
 
 # ------------------------------------------------------------
@@ -34,15 +38,197 @@ def log(msg, level=xbmc.LOGDEBUG):
     xbmc.log('[script.tvguide.fullscreen] %s' % repr(msg), level)
 
 
+# ------------------------------------------------------------
+# Alarms
+# ------------------------------------------------------------
+CATCHUP_LIST = 'special://profile/addon_data/script.tvguide.fullscreen/catchup_channel.list'
+
+
+class ServiceMonitor(xbmc.Monitor):
+
+    def __init__(self):
+        super(ServiceMonitor, self).__init__()
+        self.lock = threading.Lock()
+        self.requests = set()
+
+    def onNotification(self, sender, method, data):
+        group = parseNotification(sender, method)
+        if group is not None:
+            self.requestReload(group)
+
+    def onSettingsChanged(self):
+        SETTINGS.refresh()
+
+    def requestReload(self, group=''):
+        with self.lock:
+            self.requests.add(group)
+
+    def takeRequests(self):
+        with self.lock:
+            requests = self.requests
+            self.requests = set()
+            return requests
+
+
+class Alarms(object):
+    """
+    Runs the reminder, autoplay and catchup alarms from one timer heap
+    instead of an AlarmClock per programme.
+
+    Each group is reloaded from scheduled_events when the GUI reports a
+    rule change, after a guide update and once an hour.
+    """
+    GROUPS = ['notification', 'autoplay', 'autoplaywith', 'catchup']
+    RELOAD_INTERVAL = 3600
+    # onNotification cannot interrupt waitForAbort, so reload requests are
+    # picked up at least this often
+    MAX_WAIT = 5
+
+    def __init__(self, monitor):
+        self.monitor = monitor
+        self.scheduler = Scheduler()
+        self.nextReload = 0
+
+    def requestReload(self, group=''):
+        self.monitor.requestReload(group)
+
+    def _openDatabase(self):
+        """
+        @return: source.ScheduledEvents, None if there is no guide yet
+        """
+        try:
+            return source.ScheduledEvents()
+        except sqlite3.Error as detail:
+            log("Alarms not loaded: %s" % detail, xbmc.LOGWARNING)
+            return None
+
+    def _catchupAlarms(self):
+        f = xbmcvfs.File(CATCHUP_LIST, 'rb')
+        data = f.read()
+        f.close()
+        if isinstance(data, bytes):
+            data = data.decode('utf8', 'ignore')
+        alarms = []
+        for line in data.splitlines():
+            parts = line.split('\t', 2)
+            if len(parts) != 3:
+                continue
+            try:
+                alarms.append((parts[1], float(parts[0]), xbmc.executebuiltin, (parts[2],)))
+            except ValueError:
+                log("Skipped catchup alarm: %s" % line, xbmc.LOGWARNING)
+        return alarms
+
+    def reload(self, groups):
+        if '' in groups:
+            groups = Alarms.GROUPS
+        database = None
+        opened = False
+        try:
+            for group in groups:
+                # one broken group must not stop the alarms of the others
+                try:
+                    if group == 'catchup':
+                        alarms = self._catchupAlarms()
+                    elif SETTINGS.getSetting('%ss.enabled' % group) != 'true':
+                        alarms = []
+                    else:
+                        if not opened:
+                            database = self._openDatabase()
+                            opened = True
+                        if database is None:
+                            continue
+                        alarmSource = {
+                            'notification': notification.Notification,
+                            'autoplay': autoplay.Autoplay,
+                            'autoplaywith': autoplaywith.Autoplaywith,
+                        }[group](database, ADDON.getAddonInfo('path'))
+                        alarms = alarmSource.getAlarms()
+                except Exception as detail:
+                    log("Loading the %s alarms failed: %s" % (group, detail), xbmc.LOGERROR)
+                    continue
+                self.scheduler.replaceGroup(group, alarms)
+                log("Scheduled %d %s alarms" % (len(alarms), group))
+        finally:
+            if database is not None:
+                database.close()
+
+    def wait(self, timeout):
+        """
+        Run due alarms and reloads for timeout seconds, sleeping until the
+        next alarm in between.
+
+        @return: True if Kodi is shutting down
+        """
+        deadline = time.time() + timeout
+        while True:
+            now = time.time()
+            groups = self.monitor.takeRequests()
+            if now >= self.nextReload:
+                groups.add('')
+                self.nextReload = now + Alarms.RELOAD_INTERVAL
+            exhausted = self.scheduler.nextReload()
+            if exhausted and exhausted[0] <= now:
+                groups.add(exhausted[1])
+            if groups:
+                self.reload(groups)
+            self.scheduler.runDue()
+
+            now = time.time()
+            if now >= deadline:
+                return False
+            wake = min(deadline, self.nextReload, now + Alarms.MAX_WAIT)
+            nextDue = self.scheduler.nextDue()
+            if nextDue is not None:
+                wake = min(wake, nextDue)
+            exhausted = self.scheduler.nextReload()
+            if exhausted:
+                wake = min(wake, exhausted[0])
+            if self.monitor.waitForAbort(max(wake - now, 0.1)):
+                return True
+
+
 # ------------------------------------------------------------
 # Background Service
 # ------------------------------------------------------------
 class Service(object):
 
-    def __init__(self):
+    def __init__(self, alarms):
+        self.alarms = alarms
+        self.database = None
+        python = SETTINGS.getSetting('builder.python')
+        if python and self.startBuilder(python):
+            return
         self.database = source.Database(True)
         self.database.initialize(self.onInit)
 
+    def startBuilder(self, python):
+        """
+        Imports the guide in a process of its own, see builder.py.
+
+        @return: False if the builder could not be started
+        """
+        process = builder.BuilderProcess(python)
+        try:
+            process.start(force=True, maintain=not xbmc.Player().isPlaying())
+        except OSError as detail:
+            log("Guide builder could not be started: %s" % detail, xbmc.LOGWARNING)
+            return False
+        log("Background update starting in the guide builder...", xbmc.LOGNOTICE)
+        threading.Thread(name='Guide builder', target=self.onBuilderStarted, args=[process]).start()
+        return True
+
+    def onBuilderStarted(self, process):
+        failed = True
+        for message in process.messages():
+            if message.get('done'):
+                failed = message.get('failed')
+        process.wait()
+        if failed:
+            log("Guide builder failed", xbmc.LOGWARNING)
+        self.alarms.requestReload()
+        self.onFinished()
+
     def onInit(self, success):
         if success:
             log("Background update starting...", xbmc.LOGNOTICE)
@@ -52,37 +238,29 @@ class Service(object):
 
     def onCachesUpdated(self):
         try:
-            if ADDON.getSetting('notifications.enabled') == 'true':
-                n = notification.Notification(
-                    self.database,
-                    ADDON.getAddonInfo('path')
-                )
-                n.scheduleNotifications()
-
-            if ADDON.getSetting('autoplays.enabled') == 'true':
-                n = autoplay.Autoplay(
-                    self.database,
-                    ADDON.getAddonInfo('path')
-                )
-                n.scheduleAutoplays()
-
-            if ADDON.getSetting('autoplaywiths.enabled') == 'true':
-                n = autoplaywith.Autoplaywith(
-                    self.database,
-                    ADDON.getAddonInfo('path')
-                )
-                n.scheduleAutoplaywiths()
+            # scheduled_events was rebuilt by the import
+            self.alarms.requestReload()
 
         finally:
-            self.database.close(None)
-            log("Background update finished", xbmc.LOGNOTICE)
-
-            if ADDON.getSetting('background.notify') == 'true':
-                xbmcgui.Dialog().notification(
-                    "TV Guide Fullscreen",
-                    "Finished Updating",
-                    sound=False
-                )
+            if xbmc.Player().isPlaying():
+                # compaction and ANALYZE wait for an update without playback
+                self.onMaintenanceDone()
+            else:
+                self.database.maintain(self.onMaintenanceDone)
+
+    def onMaintenanceDone(self):
+        self.database.close(None)
+        self.onFinished()
+
+    def onFinished(self):
+        log("Background update finished", xbmc.LOGNOTICE)
+
+        if SETTINGS.getSetting('background.notify') == 'true':
+            xbmcgui.Dialog().notification(
+                "TV Guide Fullscreen",
+                "Finished Updating",
+                sound=False
+            )
 
 
 # ------------------------------------------------------------
@@ -94,8 +272,8 @@ if __name__ == '__main__':
     # Version handling (NO remote exec anymore!)
     # --------------------------------------------------------
     version = ADDON.getAddonInfo('version')
-    if ADDON.getSetting('version') != version:
-        ADDON.setSetting('version', version)
+    if SETTINGS.getSetting('version') != version:
+        SETTINGS.setSetting('version', version)
         log("Addon version updated to %s" % version, xbmc.LOGNOTICE)
 
     # --------------------------------------------------------
@@ -111,11 +289,14 @@ if __name__ == '__main__':
     except Exception as e:
         log("Cleanup failed: %s" % e, xbmc.LOGWARNING)
 
+    monitor = ServiceMonitor()
+    alarms = Alarms(monitor)
+
     # --------------------------------------------------------
     # Autostart GUI
     # --------------------------------------------------------
     try:
-        if ADDON.getSetting('autostart') == 'true':
+        if SETTINGS.getSetting('autostart') == 'true':
             xbmc.executebuiltin(
                 'RunAddon(script.tvguide.fullscreen)'
             )
@@ -123,18 +304,17 @@ if __name__ == '__main__':
         # ----------------------------------------------------
         # Background service loop
         # ----------------------------------------------------
-        if ADDON.getSetting('background.service') == 'true':
-            monitor = xbmc.Monitor()
+        if SETTINGS.getSetting('background.service') == 'true':
             log("Background service started")
 
-            if ADDON.getSetting('background.startup') == 'true':
-                Service()
-                ADDON.setSetting(
+            if SETTINGS.getSetting('background.startup') == 'true':
+                Service(alarms)
+                SETTINGS.setSetting(
                     'last.background.update',
                     str(time.time())
                 )
 
-                if ADDON.getSetting('service.addon.folders') == 'true':
+                if SETTINGS.getSetting('service.addon.folders') == 'true':
                     xbmc.executebuiltin(
                         'RunScript(special://home/addons/script.tvguide.fullscreen/ReloadAddonFolders.py)'
                     )
@@ -142,8 +322,8 @@ if __name__ == '__main__':
             while not monitor.abortRequested():
 
                 # Interval-based
-                if ADDON.getSetting('service.type') == '0':
-                    interval = int(ADDON.getSetting('service.interval'))
+                if SETTINGS.getSetting('service.type') == '0':
+                    interval = int(SETTINGS.getSetting('service.interval'))
                     waitTime = {
                         0: 7200,
                         1: 21600,
@@ -152,7 +332,7 @@ if __name__ == '__main__':
                     }.get(interval, 21600)
 
                     last_ts = float(
-                        ADDON.getSetting('last.background.update') or "0"
+                        SETTINGS.getSetting('last.background.update') or "0"
                     )
                     lastTime = datetime.datetime.fromtimestamp(last_ts)
                     nextTime = lastTime + datetime.timedelta(seconds=waitTime)
@@ -163,7 +343,7 @@ if __name__ == '__main__':
 
                 # Fixed-time daily
                 else:
-                    service_time = ADDON.getSetting('service.time')
+                    service_time = SETTINGS.getSetting('service.time')
                     now = datetime.datetime.now()
 
                     if service_time:
@@ -186,168 +366,28 @@ if __name__ == '__main__':
 
                 log("Service waiting %d seconds" % timeLeft)
 
-                if monitor.waitForAbort(timeLeft):
+                if alarms.wait(timeLeft):
                     break
 
                 log("Service triggered")
-                Service()
+                Service(alarms)
 
-                if ADDON.getSetting('service.addon.folders') == 'true':
+                if SETTINGS.getSetting('service.addon.folders') == 'true':
                     xbmc.executebuiltin(
                         'RunScript(special://home/addons/script.tvguide.fullscreen/ReloadAddonFolders.py)'
                     )
 
-                ADDON.setSetting(
+                SETTINGS.setSetting(
                     'last.background.update',
                     str(time.time())
                 )
 
-    except source.SourceNotConfiguredException:
-        log("Source not configured – service skipped", xbmc.LOGWARNING)
-
-    except Exception as ex:
-        log("Uncaught exception: %s" % ex, xbmc.LOGERROR)
-                n = autoplay.Autoplay(
-                    self.database,
-                    ADDON.getAddonInfo('path')
-                )
-                n.scheduleAutoplays()
-
-            if ADDON.getSetting('autoplaywiths.enabled') == 'true':
-                n = autoplaywith.Autoplaywith(
-                    self.database,
-                    ADDON.getAddonInfo('path')
-                )
-                n.scheduleAutoplaywiths()
-
-        finally:
-            self.database.close(None)
-            log("Background update finished", xbmc.LOGNOTICE)
-
-            if ADDON.getSetting('background.notify') == 'true':
-                xbmcgui.Dialog().notification(
-                    "TV Guide Fullscreen",
-                    "Finished Updating",
-                    sound=False
-                )
-
-
-# ------------------------------------------------------------
-# Main
-# ------------------------------------------------------------
-if __name__ == '__main__':
-
-    # --------------------------------------------------------
-    # Version handling (NO remote exec anymore!)
-    # --------------------------------------------------------
-    version = ADDON.getAddonInfo('version')
-    if ADDON.getSetting('version') != version:
-        ADDON.setSetting('version', version)
-        log("Addon version updated to %s" % version, xbmc.LOGNOTICE)
-
-    # --------------------------------------------------------
-    # Cleanup stale DB locks
-    # --------------------------------------------------------
-    try:
-        xbmcvfs.delete(
-            'special://profile/addon_data/script.tvguide.fullscreen/source.db-journal'
-        )
-        xbmcvfs.delete(
-            'special://profile/addon_data/script.tvguide.fullscreen/db.lock'
-        )
-    except Exception as e:
-        log("Cleanup failed: %s" % e, xbmc.LOGWARNING)
-
-    # --------------------------------------------------------
-    # Autostart GUI
-    # --------------------------------------------------------
-    try:
-        if ADDON.getSetting('autostart') == 'true':
-            xbmc.executebuiltin(
-                'RunAddon(script.tvguide.fullscreen)'
-            )
-
         # ----------------------------------------------------
-        # Background service loop
+        # Alarms only, no guide updates
         # ----------------------------------------------------
-        if ADDON.getSetting('background.service') == 'true':
-            monitor = xbmc.Monitor()
-            log("Background service started")
-
-            if ADDON.getSetting('background.startup') == 'true':
-                Service()
-                ADDON.setSetting(
-                    'last.background.update',
-                    str(time.time())
-                )
-
-                if ADDON.getSetting('service.addon.folders') == 'true':
-                    xbmc.executebuiltin(
-                        'RunScript(special://home/addons/script.tvguide.fullscreen/ReloadAddonFolders.py)'
-                    )
-
-            while not monitor.abortRequested():
-
-                # Interval-based
-                if ADDON.getSetting('service.type') == '0':
-                    interval = int(ADDON.getSetting('service.interval'))
-                    waitTime = {
-                        0: 7200,
-                        1: 21600,
-                        2: 43200,
-                        3: 86400
-                    }.get(interval, 21600)
-
-                    last_ts = float(
-                        ADDON.getSetting('last.background.update') or "0"
-                    )
-                    lastTime = datetime.datetime.fromtimestamp(last_ts)
-                    nextTime = lastTime + datetime.timedelta(seconds=waitTime)
-                    timeLeft = max(
-                        int((nextTime - datetime.datetime.now()).total_seconds()),
-                        0
-                    )
-
-                # Fixed-time daily
-                else:
-                    service_time = ADDON.getSetting('service.time')
-                    now = datetime.datetime.now()
-
-                    if service_time:
-                        h, m = service_time.split(':')
-                        nextTime = now.replace(
-                            hour=int(h),
-                            minute=int(m),
-                            second=0,
-                            microsecond=0
-                        )
-                        if nextTime <= now:
-                            nextTime += datetime.timedelta(days=1)
-
-                        timeLeft = max(
-                            int((nextTime - now).total_seconds()),
-                            0
-                        )
-                    else:
-                        timeLeft = 3600
-
-                log("Service waiting %d seconds" % timeLeft)
-
-                if monitor.waitForAbort(timeLeft):
-                    break
-
-                log("Service triggered")
-                Service()
-
-                if ADDON.getSetting('service.addon.folders') == 'true':
-                    xbmc.executebuiltin(
-                        'RunScript(special://home/addons/script.tvguide.fullscreen/ReloadAddonFolders.py)'
-                    )
-
-                ADDON.setSetting(
-                    'last.background.update',
-                    str(time.time())
-                )
+        else:
+            while not alarms.wait(Alarms.RELOAD_INTERVAL):
+                pass
 
     except source.SourceNotConfiguredException:
         log("Source not configured – service skipped", xbmc.LOGWARNING)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+#
+#      Copyright (C) 2026 derandere
+#      Python 3 update by derandere
+#      moddet by derandere
+#
+#  This Program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This Program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this Program; see the file LICENSE.txt.  If not, write to
+#  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
+#  http://www.gnu.org/copyleft/gpl.html
+#
+import threading
+
+import xbmc
+import xbmcaddon
+
+ADDON = xbmcaddon.Addon(id='script.tvguide.fullscreen.reborn')
+
+
+class Settings(object):
+    """
+    Snapshot of the addon settings.
+
+    getSetting() only calls into Kodi the first time a key is read; after
+    that the value comes from the snapshot until refresh() drops it.
+    setSetting() writes through to Kodi and keeps the snapshot current.
+    The processes owning an xbmc.Monitor (GUI and service) call refresh()
+    from its onSettingsChanged.
+
+    Every thread counts its own lookups and Kodi calls, see logCounters().
+    """
+
+    def __init__(self, addon):
+        self.addon = addon
+        self.lock = threading.Lock()
+        self.values = {}
+        self.local = threading.local()
+
+    def getSetting(self, key):
+        self._count('lookups')
+        with self.lock:
+            if key in self.values:
+                return self.values[key]
+        self._count('kodiCalls')
+        value = self.addon.getSetting(key)
+        with self.lock:
+            self.values[key] = value
+        return value
+
+    def getBool(self, key):
+        return self.getSetting(key) == 'true'
+
+    def getInt(self, key, default=0):
+        try:
+            return int(self.getSetting(key))
+        except ValueError:
+            return default
+
+    def getFloat(self, key, default=0.0):
+        try:
+            return float(self.getSetting(key))
+        except ValueError:
+            return default
+
+    def setSetting(self, key, value):
+        self._count('kodiCalls')
+        self.addon.setSetting(key, value)
+        with self.lock:
+            self.values[key] = value
+
+    def refresh(self):
+        with self.lock:
+            self.values = {}
+
+    def _count(self, name):
+        setattr(self.local, name, getattr(self.local, name, 0) + 1)
+
+    def counters(self):
+        """
+        @return: (lookups, kodiCalls) of the calling thread since the last reset
+        """
+        return getattr(self.local, 'lookups', 0), getattr(self.local, 'kodiCalls', 0)
+
+    def resetCounters(self):
+        self.local.lookups = 0
+        self.local.kodiCalls = 0
+
+    def logCounters(self, label):
+        lookups, kodiCalls = self.counters()
+        xbmc.log('[script.tvguide.fullscreen] %s: %d settings lookups, %d Kodi settings calls' % (label, lookups, kodiCalls),
+                 xbmc.LOGDEBUG)
+        self.resetCounters()
+
+
+SETTINGS = Settings(ADDON)
@@ -23,7 +23,6 @@
 import os
 import threading
 import datetime
-from dateutil import tz
 import time
 from xml.etree import ElementTree
 import re
@@ -39,23 +38,44 @@ import xbmcaddon
 import sqlite3
 import html.parser
 import xml.etree.ElementTree as ET
-import requests
 from itertools import chain
-from bs4 import BeautifulSoup
+import urllib.parse
 from urllib.parse import urlparse
 import html.entities
 
-import resources.lib.pytz as pytz
-from resources.lib.pytz import timezone
 
-from sdAPI import SdAPI
 from utils import *
+from inistore import IniStore
+from rules import RuleEngine, RULE_TABLES, WINDOWED_TYPES
+from texts import TextWriter, textKey
+import guidefile
+import xmlfix
+from settings import SETTINGS
+
+# the current program_rows table and what depends on it, rebuilt by every import
+PROGRAM_ROWS_TABLE = ('CREATE TABLE %s(channel_key INTEGER, title TEXT, sub_title TEXT, start_date INTEGER, end_date INTEGER, description_key INTEGER, categories_key INTEGER, image_large TEXT, image_small_key INTEGER, '
+                      'season TEXT, episode TEXT, is_new TEXT, is_movie TEXT, language TEXT, updates_id INTEGER, UNIQUE (channel_key, start_date, end_date), '
+                      'FOREIGN KEY(channel_key) REFERENCES channels(key) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, FOREIGN KEY(updates_id) REFERENCES updates(id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED)')
+PROGRAM_ROWS_INDEXES = [('start_date_idx', 'start_date'), ('end_date_idx', 'end_date'), ('programs_title_idx', 'title')]
+# programmes changed outside of an import make the guide file stale
+PROGRAM_ROWS_TRIGGERS = ['CREATE TRIGGER program_rows_%s AFTER %s ON program_rows BEGIN DELETE FROM guide_file; END' % (event.lower(), event)
+                         for event in ['INSERT', 'UPDATE', 'DELETE']]
+PROGRAMS_VIEW = ('CREATE VIEW programs AS SELECT c.id AS channel, p.title, p.sub_title, p.start_date, p.end_date, d.text AS description, k.text AS categories, p.image_large, i.text AS image_small, '
+                 'p.season, p.episode, p.is_new, p.is_movie, p.language, c.source AS source, p.updates_id, p.channel_key, p.description_key, p.categories_key, p.image_small_key '
+                 'FROM program_rows p JOIN channels c ON c.key = p.channel_key LEFT JOIN texts d ON d.hash = p.description_key LEFT JOIN texts k ON k.hash = p.categories_key LEFT JOIN texts i ON i.hash = p.image_small_key')
+# connection settings while an import builds program_rows_import
+IMPORT_PRAGMAS = [('synchronous', 'OFF'), ('cache_size', '-65536'), ('mmap_size', '268435456'), ('temp_store', 'MEMORY')]
 
 SETTINGS_TO_CHECK = ['source', 'xmltv.type', 'xmltv.file', 'xmltv.url', 'xmltv.logo.folder', 'logos.source', 'logos.folder', 'logos.url', 'source.source', 'yo.countries' , 'tvguide.co.uk.systemid']
 
 def log(x):
     xbmc.log(repr(x),xbmc.LOGERROR)
 
+def decodeText(value):
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'ignore')
+    return value
+
 def unescape( str ):
     str = str.replace("&lt;","<")
     str = str.replace("&gt;",">")
@@ -84,13 +104,24 @@ class DatabaseSchemaException(sqlite3.DatabaseError):
 
 class Database(object):
     SOURCE_DB = 'source.db'
-    CHANNELS_PER_PAGE = int(ADDON.getSetting('channels.per.page'))
+    GUIDE_FILE = 'guide.bin'
+    CHANNELS_PER_PAGE = int(SETTINGS.getSetting('channels.per.page'))
+    VACUUM_PAGES = 2048
+    STATISTICS_TABLES = ['channels', 'program_rows', 'texts', 'scheduled_events']
+    # programmes an import reads before it lets waiting requests run
+    IMPORT_BATCH = 500
+    # work that waits for the interactive requests queued after it
+    BACKGROUND_COMMANDS = ['_updateChannelAndProgramListCaches', '_maintain']
+    # requests that add or remove channels wait for a running import, it
+    # holds the channel keys of the programmes it has read
+    CHANNEL_COMMANDS = ['_saveChannelList', '_saveLineup', '_deleteLineup', '_importM3U']
 
     def __init__(self,force=False):
         self.conn = None
         self.eventQueue = list()
         self.event = threading.Event()
         self.eventResults = dict()
+        self.rulesChanged = 0
 
         self.loadOptional(force)
         self.source = instantiateSource(force)
@@ -106,6 +137,9 @@ class Database(object):
         if not os.path.exists(profilePath):
             os.makedirs(profilePath)
         self.databasePath = os.path.join(profilePath, Database.SOURCE_DB)
+        self.guideFilePath = os.path.join(profilePath, Database.GUIDE_FILE)
+        self.guideFile = None
+        self.iniStore = IniStore(profilePath)
 
         threading.Thread(name='Database Event Loop', target=self.eventLoop).start()
 
@@ -122,29 +156,30 @@ class Database(object):
         return path
 
     def loadOptional(self,force):
-        self.addonsType = int(ADDON.getSetting('addons.ini.type'))
-        self.categoriesType = int(ADDON.getSetting('categories.ini.type'))
-        self.mappingType = int(ADDON.getSetting('mapping.ini.type'))
+        import requests
+        self.addonsType = int(SETTINGS.getSetting('addons.ini.type'))
+        self.categoriesType = int(SETTINGS.getSetting('categories.ini.type'))
+        self.mappingType = int(SETTINGS.getSetting('mapping.ini.type'))
 
-        if ADDON.getSetting('categories.ini.enabled') == 'true':
+        if SETTINGS.getSetting('categories.ini.enabled') == 'true':
             if self.categoriesType == XMLTVSource.CATEGORIES_TYPE_FILE:
-                customFile = str(ADDON.getSetting('categories.ini.file'))
+                customFile = str(SETTINGS.getSetting('categories.ini.file'))
             else:
-                customFile = str(ADDON.getSetting('categories.ini.url'))
+                customFile = str(SETTINGS.getSetting('categories.ini.url'))
             if customFile:
-                self.updateLocalFile('categories.ini', customFile, ADDON, True, force=force)
+                self.updateLocalFile('categories.ini', customFile, SETTINGS, True, force=force)
 
-        if ADDON.getSetting('mapping.ini.enabled') == 'true':
+        if SETTINGS.getSetting('mapping.ini.enabled') == 'true':
             if self.mappingType == XMLTVSource.INI_TYPE_FILE:
-                customFile = str(ADDON.getSetting('mapping.ini.file'))
+                customFile = str(SETTINGS.getSetting('mapping.ini.file'))
             else:
-                customFile = str(ADDON.getSetting('mapping.ini.url'))
+                customFile = str(SETTINGS.getSetting('mapping.ini.url'))
             if customFile:
-                self.updateLocalFile('mapping.ini', customFile, ADDON, True, force=force)
+                self.updateLocalFile('mapping.ini', customFile, SETTINGS, True, force=force)
 
         d = xbmcgui.Dialog()
         subscription_streams = {}
-        if (ADDON.getSetting('addons.ini.subscriptions') == "true"):
+        if (SETTINGS.getSetting('addons.ini.subscriptions') == "true"):
             file_name = 'special://profile/addon_data/script.tvguide.fullscreen/subscriptions.ini'
             f = xbmcvfs.File(file_name,"rb")
             data = f.read()
@@ -175,42 +210,32 @@ class Database(object):
 
         addons_ini = "special://profile/addon_data/script.tvguide.fullscreen/addons.ini"
         addons_ini_local = addons_ini+".local"
-        if ADDON.getSetting('addons.ini.enabled') == 'true':
+        if SETTINGS.getSetting('addons.ini.enabled') == 'true':
             if self.addonsType == XMLTVSource.INI_TYPE_FILE:
-                customFile = str(ADDON.getSetting('addons.ini.file'))
+                customFile = str(SETTINGS.getSetting('addons.ini.file'))
                 data = xbmcvfs.File(customFile,'rb').read()
             else:
-                customFile = str(ADDON.getSetting('addons.ini.url'))
+                customFile = str(SETTINGS.getSetting('addons.ini.url'))
                 data = requests.get(customFile).content
             if data:
-                enckey = ADDON.getSetting('addons.ini.key')
-                encode = ADDON.getSetting('addons.ini.encode') == "true"
+                enckey = SETTINGS.getSetting('addons.ini.key')
+                encode = SETTINGS.getSetting('addons.ini.encode') == "true"
                 if encode and enckey:
-                    import pyaes,base64
-                    enckey=enckey.encode("ascii")
-                    missingbytes=16-len(enckey)
-                    enckey=enckey+(chr(0)*(missingbytes))
-                    encryptor = pyaes.new(enckey , pyaes.MODE_ECB, IV=None)
-                    ddata=encryptor.encrypt(data)
-                    ddata=base64.b64encode(ddata)
+                    import aescipher,base64
+                    ddata=base64.b64encode(aescipher.encrypt(enckey, data))
                     f = xbmcvfs.File('special://profile/addon_data/script.tvguide.fullscreen/addons.aes.ini','wb')
                     f.write(ddata)
                     f.close()
                 elif enckey:
-                    import pyaes,base64
-                    enckey=enckey.encode("ascii")
-                    missingbytes=16-len(enckey)
-                    enckey=enckey+(chr(0)*(missingbytes))
-                    ddata=base64.b64decode(data)
-                    decryptor = pyaes.new(enckey , pyaes.MODE_ECB, IV=None)
-                    data=decryptor.decrypt(ddata).split('\0')[0]
+                    import aescipher,base64
+                    data=aescipher.decrypt(enckey, base64.b64decode(data))
                 xbmcvfs.copy(addons_ini,addons_ini_local)
                 xbmcvfs.File('special://profile/addon_data/script.tvguide.fullscreen/addons.ini','wb').write(data)
 
-        if (ADDON.getSetting('addons.ini.subscriptions') == "true") or (ADDON.getSetting('addons.ini.overwrite') == "1"):
+        if (SETTINGS.getSetting('addons.ini.subscriptions') == "true") or (SETTINGS.getSetting('addons.ini.overwrite') == "1"):
             streams = {}
             streams["script.tvguide.fullscreen"] = {}
-            if (ADDON.getSetting('addons.ini.enabled') == "true") and (ADDON.getSetting('addons.ini.overwrite') == "1"):
+            if (SETTINGS.getSetting('addons.ini.enabled') == "true") and (SETTINGS.getSetting('addons.ini.overwrite') == "1"):
                 filenames = [addons_ini_local,addons_ini]
             else:
                 filenames = [addons_ini]
@@ -240,7 +265,7 @@ class Database(object):
                             name = name.replace(':','')
                             streams[addon][name] = stream
 
-            if (ADDON.getSetting('addons.ini.subscriptions') == "true"):
+            if (SETTINGS.getSetting('addons.ini.subscriptions') == "true"):
                 for name in subscription_streams:
                     if name:
                         streams["script.tvguide.fullscreen"][name] = subscription_streams[name]
@@ -263,36 +288,83 @@ class Database(object):
             self.event.wait()
             self.event.clear()
 
-            event = self.eventQueue.pop(0)
+            closed = False
+            while self.eventQueue and not closed:
+                event = self._nextEvent(self.eventQueue)
+                closed = self._processEvent(event) and self._close == event[0]
 
-            command = event[0]
-            callback = event[1]
+            if closed:
+                del self.eventQueue[:]
+                break
 
-            print('Database.eventLoop() >>>>>>>>>> processing command: ' + command.__name__)
+        print('Database.eventLoop() >>>>>>>>>> exiting...')
 
-            try:
-                result = command(*event[2:])
-                self.eventResults[command.__name__] = result
+    def _nextEvent(self, queue, interactiveOnly=False):
+        """
+        Takes the first interactive request from queue, or the first event
+        when there is none.
 
-                if callback:
-                    if self._initialize == command:
-                        threading.Thread(name='Database callback', target=callback, args=[result]).start()
-                    else:
-                        threading.Thread(name='Database callback', target=callback).start()
+        @param interactiveOnly: leave background work, channel changes, _initialize and _close in the queue
+        @return: the event or None
+        """
+        for i, event in enumerate(queue):
+            name = event[0].__name__
+            if name in Database.BACKGROUND_COMMANDS:
+                continue
+            if interactiveOnly and (name in Database.CHANNEL_COMMANDS or name in ['_initialize', '_close']):
+                continue
+            return queue.pop(i)
+        if queue and not interactiveOnly:
+            return queue.pop(0)
+        return None
 
-                if self._close == command:
-                    del self.eventQueue[:]
-                    break
+    def _processEvent(self, event):
+        """
+        @return: True if the command finished without an exception
+        """
+        command = event[0]
+        callback = event[1]
 
-            except Exception as detail:
-                xbmc.log('Database.eventLoop() >>>>>>>>>> exception! %s = %s' % (detail,command.__name__), xbmc.LOGERROR)
-                xbmc.executebuiltin("ActivateWindow(Home)")
+        print('Database.eventLoop() >>>>>>>>>> processing command: ' + command.__name__)
 
-        print('Database.eventLoop() >>>>>>>>>> exiting...')
+        try:
+            result = command(*event[2:])
+            self.eventResults[command.__name__] = result
+
+            if callback:
+                if self._initialize == command:
+                    threading.Thread(name='Database callback', target=callback, args=[result]).start()
+                else:
+                    threading.Thread(name='Database callback', target=callback).start()
+            return True
+
+        except Exception as detail:
+            xbmc.log('Database.eventLoop() >>>>>>>>>> exception! %s = %s' % (detail,command.__name__), xbmc.LOGERROR)
+            xbmc.executebuiltin("ActivateWindow(Home)")
+            return False
+
+    def _serveWaitingRequests(self, c, pragmas):
+        """
+        Called by long running commands between two batches of work, runs
+        the interactive requests that were queued meanwhile. The work done
+        so far is committed first.
+
+        @param pragmas: the usual pragmas, as _setPragmas returned them, the
+                        requests run with these and the ones set before after
+        """
+        event = self._nextEvent(self.eventQueue, interactiveOnly=True)
+        if event is None:
+            return
+        self.conn.commit()
+        current = self._setPragmas(c, pragmas)
+        try:
+            while event is not None:
+                self._processEvent(event)
+                event = self._nextEvent(self.eventQueue, interactiveOnly=True)
+        finally:
+            self._setPragmas(c, current)
 
     def _invokeAndBlockForResult(self, method, *args):
-        sqlite3.register_adapter(datetime.datetime, self.adapt_datetime)
-        sqlite3.register_converter('timestamp', self.convert_datetime)
         event = [method, None]
         event.extend(args)
         self.eventQueue.append(event)
@@ -329,7 +401,7 @@ class Database(object):
                 c.close()
 
                 self._createTables()
-                self.settingsChanged = self._wasSettingsChanged(ADDON)
+                self.settingsChanged = self._wasSettingsChanged(SETTINGS)
                 break
 
             except sqlite3.OperationalError:
@@ -368,6 +440,56 @@ class Database(object):
             pass  # no transaction is active
         if self.conn:
             self.conn.close()
+        if self.guideFile is not None:
+            self.guideFile.close()
+        self.iniStore.close()
+
+    def maintain(self, callback):
+        self.eventQueue.append([self._maintain, callback])
+        self.event.set()
+
+    def _maintain(self):
+        """
+        Gives back the pages freed by retention and imports and refreshes the
+        statistics of the query planner, a bounded amount of work at a time
+        so it can run between updates of the service.
+        """
+        c = self.conn.cursor()
+        try:
+            # execute() only steps the pragma once, which frees a single page
+            c.executescript('PRAGMA incremental_vacuum(%d)' % self.VACUUM_PAGES)
+            c.execute('PRAGMA analysis_limit=400')
+            c.execute('ANALYZE')
+            self.conn.commit()
+        except sqlite3.OperationalError as detail:
+            # the guide holds the database, try again after the next update
+            xbmc.log('[script.tvguide.fullscreen] Database maintenance skipped: %s' % detail, xbmc.LOGWARNING)
+            return
+        finally:
+            c.close()
+        statistics = self._getStatistics()
+        xbmc.log('[script.tvguide.fullscreen] Database %.1f MB, %.1f MB free, %s' % (
+            statistics['bytes'] / 1048576.0, statistics['free_bytes'] / 1048576.0,
+            ', '.join('%s %d' % (table, statistics[table]) for table in self.STATISTICS_TABLES)), xbmc.LOGINFO)
+
+    def getStatistics(self):
+        return self._invokeAndBlockForResult(self._getStatistics)
+
+    def _getStatistics(self):
+        """
+        @return: dict of the file size and free space in bytes and the row
+                 count of the largest tables
+        """
+        c = self.conn.cursor()
+        pageSize = c.execute('PRAGMA page_size').fetchone()[0]
+        statistics = {
+            'bytes': c.execute('PRAGMA page_count').fetchone()[0] * pageSize,
+            'free_bytes': c.execute('PRAGMA freelist_count').fetchone()[0] * pageSize,
+        }
+        for table in self.STATISTICS_TABLES:
+            statistics[table] = c.execute('SELECT COUNT(*) FROM %s' % table).fetchone()[0]
+        c.close()
+        return statistics
 
     def _wasSettingsChanged(self, addon):
         #gType = GuideTypes()
@@ -394,9 +516,7 @@ class Database(object):
 
         if settingsChanged or noRows:
             for key in SETTINGS_TO_CHECK:
-                value = addon.getSetting(key)
-                if value:
-                    value = value.decode('utf-8', 'ignore')
+                value = decodeText(addon.getSetting(key))
                 c.execute('INSERT OR IGNORE INTO settings(key, value) VALUES (?, ?)', [key, value])
                 if not c.rowcount:
                     c.execute('UPDATE settings SET value=? WHERE key=?', [value, key])
@@ -449,7 +569,8 @@ class Database(object):
         sqlite3.register_converter('timestamp', self.convert_datetime)
 
         lock = 'special://profile/addon_data/script.tvguide.fullscreen/db.lock'
-        if xbmcvfs.exists(lock):
+        if self.updateInProgress or xbmcvfs.exists(lock):
+            # an EPG view requested while the import serves waiting requests gets the old guide
             return
 
         isCacheExpired = self._isCacheExpired(date)
@@ -457,20 +578,23 @@ class Database(object):
         if not isCacheExpired and not needReset:
             return
         else:
-            # if the xmltv data needs to be loaded the database
-            # should be reset to avoid ghosting!
+            # the programmes are built in program_rows_import and replace the
+            # old ones only when complete, readers keep the old guide until then.
+            # channels_updated=0 makes the next start import again if this fails
             self.updateInProgress = True
             c = self.conn.cursor()
-            c.execute("DELETE FROM updates")
             c.execute("UPDATE sources SET channels_updated=0")
             self.conn.commit()
             c.close()
             self.source.needReset = False
         xbmcvfs.File(lock,'wb')
         self.updateInProgress = True
+        SETTINGS.resetCounters()
         self.updateFailed = False
         dateStr = date.strftime('%Y-%m-%d')
         c = self.conn.cursor()
+        profile = self._setPragmas(c, IMPORT_PRAGMAS)
+        rulesChanged = self.rulesChanged
         try:
             xbmc.log('[script.tvguide.fullscreen] Updating caches...', xbmc.LOGDEBUG)
             if progress_callback:
@@ -486,42 +610,50 @@ class Database(object):
                 ch_list = self._getChannelList(onlyVisible=True)
 
             if self.settingsChanged:
-                if ADDON.getSetting('xmltv.keep.channels') == "false":
+                if SETTINGS.getSetting('xmltv.keep.channels') == "false":
                     c.execute('DELETE FROM channels WHERE source=?', [self.source.KEY])
-                c.execute('DELETE FROM programs WHERE source=?', [self.source.KEY])
+                c.execute('DELETE FROM program_rows WHERE channel_key IN (SELECT key FROM channels WHERE source=?)', [self.source.KEY])
                 c.execute("DELETE FROM updates WHERE source=?", [self.source.KEY])
             self.settingsChanged = False  # only want to update once due to changed settings
 
-            if clearExistingProgramList:
-                c.execute("DELETE FROM updates WHERE source=?",
-                          [self.source.KEY])  # cascades and deletes associated programs records
-            else:
-                c.execute("DELETE FROM updates WHERE source=? AND date=?",
-                          [self.source.KEY, dateStr])  # cascades and deletes associated programs records
-
-            # programs updated
+            # programs updated, the updates it replaces are deleted with their programmes by the swap
             c.execute("INSERT INTO updates(source, date, programs_updated) VALUES(?, ?, ?)",
                       [self.source.KEY, dateStr, datetime.datetime.now()])
             updatesId = c.lastrowid
+            c.execute('DROP TABLE IF EXISTS program_rows_import')  # left by an import that was killed
+            c.execute(PROGRAM_ROWS_TABLE % 'program_rows_import')
 
             imported = imported_channels = imported_programs = 0
 
+            engine = self._compileRules(c)
+            events = []
+            keys = self._channelKeys(c)
+            texts = TextWriter()
+            rows = []
+
             if getData == True:
                 xbmcvfs.delete('special://profile/addon_data/script.tvguide.fullscreen/category_count.ini')
-                if ADDON.getSetting('catchup.type') == "0":
-                    catchup = ADDON.getSetting('catchup.text')
+                if SETTINGS.getSetting('catchup.type') == "0":
+                    catchup = SETTINGS.getSetting('catchup.text')
                 else:
-                    catchup = ADDON.getSetting('catchup.direct')
-                channel = Channel("catchup", catchup, '', "special://home/addons/plugin.video.%s/icon.png" % catchup.lower(), "catchup", ADDON.getSetting('catchup.channel') == 'true')
+                    catchup = SETTINGS.getSetting('catchup.direct')
+                channel = Channel("catchup", catchup, '', "special://home/addons/plugin.video.%s/icon.png" % catchup.lower(), "catchup", SETTINGS.getSetting('catchup.channel') == 'true')
                 c.execute(
                     'INSERT OR IGNORE INTO channels(id, title, logo, stream_url, visible, weight, source) VALUES(?, ?, ?, ?, ?, (CASE ? WHEN -1 THEN (SELECT COALESCE(MAX(weight)+1, 0) FROM channels WHERE source=?) ELSE ? END), ?)',
                     [channel.id, channel.title, channel.logo, channel.streamUrl, channel.visible, channel.weight,
                      self.source.KEY, channel.weight, self.source.KEY])
+                if c.rowcount:
+                    keys[channel.id] = c.lastrowid
                 for item in self.source.getDataFromExternal(date, ch_list, progress_callback):
                     imported += 1
 
                     if imported % 10000 == 0:
+                        self._insertProgramRows(c, 'program_rows_import', rows)
+                        rows = []
+                        texts.flush(c)
                         self.conn.commit()
+                    if imported % Database.IMPORT_BATCH == 0:
+                        self._serveWaitingRequests(c, profile)
 
                     if isinstance(item, Channel):
                         imported_channels += 1
@@ -530,8 +662,10 @@ class Database(object):
                             'INSERT OR IGNORE INTO channels(id, title, logo, stream_url, visible, weight, source) VALUES(?, ?, ?, ?, ?, (CASE ? WHEN -1 THEN (SELECT COALESCE(MAX(weight)+1, 0) FROM channels WHERE source=?) ELSE ? END), ?)',
                             [channel.id, channel.title, channel.logo, channel.streamUrl, channel.visible, channel.weight,
                              self.source.KEY, channel.weight, self.source.KEY])
-                        if not c.rowcount:
-                            if ADDON.getSetting('logos.keep') == 'true':
+                        if c.rowcount:
+                            keys[channel.id] = c.lastrowid
+                        else:
+                            if SETTINGS.getSetting('logos.keep') == 'true':
                                 c.execute(
                                     'UPDATE channels SET title=?, stream_url=?, visible=(CASE ? WHEN -1 THEN visible ELSE ? END), weight=(CASE ? WHEN -1 THEN weight ELSE ? END) WHERE id=? AND source=?',
                                     [channel.title, channel.streamUrl, channel.weight, channel.visible,
@@ -549,15 +683,18 @@ class Database(object):
                             channel = program.channel.id
                         else:
                             channel = program.channel
-                        try:
-                            c.execute(
-                            'INSERT OR REPLACE INTO programs(channel, title, sub_title, start_date, end_date, description, categories, image_large, image_small, season, episode, is_new, is_movie, language, source, updates_id) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
-                            [channel, program.title, program.sub_title, program.startDate, program.endDate, program.description, program.categories,
-                             program.imageLarge, program.imageSmall, program.season, program.episode, program.is_new, program.is_movie,
-                             program.language, self.source.KEY, updatesId])
-                        except Exception as e:
-                            log(e)
-
+                        key = keys.get(channel)
+                        if key is None:
+                            continue  # channel not in this source's channel list
+                        rows.append((key, program.title, program.sub_title, program.startEpoch, program.endEpoch, texts.key(program.description), texts.key(program.categories),
+                                     program.imageLarge, texts.key(program.imageSmall), program.season, program.episode, program.is_new, program.is_movie,
+                                     program.language, updatesId))
+                        if engine:
+                            for kind, type, onChannel in engine.match(channel, program.title, program.startEpoch, program.is_new):
+                                events.append((self.source.KEY, channel, program.startEpoch, kind, type, onChannel, program.title))
+
+                self._insertProgramRows(c, 'program_rows_import', rows)
+                texts.flush(c)
                 # channels updated
                 c.execute("UPDATE sources SET channels_updated=? WHERE id=?", [datetime.datetime.now(), self.source.KEY])
                 self.conn.commit()
@@ -566,23 +703,23 @@ class Database(object):
             if imported_programs == 0:
                 self.updateFailed = True
 
-            channels = c.execute('SELECT DISTINCT channel FROM programs').fetchall()
+            channels = c.execute('SELECT DISTINCT channel_key FROM program_rows_import').fetchall()
             for channel in channels:
-                if not channel[0]:
-                    continue
-                programs = c.execute('SELECT channel,start_date,end_date FROM programs WHERE channel=?',[channel[0]]).fetchall()
+                self._serveWaitingRequests(c, profile)
+                programs = c.execute('SELECT channel_key,start_date,end_date FROM program_rows_import WHERE channel_key=?',[channel[0]]).fetchall()
                 for i,program in enumerate(programs[:-1]):
                     if program[2] > programs[i+1][1]:
                         try:
-                            c.execute('UPDATE programs SET end_date=? WHERE channel=? AND start_date=? AND end_date=?',[programs[i+1][1],program[0],program[1],program[2]])
+                            c.execute('UPDATE program_rows_import SET end_date=? WHERE channel_key=? AND start_date=? AND end_date=?',[programs[i+1][1],program[0],program[1],program[2]])
                         except Exception as e:
                             log(e)
             self.conn.commit()
 
-            channels = c.execute('SELECT DISTINCT channel FROM programs').fetchall()
+            channels = c.execute('SELECT DISTINCT channel_key FROM program_rows_import').fetchall()
             for channel in channels:
+                self._serveWaitingRequests(c, profile)
                 #log(channel[0])
-                programs = c.execute('SELECT channel,start_date,end_date FROM programs WHERE channel=?',[channel[0]]).fetchall()
+                programs = c.execute('SELECT channel_key,start_date,end_date FROM program_rows_import WHERE channel_key=?',[channel[0]]).fetchall()
                 for i,program in enumerate(programs[:-1]):
                     channel_id = channel[0]
                     this_start = program[1]
@@ -591,34 +728,49 @@ class Database(object):
                     if this_end != next_start:
                         try:
                             c.execute(
-                            'INSERT INTO programs(channel, title, start_date, end_date, source, updates_id) VALUES(?, ?, ?, ?, ?, ?)',
-                            [channel_id, "?", this_end, next_start, self.source.KEY, updatesId])
+                            'INSERT INTO program_rows_import(channel_key, title, start_date, end_date, updates_id) VALUES(?, ?, ?, ?, ?)',
+                            [channel_id, "?", this_end, next_start, updatesId])
                         except Exception as e:
                             log(e)
             self.conn.commit()
 
-            start = datetime.datetime.now().replace(minute=0,second=0,microsecond=0) - datetime.timedelta(hours=2)
-            channels = c.execute('SELECT DISTINCT channel FROM programs').fetchall()
+            start = toEpoch(datetime.datetime.now().replace(minute=0,second=0,microsecond=0) - datetime.timedelta(hours=2))
+            channels = c.execute('SELECT DISTINCT channel_key FROM program_rows_import').fetchall()
             for channel in channels:
+                self._serveWaitingRequests(c, profile)
                 #log(channel[0])
-                first_program = c.execute('SELECT channel,start_date FROM programs WHERE channel=? ORDER BY start_date',[channel[0]]).fetchone()
+                first_program = c.execute('SELECT channel_key,start_date FROM program_rows_import WHERE channel_key=? ORDER BY start_date',[channel[0]]).fetchone()
                 if first_program:
                     channel_id = channel[0]
                     this_start = first_program[1]
                     if this_start > start:
                         try:
                             c.execute(
-                            'INSERT INTO programs(channel, title, start_date, end_date, source, updates_id) VALUES(?, ?, ?, ?, ?, ?)',
-                            [channel_id, "-", start, this_start, self.source.KEY, updatesId])
+                            'INSERT INTO program_rows_import(channel_key, title, start_date, end_date, updates_id) VALUES(?, ?, ?, ?, ?)',
+                            [channel_id, "-", start, this_start, updatesId])
                         except Exception as e:
                             log(e)
+            self._applyRetention(c, 'program_rows_import')
             self.conn.commit()
 
+            if imported_programs == 0:
+                # keep the guide that is there
+                c.execute('DROP TABLE program_rows_import')
+                c.execute('DELETE FROM updates WHERE id=?', [updatesId])
+            else:
+                self._setPragmas(c, profile)  # the swap is written with the usual durability
+                self._swapProgramRows(c, updatesId, events, clearExistingProgramList, rulesChanged != self.rulesChanged)
+            self.conn.commit()
+            if imported_programs:
+                self._writeGuideFile(c)
+
         except SourceUpdateCanceledException:
-            # force source update on next load
+            # keep the old guide, force source update on next load
+            self.conn.rollback()
+            c.execute('DROP TABLE IF EXISTS program_rows_import')
             c.execute('UPDATE sources SET channels_updated=? WHERE id=?', [0, self.source.KEY])
-            c.execute("DELETE FROM updates WHERE source=?",
-                      [self.source.KEY])  # cascades and deletes associated programs records
+            c.execute('DELETE FROM updates WHERE source=? AND id NOT IN (SELECT DISTINCT updates_id FROM program_rows WHERE updates_id IS NOT NULL)',
+                      [self.source.KEY])
             self.conn.commit()
 
         except Exception:
@@ -635,6 +787,7 @@ class Database(object):
 
             try:
                 # invalidate cached data
+                c.execute('DROP TABLE IF EXISTS program_rows_import')
                 c.execute('UPDATE sources SET channels_updated=? WHERE id=?', [0, self.source.KEY])
                 self.conn.commit()
             except sqlite3.OperationalError:
@@ -643,7 +796,9 @@ class Database(object):
             self.updateFailed = True
         finally:
             self.updateInProgress = False
+            self._setPragmas(c, profile)
             c.close()
+            SETTINGS.logCounters('import')
         xbmcvfs.delete(lock)
 
     def updateProgramList(self, callback, programList, channel):
@@ -657,14 +812,29 @@ class Database(object):
         sqlite3.register_converter('timestamp', self.convert_datetime)
 
         c = self.conn.cursor()
-        c.execute('DELETE FROM programs WHERE source=? AND channel=? ', [self.source.KEY, channel.id])
-        updatesId = 1 #TODO why?
+        row = c.execute('SELECT key FROM channels WHERE id=? AND source=?', [channel.id, self.source.KEY]).fetchone()
+        if row is None:
+            c.close()
+            return
+        key = row[0]
+        c.execute('DELETE FROM program_rows WHERE channel_key=?', [key])
+        c.execute('DELETE FROM scheduled_events WHERE source=? AND channel=?', [self.source.KEY, channel.id])
+        engine = self._compileRules(c)
+        events = []
+        texts = TextWriter()
+        # the update of the last import, the programmes go when it is replaced
+        updatesId = c.execute('SELECT MAX(id) FROM updates WHERE source=?', [self.source.KEY]).fetchone()[0]
         for program in programList:
             c.execute(
-                'INSERT OR REPLACE INTO programs(channel, title, sub_title, start_date, end_date, description, categories, image_large, image_small, season, episode, is_new, is_movie, language, source, updates_id) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
-                [channel.id, program.title, program.sub_title, program.startDate, program.endDate, program.description, program.categories,
-                 program.imageLarge, program.imageSmall, program.season, program.episode, program.is_new, program.is_movie,
-                 program.language, self.source.KEY, updatesId])
+                'INSERT OR REPLACE INTO program_rows(channel_key, title, sub_title, start_date, end_date, description_key, categories_key, image_large, image_small_key, season, episode, is_new, is_movie, language, updates_id) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [key, program.title, program.sub_title, program.startEpoch, program.endEpoch, texts.key(program.description), texts.key(program.categories),
+                 program.imageLarge, texts.key(program.imageSmall), program.season, program.episode, program.is_new, program.is_movie,
+                 program.language, updatesId])
+            for kind, type, onChannel in engine.match(channel.id, program.title, program.startEpoch, program.is_new):
+                events.append((self.source.KEY, channel.id, program.startEpoch, kind, type, onChannel, program.title))
+        self._insertScheduledEvents(c, events)
+        texts.flush(c)
+        self._applyRetention(c)
 
         self.conn.commit()
 
@@ -708,6 +878,23 @@ class Database(object):
 
         return [channelStart, channelsOnPage, programs]
 
+    def getPageProgramList(self, channelStart, date):
+        """
+        Programs for the page starting at channelStart without refreshing the caches first.
+        """
+        return self._invokeAndBlockForResult(self._getPageProgramList, channelStart, date)
+
+    def _getPageProgramList(self, channelStart, date):
+        channels = self._getChannelList(onlyVisible=True)
+        if not channels:
+            return []
+        if channelStart < 0:
+            channelStart = len(channels) - 1
+        elif channelStart > len(channels) - 1:
+            channelStart = 0
+        channelEnd = channelStart + Database.CHANNELS_PER_PAGE
+        return self._getProgramList(channels[channelStart: channelEnd], date)
+
     def _getQuickEPGView(self, channelStart, date, progress_callback, clearExistingProgramList, category):
         self._updateChannelAndProgramListCaches(date, progress_callback, clearExistingProgramList)
 
@@ -766,38 +953,79 @@ class Database(object):
     def _saveLineup(self, channelList, lineup):
         c = self.conn.cursor()
         # delete removed channels
-        c.execute('SELECT * FROM channels WHERE source=? AND lineup=?',
+        self._fillIdTable(c, [channel.id for channel in channelList])
+        c.execute('DELETE FROM channels WHERE source=? AND lineup=? AND id NOT IN (SELECT id FROM temp.channel_ids)',
                   [self.source.KEY, lineup])
-        to_delete = []
-        for row in c:
-            station_id = row['id']
-            found = False
-            for channel in channelList:
-                if channel.id == station_id:
-                    found = True
-                    break
-            if not found:
-                xbmc.log('[%s] Removing Channel: %s from lineup: %s' % (
-                    ADDON.getAddonInfo('id'), str(station_id), str(lineup)), xbmc.LOGDEBUG)
-                to_delete.append(station_id)
-
-        if to_delete:
-            c.execute('DELETE FROM channels WHERE id IN (%s)' %
-                      ','.join('?' * len(to_delete)), to_delete)
+        if c.rowcount:
+            xbmc.log('[%s] Removed %d channels from lineup: %s' % (
+                ADDON.getAddonInfo('id'), c.rowcount, str(lineup)), xbmc.LOGDEBUG)
 
         # Add new channels
+        existing, weight = self._channelWeights(c)
+        rows = []
         for channel in channelList:
-            xbmc.log('[%s] Adding Channel: %s from lineup: %s' % (
-                ADDON.getAddonInfo('id'), str(channel.id), str(lineup)), xbmc.LOGDEBUG)
-
-            logo = get_logo(channel)
-            c.execute(
-                'INSERT OR IGNORE INTO channels(id, title, logo, stream_url, visible, weight, source, lineup) VALUES(?, ?, ?, ?, ?, (CASE ? WHEN -1 THEN (SELECT COALESCE(MAX(weight)+1, 0) FROM channels WHERE source=?) ELSE ? END), ?, ?)',
-                [channel.id, channel.title, logo, '', True, -1, self.source.KEY, -1, self.source.KEY, lineup])
+            if channel.id in existing:
+                continue
+            existing.add(channel.id)
+            rows.append([channel.id, channel.title, get_logo(channel), '', True, weight, self.source.KEY, lineup])
+            weight += 1
+        c.executemany('INSERT OR IGNORE INTO channels(id, title, logo, stream_url, visible, weight, source, lineup) VALUES(?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        xbmc.log('[%s] Added %d channels from lineup: %s' % (
+            ADDON.getAddonInfo('id'), len(rows), str(lineup)), xbmc.LOGDEBUG)
 
         c.execute("UPDATE sources SET channels_updated=? WHERE id=?",
                   [datetime.datetime.now(), self.source.KEY])
         self.conn.commit()
+
+    def _fillIdTable(self, c, ids):
+        """
+        Load ids into temp.channel_ids so deletions can be done as one anti-join.
+        """
+        c.execute('CREATE TEMP TABLE IF NOT EXISTS channel_ids(id TEXT PRIMARY KEY)')
+        c.execute('DELETE FROM temp.channel_ids')
+        c.executemany('INSERT OR IGNORE INTO temp.channel_ids(id) VALUES(?)', [(id,) for id in ids])
+
+    def _channelWeights(self, c):
+        """
+        @return: (set of channel ids of this source, next free weight)
+        """
+        c.execute('SELECT id, weight FROM channels WHERE source=?', [self.source.KEY])
+        existing = set()
+        weight = 0
+        for row in c:
+            existing.add(row['id'])
+            if row['weight'] is not None and row['weight'] >= weight:
+                weight = row['weight'] + 1
+        return existing, weight
+
+    def _upsertChannels(self, c, channelList):
+        """
+        Insert new channels and update existing ones in two executemany calls.
+        Weight -1 means append a new channel after all others, and keep the
+        current weight of an existing one.
+        """
+        existing, weight = self._channelWeights(c)
+        inserts = []
+        updates = []
+        for channel in channelList:
+            if channel.id in existing:
+                updates.append([channel.title, channel.logo, channel.streamUrl, channel.visible, channel.weight, channel.weight,
+                                channel.id, self.source.KEY])
+                # appended channels go after the weights the updates write too
+                if channel.weight is not None and channel.weight != -1 and channel.weight >= weight:
+                    weight = channel.weight + 1
+                continue
+            existing.add(channel.id)
+            if channel.weight == -1:
+                channelWeight = weight
+            else:
+                channelWeight = channel.weight
+            if channelWeight is not None and channelWeight >= weight:
+                weight = channelWeight + 1
+            inserts.append([channel.id, channel.title, channel.logo, channel.streamUrl, channel.visible, channelWeight, self.source.KEY])
+        c.executemany('INSERT OR IGNORE INTO channels(id, title, logo, stream_url, visible, weight, source) VALUES(?, ?, ?, ?, ?, ?, ?)', inserts)
+        c.executemany('UPDATE channels SET title=?, logo=?, stream_url=?, visible=?, weight=(CASE ? WHEN -1 THEN weight ELSE ? END) WHERE id=? AND source=?', updates)
+
     def getLineupChannels(self, lineup):
         result = self._invokeAndBlockForResult(self._getLineupChannels, lineup)
         return result
@@ -816,43 +1044,13 @@ class Database(object):
         c.close()
         return channelList
 
-    def saveChannelListBlock(self, channelList):
-        result = self._invokeAndBlockForResult(self._saveChannelListBlock, channelList)
-        return result
-
-    def _saveChannelListBlock(self, channelList):
-        c = self.conn.cursor()
-        c.execute('DELETE FROM channels')
-        for idx, channel in enumerate(channelList):
-            c.execute(
-                'INSERT OR IGNORE INTO channels(id, title, logo, stream_url, visible, weight, source) VALUES(?, ?, ?, ?, ?, (CASE ? WHEN -1 THEN (SELECT COALESCE(MAX(weight)+1, 0) FROM channels WHERE source=?) ELSE ? END), ?)',
-                [channel.id, channel.title, channel.logo, channel.streamUrl, channel.visible, channel.weight,
-                 self.source.KEY, channel.weight, self.source.KEY])
-            if not c.rowcount:
-                c.execute(
-                    'UPDATE channels SET title=?, logo=?, stream_url=?, visible=?, weight=(CASE ? WHEN -1 THEN weight ELSE ? END) WHERE id=? AND source=?',
-                    [channel.title, channel.logo, channel.streamUrl, channel.visible, channel.weight, channel.weight,
-                     channel.id, self.source.KEY])
-        c.execute("UPDATE sources SET channels_updated=? WHERE id=?", [datetime.datetime.now(), self.source.KEY])
-        self.channelList = None
-        self.conn.commit()
-
     def saveChannelList(self, callback, channelList):
         self.eventQueue.append([self._saveChannelList, callback, channelList])
         self.event.set()
 
     def _saveChannelList(self, channelList):
         c = self.conn.cursor()
-        for idx, channel in enumerate(channelList):
-            c.execute(
-                'INSERT OR IGNORE INTO channels(id, title, logo, stream_url, visible, weight, source) VALUES(?, ?, ?, ?, ?, (CASE ? WHEN -1 THEN (SELECT COALESCE(MAX(weight)+1, 0) FROM channels WHERE source=?) ELSE ? END), ?)',
-                [channel.id, channel.title, channel.logo, channel.streamUrl, channel.visible, channel.weight,
-                 self.source.KEY, channel.weight, self.source.KEY])
-            if not c.rowcount:
-                c.execute(
-                    'UPDATE channels SET title=?, logo=?, stream_url=?, visible=?, weight=(CASE ? WHEN -1 THEN weight ELSE ? END) WHERE id=? AND source=?',
-                    [channel.title, channel.logo, channel.streamUrl, channel.visible, channel.weight, channel.weight,
-                     channel.id, self.source.KEY])
+        self._upsertChannels(c, channelList)
         c.execute("UPDATE sources SET channels_updated=? WHERE id=?", [datetime.datetime.now(), self.source.KEY])
         self.channelList = None
         self.conn.commit()
@@ -880,6 +1078,32 @@ class Database(object):
     def _getChannelList(self, onlyVisible, all=False):
         c = self.conn.cursor()
         channelList = list()
+        if all == False and self.category and self.category != "Any":
+            self._refreshCategories(c)
+
+            NONE = "0"
+            SORT = "1"
+            CATEGORIES = "2"
+            if onlyVisible:
+                visible = ' AND ch.visible=1'
+            else:
+                visible = ''
+            if SETTINGS.getSetting('channel.filter.sort') == CATEGORIES:
+                order = 'm.position, ch.weight'
+            else:
+                order = 'ch.weight'
+            c.execute('SELECT ch.* FROM category_members m JOIN channels ch ON ch.source=? AND ch.title=m.title '
+                      'WHERE m.category=?' + visible + ' ORDER BY ' + order, [self.source.KEY, self.category])
+            for row in c:
+                channel = Channel(row['id'], row['title'], row['lineup'], row['logo'], row['stream_url'], row['visible'], row['weight'])
+                channelList.append(channel)
+            if SETTINGS.getSetting('channel.filter.sort') == SORT:
+                channelList = sorted(channelList, key=lambda channel: channel.title.lower())
+            if channelList:
+                c.close()
+                return channelList
+
+        # no category, or nothing in it: all channels
         if onlyVisible:
             c.execute('SELECT * FROM channels WHERE source=? AND visible=? ORDER BY weight', [self.source.KEY, 1])
         else:
@@ -888,46 +1112,57 @@ class Database(object):
             channel = Channel(row['id'], row['title'], row['lineup'], row['logo'], row['stream_url'], row['visible'], row['weight'])
             channelList.append(channel)
 
-        if all == False and self.category and self.category != "Any":
-            f = xbmcvfs.File('special://profile/addon_data/script.tvguide.fullscreen/categories.ini','rb')
+        if not (all == False and self.category and self.category != "Any") and SETTINGS.getSetting('channel.filter.sort.all') == 'true':
+            channelList = sorted(channelList, key=lambda channel: channel.title.lower())
+        c.close()
+        return channelList
+
+
+    def _refreshCategories(self, c):
+        """
+        Reload category_members when categories.ini changed since the last import.
+        """
+        path = xbmc.translatePath('special://profile/addon_data/script.tvguide.fullscreen/categories.ini')
+        try:
+            st = os.stat(path)
+            stamp = "%s:%s" % (st.st_mtime, st.st_size)
+        except OSError:
+            stamp = ""
+        c.execute("SELECT value FROM settings WHERE key='categories.ini'")
+        row = c.fetchone()
+        if row is not None and row['value'] == stamp:
+            return
+
+        members = {}
+        if stamp:
+            f = xbmcvfs.File(path,'rb')
             lines = f.read().splitlines()
             f.close()
-            filter = []
-            seen = set()
             for line in lines:
+                if isinstance(line, bytes):
+                    line = line.decode('utf8', 'ignore')
                 if "=" not in line:
                     continue
-                name,cat = line.split('=')
-                if cat == self.category:
-                    if name not in seen:
-                        filter.append(name)
-                    seen.add(name)
+                name,cat = line.rsplit('=',1)
+                # position is the first occurrence, like the old per-call scan
+                if (cat, name) not in members:
+                    members[(cat, name)] = len(members)
+        c.execute('DELETE FROM category_members')
+        c.executemany('INSERT INTO category_members(category, title, position) VALUES(?, ?, ?)',
+                      [(cat, name, position) for (cat, name), position in members.items()])
+        c.execute("INSERT OR REPLACE INTO settings(key, value) VALUES('categories.ini', ?)", [stamp])
+        self.conn.commit()
 
-            NONE = "0"
-            SORT = "1"
-            CATEGORIES = "2"
-            new_channels = []
-            if ADDON.getSetting('channel.filter.sort') == CATEGORIES:
-                for filter_name in filter:
-                    for channel in channelList:
-                        if channel.title == filter_name:
-                            new_channels.append(channel)
-                if new_channels:
-                    channelList = new_channels
-            else:
-                for channel in channelList:
-                    if channel.title in filter:
-                        new_channels.append(channel)
-                if new_channels:
-                    if ADDON.getSetting('channel.filter.sort') == SORT:
-                        channelList = sorted(new_channels, key=lambda channel: channel.title.lower())
-                    else:
-                        channelList = new_channels
-        elif ADDON.getSetting('channel.filter.sort.all') == 'true':
-            channelList = sorted(channelList, key=lambda channel: channel.title.lower())
-        c.close()
-        return channelList
+    def getCategories(self):
+        return self._invokeAndBlockForResult(self._getCategories)
 
+    def _getCategories(self):
+        c = self.conn.cursor()
+        self._refreshCategories(c)
+        c.execute('SELECT DISTINCT category FROM category_members ORDER BY category')
+        categories = [row['category'] for row in c]
+        c.close()
+        return categories
 
     def programSearch(self, search):
         return self._invokeAndBlockForResult(self._programSearch, search)
@@ -935,17 +1170,20 @@ class Database(object):
     def _programSearch(self, search):
         programList = []
         now = datetime.datetime.now()
-        days = int(ADDON.getSetting('listing.days'))
-        startTime = now - datetime.timedelta(hours=int(ADDON.getSetting('listing.hours')))
+        days = int(SETTINGS.getSetting('listing.days'))
+        startTime = now - datetime.timedelta(hours=int(SETTINGS.getSetting('listing.hours')))
         endTime = now + datetime.timedelta(days=days)
         c = self.conn.cursor()
         channelList = self._getChannelList(True)
         search = "%%%s%%" % search
+        plot = SETTINGS.getSetting('program.search.plot') == 'true'
+        if plot:
+            self._fillTextMatches(c, search)
         for channel in channelList:
 
-            if ADDON.getSetting('program.search.plot') == 'true':
-                try: c.execute('SELECT * FROM programs WHERE channel=? AND source=? AND start_date>=? AND end_date<=? AND (title LIKE ? OR description LIKE ?)',
-                          [channel.id, self.source.KEY, startTime, endTime, search, search])
+            if plot:
+                try: c.execute('SELECT * FROM programs WHERE channel=? AND source=? AND start_date>=? AND end_date<=? AND (title LIKE ? OR description_key IN temp.text_matches)',
+                          [channel.id, self.source.KEY, toEpoch(startTime), toEpoch(endTime), search])
                 except: return
             else:
                 try: c.execute('SELECT * FROM programs WHERE channel=? AND source=? AND title LIKE ?',
@@ -966,16 +1204,17 @@ class Database(object):
     def _descriptionSearch(self, search):
         programList = []
         now = datetime.datetime.now()
-        days = int(ADDON.getSetting('listing.days'))
-        startTime = now - datetime.timedelta(hours=int(ADDON.getSetting('listing.hours')))
+        days = int(SETTINGS.getSetting('listing.days'))
+        startTime = now - datetime.timedelta(hours=int(SETTINGS.getSetting('listing.hours')))
         endTime = now + datetime.timedelta(days=days)
         c = self.conn.cursor()
         channelList = self._getChannelList(True)
         search = "%%%s%%" % search
+        self._fillTextMatches(c, search)
         for channel in channelList:
 
-            try: c.execute('SELECT * FROM programs WHERE channel=? AND source=? AND description LIKE ? AND start_date>=? AND end_date<=? ',
-                      [channel.id, self.source.KEY,search, startTime, endTime])
+            try: c.execute('SELECT * FROM programs WHERE channel=? AND source=? AND description_key IN temp.text_matches AND start_date>=? AND end_date<=? ',
+                      [channel.id, self.source.KEY, toEpoch(startTime), toEpoch(endTime)])
             except: return
             for row in c:
                 program = Program(channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
@@ -992,15 +1231,16 @@ class Database(object):
     def _programCategorySearch(self, search):
         programList = []
         now = datetime.datetime.now()
-        days = int(ADDON.getSetting('listing.days'))
-        startTime = now - datetime.timedelta(hours=int(ADDON.getSetting('listing.hours')))
+        days = int(SETTINGS.getSetting('listing.days'))
+        startTime = now - datetime.timedelta(hours=int(SETTINGS.getSetting('listing.hours')))
         endTime = now + datetime.timedelta(days=days)
         c = self.conn.cursor()
         channelList = self._getChannelList(True)
         search = "%%%s%%" % search
+        self._fillTextMatches(c, search)
         for channel in channelList:
-            try: c.execute('SELECT * FROM programs WHERE channel=? AND source=? AND categories LIKE ? AND start_date>=? AND end_date<=? ',
-                      [channel.id, self.source.KEY,search, startTime, endTime])
+            try: c.execute('SELECT * FROM programs WHERE channel=? AND source=? AND categories_key IN temp.text_matches AND start_date>=? AND end_date<=? ',
+                      [channel.id, self.source.KEY, toEpoch(startTime), toEpoch(endTime)])
             except: return
             for row in c:
                 program = Program(channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
@@ -1011,17 +1251,31 @@ class Database(object):
         c.close()
         return programList
 
+    def _fillTextMatches(self, c, search):
+        """
+        Load the keys of the texts matching the LIKE pattern search into
+        temp.text_matches, so each distinct description or category is
+        matched once however many programmes share it.
+        """
+        c.execute('CREATE TEMP TABLE IF NOT EXISTS text_matches(hash INTEGER PRIMARY KEY)')
+        c.execute('DELETE FROM temp.text_matches')
+        c.execute('INSERT INTO temp.text_matches SELECT hash FROM texts WHERE text LIKE ?', [search])
+        self.conn.commit()
+
     def getChannelListing(self, channel):
         return self._invokeAndBlockForResult(self._getChannelListing, channel)
 
     def _getChannelListing(self, channel):
         now = datetime.datetime.now()
-        days = int(ADDON.getSetting('listing.days'))
+        days = int(SETTINGS.getSetting('listing.days'))
         endTime = now + datetime.timedelta(days=days)
+        guide = self._getGuideFile()
+        if guide is not None:
+            return [self._programFromGuideFile(channel, row) for row in guide.programs(channel.id, toEpoch(now), toEpoch(endTime))]
         programList = []
         c = self.conn.cursor()
         try: c.execute('SELECT * FROM programs WHERE channel=? AND end_date>? AND start_date<?',
-                  [channel.id,now,endTime])
+                  [channel.id,toEpoch(now),toEpoch(endTime)])
         except: return
         for row in c:
             program = Program(channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
@@ -1038,12 +1292,12 @@ class Database(object):
 
     def _getCatchupListing(self, channel):
         now = datetime.datetime.now()
-        hours = int(ADDON.getSetting('catchup.hours'))
+        hours = int(SETTINGS.getSetting('catchup.hours'))
         endTime = now + datetime.timedelta(hours=hours)
         programList = []
         c = self.conn.cursor()
         try: c.execute('SELECT * FROM programs WHERE channel=? AND end_date>? AND start_date<?',
-                  [channel.id,now,endTime])
+                  [channel.id,toEpoch(now),toEpoch(endTime)])
         except: return
         for row in c:
             program = Program(channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
@@ -1076,7 +1330,7 @@ class Database(object):
             return
         ids_string = '\',\''.join(ids)
         c.execute('SELECT * FROM programs WHERE channel IN (\'' + ids_string + '\') AND source=? AND start_date<=? AND end_date>=? ',
-                  [self.source.KEY, now, now])
+                  [self.source.KEY, toEpoch(now), toEpoch(now)])
         for row in c:
             program = Program(channelMap[row['channel']], title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
                           description=row['description'], categories=row['categories'],
@@ -1099,12 +1353,19 @@ class Database(object):
             if cc.id:
                 channelMap[cc.id] = cc
 
+        guide = self._getGuideFile()
+        if guide is not None:
+            for channel in sorted(channelMap.values(), key=lambda channel: channel.weight):
+                for row in guide.now(channel.id, toEpoch(now)):
+                    programList.append(self._programFromGuideFile(channel, row, '', '', ''))
+            return programList
+
         c = self.conn.cursor()
         c.execute(
             'SELECT DISTINCT p.*' +
             'FROM programs p, channels c WHERE p.channel IN (\'' + ('\',\''.join(channelIds)) + '\') AND p.channel=c.id AND p.source=? AND p.end_date >= ? AND p.start_date <= ?' +
             'ORDER BY c.weight',
-            [self.source.KEY, now, now])
+            [self.source.KEY, toEpoch(now), toEpoch(now)])
 
         for row in c:
             notification_scheduled = ''
@@ -1125,11 +1386,18 @@ class Database(object):
     def _getNextList(self):
         programList = []
         now = datetime.datetime.now()
-        c = self.conn.cursor()
         channelList = self._getChannelList(True)
+        guide = self._getGuideFile()
+        if guide is not None:
+            for channel in channelList:
+                row = guide.next(channel.id, toEpoch(now))
+                if row:
+                    programList.append(self._programFromGuideFile(channel, row))
+            return programList
+        c = self.conn.cursor()
         for channel in channelList:
             try: c.execute('SELECT * FROM programs WHERE channel=? AND source=? AND start_date >= ? AND end_date >= ?',
-                      [channel.id, self.source.KEY,now,now])
+                      [channel.id, self.source.KEY,toEpoch(now),toEpoch(now)])
             except: return
             row = c.fetchone()
             if row:
@@ -1156,7 +1424,7 @@ class Database(object):
         now = datetime.datetime.now()
         c = self.conn.cursor()
         try: c.execute('SELECT * FROM programs WHERE channel=? AND source=? AND start_date <= ? AND end_date >= ?',
-                  [channel.id, self.source.KEY, now, now])
+                  [channel.id, self.source.KEY, toEpoch(now), toEpoch(now)])
         except Exception as detail:
             return
         row = c.fetchone()
@@ -1181,7 +1449,7 @@ class Database(object):
             c = self.conn.cursor()
             c.execute(
                 'SELECT * FROM programs WHERE channel=? AND source=? AND start_date >= ? ORDER BY start_date ASC LIMIT 1',
-                [program.channel.id, self.source.KEY, program.endDate])
+                [program.channel.id, self.source.KEY, program.endEpoch])
             row = c.fetchone()
             if row:
                 nextProgram = Program(program.channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
@@ -1203,7 +1471,7 @@ class Database(object):
             c = self.conn.cursor()
             c.execute(
                 'SELECT * FROM programs WHERE channel=? AND source=? AND end_date <= ? ORDER BY start_date DESC LIMIT 1',
-                [program.channel.id, self.source.KEY, program.startDate])
+                [program.channel.id, self.source.KEY, program.startEpoch])
             row = c.fetchone()
             if row:
                 previousProgram = Program(program.channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
@@ -1235,31 +1503,23 @@ class Database(object):
         if not channels:
             return []
 
+        guide = self._getGuideFile()
+        if guide is not None:
+            return self._getProgramListFromGuideFile(guide, channelMap, toEpoch(startTime), toEpoch(endTime))
+
         c = self.conn.cursor()
-        #once
-        #TODO always, notifications,autoplays
         c.execute(
             'SELECT p.*, ' +
-            '(SELECT 1 FROM notifications n WHERE n.channel=p.channel AND n.program_title=p.title AND n.source=p.source AND n.type=0 AND n.start_date=p.start_date) AS notification_scheduled_once, '+
-            '(SELECT 1 FROM notifications n WHERE n.channel=p.channel AND n.program_title=p.title AND n.source=p.source AND n.type=1 ) AS notification_scheduled_always, '+
-            '(SELECT 1 FROM notifications w WHERE w.channel=p.channel AND w.program_title=p.title AND w.source=p.source AND w.type=3 AND time(w.start_date,"unixepoch")=time(p.start_date,"unixepoch")) AS notification_scheduled_daily, '+
-            '(SELECT 1 FROM notifications n WHERE n.channel=p.channel AND n.program_title=p.title AND n.source=p.source AND n.type=2 AND p.is_new = "New") AS notification_scheduled_new, '+
-            '(SELECT 1 FROM notifications n WHERE p.title LIKE n.program_title AND n.source=p.source AND n.type=4) AS notification_scheduled_regex, '+
-            '(SELECT 1 FROM autoplays a WHERE a.channel=p.channel AND a.program_title=p.title AND a.source=p.source AND a.type=0 AND a.start_date=p.start_date) AS autoplay_scheduled_once, '+
-            '(SELECT 1 FROM autoplays a WHERE a.channel=p.channel AND a.program_title=p.title AND a.source=p.source AND a.type=1 ) AS autoplay_scheduled_always, '+
-            '(SELECT 1 FROM autoplays a WHERE a.channel=p.channel AND a.program_title=p.title AND a.source=p.source AND a.type=2 and p.is_new = "New") AS autoplay_scheduled_new, '+
-            '(SELECT 1 FROM autoplays w WHERE w.channel=p.channel AND w.program_title=p.title AND w.source=p.source AND w.type=3 AND time(w.start_date,"unixepoch")=time(p.start_date,"unixepoch")) AS autoplay_scheduled_daily, '+
-            '(SELECT 1 FROM autoplaywiths w WHERE w.channel=p.channel AND w.program_title=p.title AND w.source=p.source AND w.type=0 AND w.start_date=p.start_date) AS autoplaywith_scheduled_once, '+
-            '(SELECT 1 FROM autoplaywiths w WHERE w.channel=p.channel AND w.program_title=p.title AND w.source=p.source AND w.type=1 ) AS autoplaywith_scheduled_always, '+
-            '(SELECT 1 FROM autoplaywiths w WHERE w.channel=p.channel AND w.program_title=p.title AND w.source=p.source AND w.type=3 AND time(w.start_date,"unixepoch")=time(p.start_date,"unixepoch")) AS autoplaywith_scheduled_daily, '+
-            '(SELECT 1 FROM autoplaywiths w WHERE w.channel=p.channel AND w.program_title=p.title AND w.source=p.source AND w.type=2 AND p.is_new = "New") AS autoplaywith_scheduled_new '+
+            '(SELECT 1 FROM scheduled_events e WHERE e.source=p.source AND e.channel=p.channel AND e.start_date=p.start_date AND e.kind="notification" AND e.on_channel) AS notification_scheduled, '+
+            '(SELECT 1 FROM scheduled_events e WHERE e.source=p.source AND e.channel=p.channel AND e.start_date=p.start_date AND e.kind="autoplay" AND e.type!=4 AND e.on_channel) AS autoplay_scheduled, '+
+            '(SELECT 1 FROM scheduled_events e WHERE e.source=p.source AND e.channel=p.channel AND e.start_date=p.start_date AND e.kind="autoplaywith" AND e.type!=4 AND e.on_channel) AS autoplaywith_scheduled '+
             'FROM programs p WHERE p.channel IN (\'' + ('\',\''.join(list(channelMap.keys()))) + '\') AND p.source=? AND p.end_date > ? AND p.start_date < ?',
-            [self.source.KEY, startTime, endTime])
+            [self.source.KEY, toEpoch(startTime), toEpoch(endTime)])
 
         for row in c:
-            notification_scheduled = row['notification_scheduled_once'] or row['notification_scheduled_always'] or row['notification_scheduled_new'] or row['notification_scheduled_daily'] or row['notification_scheduled_regex']
-            autoplay_scheduled = row['autoplay_scheduled_once'] or row['autoplay_scheduled_always'] or row['autoplay_scheduled_new'] or row['autoplay_scheduled_daily']
-            autoplaywith_scheduled = row['autoplaywith_scheduled_once'] or row['autoplaywith_scheduled_always'] or row['autoplaywith_scheduled_new'] or row['autoplaywith_scheduled_daily']
+            notification_scheduled = row['notification_scheduled']
+            autoplay_scheduled = row['autoplay_scheduled']
+            autoplaywith_scheduled = row['autoplaywith_scheduled']
             program = Program(channelMap[row['channel']], title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
                               description=row['description'], categories=row['categories'],
                               imageLarge=row['image_large'], imageSmall=row['image_small'], season=row['season'], episode=row['episode'],
@@ -1269,6 +1529,74 @@ class Database(object):
             programList.append(program)
         return programList
 
+    def _getProgramListFromGuideFile(self, guide, channelMap, start, end):
+        found = [(channel, row) for channel in channelMap.values() for row in guide.programs(channel.id, start, end)]
+        if not found:
+            return []
+        # the same conditions as the scheduled columns of the query in _getProgramList
+        c = self.conn.cursor()
+        c.execute('SELECT channel, start_date, kind FROM scheduled_events WHERE source=? AND channel IN (%s) AND on_channel AND (kind="notification" OR type!=4) '
+                  'AND start_date>=? AND start_date<?' % ','.join('?' * len(channelMap)),
+                  [self.source.KEY] + list(channelMap.keys()) + [min(row[0] for channel, row in found), end])
+        scheduled = set((row[0], row[1], row[2]) for row in c)
+        c.close()
+        programList = []
+        for channel, row in found:
+            flags = [1 if (channel.id, row[0], kind) in scheduled else None for kind in ['notification', 'autoplay', 'autoplaywith']]
+            programList.append(self._programFromGuideFile(channel, row, *flags))
+        return programList
+
+    def _writeGuideFile(self, c):
+        """
+        Writes the programmes of the source to the guide file the listings
+        read, see guidefile.py. Its token is only stored if program_rows did
+        not change meanwhile, the read transaction can not be upgraded then.
+        """
+        if self.guideFile is not None:
+            self.guideFile.close()
+            self.guideFile = None
+        token = guidefile.newToken()
+        try:
+            c.execute('BEGIN')
+            c.execute('SELECT %s FROM programs WHERE source=? ORDER BY channel_key, start_date' % guidefile.COLUMNS, [self.source.KEY])
+            guidefile.write(self.guideFilePath, token, c)
+            c.execute('INSERT INTO guide_file(token) VALUES(?)', [token])
+            self.conn.commit()
+        except (sqlite3.OperationalError, IOError, OSError) as detail:
+            # e.g. the file is mapped by another process on Windows
+            xbmc.log('[script.tvguide.fullscreen] guide file not written: %s' % detail, xbmc.LOGWARNING)
+            self.conn.rollback()
+
+    def _getGuideFile(self):
+        """
+        @return: the GuideFile with the programmes of program_rows, None if
+                 there is none and the listings have to use SQL
+        """
+        row = self.conn.execute('SELECT token FROM guide_file').fetchone()
+        if row is None:
+            return None
+        if self.guideFile is not None and self.guideFile.token == row[0]:
+            return self.guideFile
+        if self.guideFile is not None:
+            self.guideFile.close()
+            self.guideFile = None
+        try:
+            guide = guidefile.GuideFile(self.guideFilePath)
+        except (IOError, OSError, guidefile.GuideFileError):
+            return None
+        if guide.token != row[0]:
+            guide.close()
+            return None
+        self.guideFile = guide
+        return guide
+
+    @staticmethod
+    def _programFromGuideFile(channel, row, notificationScheduled=None, autoplayScheduled=None, autoplaywithScheduled=None):
+        return Program(channel, title=row[2], sub_title=row[3], startDate=row[0], endDate=row[1],
+                       description=row[4], categories=row[5], imageLarge=row[6], imageSmall=row[7], season=row[8], episode=row[9],
+                       is_new=row[10], is_movie=row[11], language=row[12],
+                       notificationScheduled=notificationScheduled, autoplayScheduled=autoplayScheduled, autoplaywithScheduled=autoplaywithScheduled)
+
     def _isProgramListCacheExpired(self, date=datetime.datetime.now()):
         # check if data is up-to-date in database
         dateStr = date.strftime('%Y-%m-%d')
@@ -1288,24 +1616,8 @@ class Database(object):
     def _setCustomStreamUrl(self, channel, stream_url):
         if stream_url is not None:
             image = ""
-            if ADDON.getSetting("addon.logos") == "true":
-                file_name = 'special://profile/addon_data/script.tvguide.fullscreen/icons.ini'
-                f = xbmcvfs.File(file_name)
-                items = f.read().splitlines()
-                f.close()
-                for item in items:
-                    if item.startswith('['):
-                        pass
-                    elif item.startswith('#'):
-                        pass
-                    else:
-                        url_icon = item.rsplit('|',1)
-                        if len(url_icon) == 2:
-                            url = url_icon[0]
-                            icon = url_icon[1]
-                            if url == stream_url:
-                                if icon and icon != "nothing":
-                                    image = icon.rstrip('/')
+            if SETTINGS.getSetting("addon.logos") == "true":
+                image = self.iniStore.getIcon(stream_url)
             c = self.conn.cursor()
             if image:
                 c.execute('UPDATE OR REPLACE channels SET logo=? WHERE id=?' , (image, channel.id))
@@ -1337,13 +1649,63 @@ class Database(object):
     def _setCustomStreamUrls(self, stream_urls):
         if stream_urls is not None:
             c = self.conn.cursor()
-            for (id,stream_url) in stream_urls:
-                c.execute("DELETE FROM custom_stream_url WHERE channel=?", [id])
-                c.execute("INSERT OR REPLACE INTO custom_stream_url(channel, stream_url) VALUES(?, ?)",
-                          [id, stream_url.decode('utf-8', 'ignore')])
+            self._replaceCustomStreamUrls(c, stream_urls)
             self.conn.commit()
             c.close()
 
+    def _replaceCustomStreamUrls(self, c, stream_urls):
+        # one url per channel, later entries win
+        urls = dict((id, decodeText(stream_url)) for id, stream_url in stream_urls)
+        self._fillIdTable(c, urls)
+        c.execute('DELETE FROM custom_stream_url WHERE channel IN (SELECT id FROM temp.channel_ids)')
+        c.executemany('INSERT INTO custom_stream_url(channel, stream_url) VALUES(?, ?)', list(urls.items()))
+
+    def importM3U(self, channels, stream_urls, reorder=False):
+        self._invokeAndBlockForResult(self._importM3U, channels, stream_urls, reorder)
+        # no result, but block until operation is done
+
+    def _importM3U(self, channels, stream_urls, reorder):
+        """
+        Merge an M3U playlist in one transaction.
+
+        @param channels: channels from the playlist, added if their id is new
+        @type channels: list of source.Channel
+        @param stream_urls: (id, url) in playlist order
+        @param reorder: weight channels in playlist order, the others after them
+        """
+        c = self.conn.cursor()
+        c.execute('SELECT id, weight FROM channels WHERE source=? ORDER BY weight', [self.source.KEY])
+        existing = [(row['id'], row['weight']) for row in c]
+        ids = set(id for id, weight in existing)
+        weight = max([w for id, w in existing if w is not None] or [-1]) + 1
+        new_channels = []
+        for channel in channels:
+            if channel.id in ids:
+                continue
+            ids.add(channel.id)
+            new_channels.append([channel.id, channel.title, channel.logo, channel.streamUrl, True, weight, self.source.KEY])
+            existing.append((channel.id, weight))
+            weight += 1
+        c.executemany('INSERT OR IGNORE INTO channels(id, title, logo, stream_url, visible, weight, source) VALUES(?, ?, ?, ?, ?, ?, ?)', new_channels)
+
+        self._replaceCustomStreamUrls(c, stream_urls)
+
+        if reorder and stream_urls:
+            order = {}
+            for i, (id, url) in enumerate(stream_urls):
+                order[id] = i + 1
+            weights = [(order.get(id, 0), id) for id, w in existing]
+            weight = max([w for w, id in weights]) + 1
+            for i, (w, id) in enumerate(weights):
+                if w == 0:
+                    weights[i] = (weight, id)
+                    weight += 1
+            c.executemany('UPDATE channels SET weight=? WHERE id=? AND source=?', [(w, id, self.source.KEY) for w, id in weights])
+
+        self.channelList = None
+        self.conn.commit()
+        c.close()
+
     def setAltCustomStreamUrls(self, stream_urls):
         if stream_urls is not None:
             self._invokeAndBlockForResult(self._setAltCustomStreamUrls, stream_urls)
@@ -1352,10 +1714,8 @@ class Database(object):
     def _setAltCustomStreamUrls(self, stream_urls):
         if stream_urls is not None:
             c = self.conn.cursor()
-            for (id,title,stream_url) in stream_urls:
-                #c.execute("DELETE FROM alt_custom_stream_url WHERE channel=?", [id])
-                c.execute("INSERT OR REPLACE INTO alt_custom_stream_url(channel, title, stream_url) VALUES(?, ?, ?)",
-                          [id, title.decode('utf-8', 'ignore'), stream_url.decode('utf-8', 'ignore')])
+            c.executemany("INSERT OR REPLACE INTO alt_custom_stream_url(channel, title, stream_url) VALUES(?, ?, ?)",
+                          [(id, decodeText(title), decodeText(stream_url)) for (id,title,stream_url) in stream_urls])
             self.conn.commit()
             c.close()
 
@@ -1589,6 +1949,106 @@ class Database(object):
                 c.execute('CREATE INDEX program_list_idx ON programs(source, channel, start_date, end_date)')
                 c.execute('CREATE INDEX start_date_idx ON programs(start_date)')
                 c.execute('CREATE INDEX end_date_idx ON programs(end_date)')
+            if version < [1, 4, 2]:
+                c.execute('UPDATE version SET major=1, minor=4, patch=2')
+                c.execute('CREATE TABLE IF NOT EXISTS category_members(category TEXT, title TEXT, position INTEGER, PRIMARY KEY (category, title))')
+                c.execute('CREATE INDEX IF NOT EXISTS category_members_position_idx ON category_members(category, position)')
+                c.execute('CREATE INDEX IF NOT EXISTS channels_title_idx ON channels(source, title)')
+            if version < [1, 4, 3]:
+                c.execute('UPDATE version SET major=1, minor=4, patch=3')
+                c.execute('CREATE INDEX IF NOT EXISTS programs_title_idx ON programs(title)')
+                for table in ['notifications', 'autoplays', 'autoplaywiths']:
+                    c.execute('CREATE INDEX IF NOT EXISTS %s_title_idx ON %s(program_title, channel, type)' % (table, table))
+            if version < [1, 4, 4]:
+                c.execute('UPDATE version SET major=1, minor=4, patch=4')
+                c.execute('CREATE TABLE IF NOT EXISTS scheduled_events(source TEXT, channel TEXT, start_date TIMESTAMP, kind TEXT, type INTEGER, on_channel BOOLEAN, title TEXT, PRIMARY KEY (source, channel, start_date, kind, type, on_channel))')
+                c.execute('CREATE INDEX IF NOT EXISTS scheduled_events_kind_idx ON scheduled_events(kind, title)')
+                for kind in RULE_TABLES:
+                    self._reschedule(c, kind)
+            if version < [1, 4, 5]:
+                # programme times as integer epochs, read without a converter
+                c.execute('UPDATE version SET major=1, minor=4, patch=5')
+                c.execute('DROP TABLE programs')
+                c.execute(
+                    'CREATE TABLE programs(channel TEXT, title TEXT, sub_title TEXT, start_date INTEGER, end_date INTEGER, description TEXT, categories TEXT, image_large TEXT, image_small TEXT, season TEXT, episode TEXT, is_new TEXT, is_movie TEXT, language TEXT, source TEXT, updates_id INTEGER, UNIQUE (channel, start_date, end_date), FOREIGN KEY(channel, source) REFERENCES channels(id, source) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, FOREIGN KEY(updates_id) REFERENCES updates(id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED)')
+                c.execute('CREATE INDEX program_list_idx ON programs(source, channel, start_date, end_date)')
+                c.execute('CREATE INDEX start_date_idx ON programs(start_date)')
+                c.execute('CREATE INDEX end_date_idx ON programs(end_date)')
+                c.execute('CREATE INDEX programs_title_idx ON programs(title)')
+                c.execute('DROP TABLE scheduled_events')
+                c.execute('CREATE TABLE scheduled_events(source TEXT, channel TEXT, start_date INTEGER, kind TEXT, type INTEGER, on_channel BOOLEAN, title TEXT, PRIMARY KEY (source, channel, start_date, kind, type, on_channel))')
+                c.execute('CREATE INDEX scheduled_events_kind_idx ON scheduled_events(kind, title)')
+                # the guide is imported again into the new tables
+                c.execute('DELETE FROM updates')
+                c.execute('UPDATE sources SET channels_updated=0')
+            if version < [1, 4, 6]:
+                # programmes reference their channel by an integer key instead of
+                # repeating channel id and source in every row and index entry,
+                # the programs view keeps the old columns for reading
+                self.conn.commit()
+                c.execute('PRAGMA foreign_keys = OFF')  # rebuilding channels must not cascade into the rule tables
+                c.execute('UPDATE version SET major=1, minor=4, patch=6')
+                c.execute(
+                    'CREATE TABLE channels_new(key INTEGER PRIMARY KEY, id TEXT, title TEXT, logo TEXT, stream_url TEXT, source TEXT, lineup TEXT, visible BOOLEAN, weight INTEGER, UNIQUE (id, source), FOREIGN KEY(source) REFERENCES sources(id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED)')
+                c.execute('INSERT INTO channels_new(id, title, logo, stream_url, source, lineup, visible, weight) '
+                          'SELECT id, title, logo, stream_url, source, lineup, visible, weight FROM channels')
+                c.execute(
+                    'CREATE TABLE program_rows(channel_key INTEGER, title TEXT, sub_title TEXT, start_date INTEGER, end_date INTEGER, description TEXT, categories TEXT, image_large TEXT, image_small TEXT, season TEXT, episode TEXT, is_new TEXT, is_movie TEXT, language TEXT, updates_id INTEGER, UNIQUE (channel_key, start_date, end_date), FOREIGN KEY(channel_key) REFERENCES channels(key) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, FOREIGN KEY(updates_id) REFERENCES updates(id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED)')
+                c.execute('INSERT OR IGNORE INTO program_rows SELECT c.key, p.title, p.sub_title, p.start_date, p.end_date, p.description, p.categories, p.image_large, p.image_small, '
+                          'p.season, p.episode, p.is_new, p.is_movie, p.language, p.updates_id FROM programs p JOIN channels_new c ON c.id = p.channel AND c.source = p.source')
+                c.execute('DROP TABLE programs')
+                c.execute('DROP TABLE channels')
+                c.execute('ALTER TABLE channels_new RENAME TO channels')
+                c.execute('CREATE INDEX channels_title_idx ON channels(source, title)')
+                # the UNIQUE index on (channel_key, start_date, end_date) serves the per channel range scans
+                c.execute('CREATE INDEX start_date_idx ON program_rows(start_date)')
+                c.execute('CREATE INDEX end_date_idx ON program_rows(end_date)')
+                c.execute('CREATE INDEX programs_title_idx ON program_rows(title)')
+                c.execute('CREATE VIEW programs AS SELECT c.id AS channel, p.title, p.sub_title, p.start_date, p.end_date, p.description, p.categories, p.image_large, p.image_small, '
+                          'p.season, p.episode, p.is_new, p.is_movie, p.language, c.source AS source, p.updates_id, p.channel_key FROM program_rows p JOIN channels c ON c.key = p.channel_key')
+                self.conn.commit()
+                c.execute('PRAGMA foreign_keys = ON')
+            if version < [1, 4, 7]:
+                # descriptions, categories and icon urls are stored once in texts,
+                # program_rows references them by content hash (texts.textKey)
+                self.conn.create_function('text_key', 1, textKey)
+                c.execute('UPDATE version SET major=1, minor=4, patch=7')
+                c.execute('CREATE TABLE texts(hash INTEGER PRIMARY KEY, text TEXT)')
+                c.execute('INSERT OR IGNORE INTO texts(hash, text) SELECT text_key(value), value FROM '
+                          '(SELECT description AS value FROM program_rows UNION SELECT categories FROM program_rows UNION SELECT image_small FROM program_rows) '
+                          'WHERE value IS NOT NULL')
+                c.execute('DROP VIEW programs')
+                c.execute('ALTER TABLE program_rows RENAME TO program_rows_old')
+                c.execute(
+                    'CREATE TABLE program_rows(channel_key INTEGER, title TEXT, sub_title TEXT, start_date INTEGER, end_date INTEGER, description_key INTEGER, categories_key INTEGER, image_large TEXT, image_small_key INTEGER, season TEXT, episode TEXT, is_new TEXT, is_movie TEXT, language TEXT, updates_id INTEGER, UNIQUE (channel_key, start_date, end_date), FOREIGN KEY(channel_key) REFERENCES channels(key) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, FOREIGN KEY(updates_id) REFERENCES updates(id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED)')
+                c.execute('INSERT INTO program_rows SELECT channel_key, title, sub_title, start_date, end_date, text_key(description), text_key(categories), image_large, text_key(image_small), '
+                          'season, episode, is_new, is_movie, language, updates_id FROM program_rows_old')
+                c.execute('DROP TABLE program_rows_old')
+                c.execute('CREATE INDEX start_date_idx ON program_rows(start_date)')
+                c.execute('CREATE INDEX end_date_idx ON program_rows(end_date)')
+                c.execute('CREATE INDEX programs_title_idx ON program_rows(title)')
+                # the texts are only looked up for the queries that read these columns
+                c.execute('CREATE VIEW programs AS SELECT c.id AS channel, p.title, p.sub_title, p.start_date, p.end_date, d.text AS description, k.text AS categories, p.image_large, i.text AS image_small, '
+                          'p.season, p.episode, p.is_new, p.is_movie, p.language, c.source AS source, p.updates_id, p.channel_key, p.description_key, p.categories_key, p.image_small_key '
+                          'FROM program_rows p JOIN channels c ON c.key = p.channel_key LEFT JOIN texts d ON d.hash = p.description_key LEFT JOIN texts k ON k.hash = p.categories_key LEFT JOIN texts i ON i.hash = p.image_small_key')
+            if version < [1, 4, 8]:
+                # pages freed by deletes are given back by maintain() a few at a time,
+                # switching an existing file to incremental vacuum needs a full VACUUM once
+                self.conn.commit()
+                c.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                c.execute('VACUUM')
+                c.execute('UPDATE version SET major=1, minor=4, patch=8')
+            if version < [1, 4, 9]:
+                # readers keep their snapshot while an import writes
+                self.conn.commit()
+                c.execute('PRAGMA journal_mode = WAL')
+                c.execute('UPDATE version SET major=1, minor=4, patch=9')
+            if version < [1, 4, 10]:
+                # token of the guide file that has the programmes of program_rows
+                c.execute('UPDATE version SET major=1, minor=4, patch=10')
+                c.execute('CREATE TABLE guide_file(token INTEGER)')
+                for trigger in PROGRAM_ROWS_TRIGGERS:
+                    c.execute(trigger)
 
             # make sure we have a record in sources for this Source
             c.execute("INSERT OR IGNORE INTO sources(id, channels_updated) VALUES(?, ?)", [self.source.KEY, 0])
@@ -1614,6 +2074,10 @@ class Database(object):
         c = self.conn.cursor()
         c.execute("INSERT INTO notifications(channel, program_title, source, start_date, type) VALUES(?, ?, ?, ?, ?)",
                   [program.channel.id, program.title, self.source.KEY, program.startDate, type])
+        if str(type) == "4":
+            self._reschedule(c, 'notification')
+        else:
+            self._reschedule(c, 'notification', program.title)
         self.conn.commit()
         c.close()
 
@@ -1630,59 +2094,175 @@ class Database(object):
                   [program.channel.id, program.title, self.source.KEY])
         c.execute("DELETE FROM notifications WHERE ? LIKE program_title AND source=? AND type=4",
                   [program.title, self.source.KEY])
+        if c.rowcount:
+            self._reschedule(c, 'notification')
+        else:
+            self._reschedule(c, 'notification', program.title)
         self.conn.commit()
         c.close()
 
-    def getFullNotifications(self, daysLimit=5):
-        return self._invokeAndBlockForResult(self._getFullNotifications, daysLimit)
+    NOTIFICATION_RULES = [0, 1, 3, 4]
+    AUTOPLAY_RULES = [0, 1, 3]
+    AUTOPLAYWITH_RULES = [0, 1, 2, 3]
 
-    def _getFullNotifications(self, daysLimit):
+    def _channelKeys(self, c):
+        """
+        @return: dict of channel id -> integer key of this source's channels,
+                 the key program_rows references them by
+        """
+        c.execute('SELECT id, key FROM channels WHERE source=?', [self.source.KEY])
+        return dict(c.fetchall())
+
+    def _compileRules(self, c):
+        rules = []
+        for kind, table in RULE_TABLES.items():
+            c.execute('SELECT channel, program_title, start_date, type FROM %s WHERE source=?' % table, [self.source.KEY])
+            rules.extend((kind,) + tuple(row) for row in c.fetchall())
+        return RuleEngine(rules)
+
+    def _insertProgramRows(self, c, table, rows):
+        """
+        @param rows: list of program_rows values in column order
+        """
+        sql = ('INSERT OR REPLACE INTO %s(channel_key, title, sub_title, start_date, end_date, description_key, categories_key, image_large, image_small_key, '
+               'season, episode, is_new, is_movie, language, updates_id) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)' % table)
+        try:
+            c.executemany(sql, rows)
+        except Exception:
+            # insert the batch again one by one to keep the rows that are fine
+            for row in rows:
+                try:
+                    c.execute(sql, row)
+                except Exception as e:
+                    log(e)
+
+    def _insertScheduledEvents(self, c, events):
+        """
+        @param events: list of (source, channel, start_date, kind, type, on_channel, title)
+        """
+        if events:
+            c.executemany('INSERT OR IGNORE INTO scheduled_events(source, channel, start_date, kind, type, on_channel, title) VALUES(?, ?, ?, ?, ?, ?, ?)', events)
+
+    def _deleteStaleScheduledEvents(self, c):
+        # programmes replaced or dropped by an import that did not clear the whole source
+        c.execute('DELETE FROM scheduled_events WHERE source=? AND NOT EXISTS (SELECT 1 FROM programs p WHERE p.source=scheduled_events.source '
+                  'AND p.channel=scheduled_events.channel AND p.start_date=scheduled_events.start_date AND p.title=scheduled_events.title)',
+                  [self.source.KEY])
+
+    def _applyRetention(self, c, table='program_rows'):
+        # imports that keep the existing programmes and catchup updates never
+        # remove what has aired, keep at least what the listings and catchup show
+        hours = max(SETTINGS.getInt('database.retention.hours', 24), SETTINGS.getInt('listing.hours', 6),
+                    SETTINGS.getInt('catchup.hours', 8))
+        end = toEpoch(datetime.datetime.now() - datetime.timedelta(hours=hours))
+        c.execute('DELETE FROM %s WHERE end_date < ?' % table, [end])
+
+    def _setPragmas(self, c, pragmas):
+        """
+        @param pragmas: list of (name, value)
+        @return: list of (name, value) as they were before
+        """
+        previous = []
+        for name, value in pragmas:
+            row = c.execute('PRAGMA %s' % name).fetchone()
+            if row is None:
+                continue  # not in this build of SQLite, e.g. mmap_size
+            previous.append((name, row[0]))
+            c.execute('PRAGMA %s = %s' % (name, value)).fetchall()
+        return previous
+
+    def _swapProgramRows(self, c, updatesId, events, clearExistingProgramList, rulesChanged=False):
+        """
+        Replaces program_rows with program_rows_import and the scheduled
+        events of the source with events in one transaction. The indexes
+        are built here, after the programmes were loaded.
+
+        @param rulesChanged: rules were changed while the import ran, events
+                             were matched with the old ones
+        """
+        self.conn.commit()
+        c.execute('BEGIN IMMEDIATE')
+        c.execute('DROP VIEW programs')
+        c.execute('DROP TABLE program_rows')
+        c.execute('ALTER TABLE program_rows_import RENAME TO program_rows')
+        for name, column in PROGRAM_ROWS_INDEXES:
+            c.execute('CREATE INDEX %s ON program_rows(%s)' % (name, column))
+        for trigger in PROGRAM_ROWS_TRIGGERS:
+            c.execute(trigger)
+        c.execute(PROGRAMS_VIEW)
+        c.execute('DELETE FROM guide_file')
+        c.execute('DELETE FROM updates WHERE id<>?', [updatesId])
+        if clearExistingProgramList:
+            c.execute('DELETE FROM scheduled_events WHERE source=?', [self.source.KEY])
+        self._insertScheduledEvents(c, events)
+        if rulesChanged:
+            for kind in RULE_TABLES:
+                self._reschedule(c, kind)
+        self._deleteStaleScheduledEvents(c)
+        self._deleteUnusedTexts(c)
+
+    def _deleteUnusedTexts(self, c):
+        c.execute('DELETE FROM texts WHERE hash NOT IN (SELECT description_key FROM program_rows WHERE description_key IS NOT NULL '
+                  'UNION SELECT categories_key FROM program_rows WHERE categories_key IS NOT NULL '
+                  'UNION SELECT image_small_key FROM program_rows WHERE image_small_key IS NOT NULL)')
+
+    def _reschedule(self, c, kind, title=None):
+        """
+        Re-evaluate the rules of one kind after they changed, for the
+        programmes titled title or, without a title, for every programme
+        one of its rules can match.
+        """
+        self.rulesChanged += 1
+        engine = self._compileRules(c)
+        table = RULE_TABLES[kind]
+        if title is None:
+            c.execute('DELETE FROM scheduled_events WHERE kind=? AND source=?', [kind, self.source.KEY])
+            c.execute('SELECT channel, title, start_date, is_new FROM programs p WHERE source=? AND '
+                      '(title IN (SELECT program_title FROM %s WHERE source=?) '
+                      'OR EXISTS (SELECT 1 FROM %s r WHERE r.source=? AND r.type=4 AND p.title LIKE r.program_title))' % (table, table),
+                      [self.source.KEY] * 3)
+        else:
+            c.execute('DELETE FROM scheduled_events WHERE kind=? AND title=? AND source=?', [kind, title, self.source.KEY])
+            c.execute('SELECT channel, title, start_date, is_new FROM programs WHERE source=? AND title=?', [self.source.KEY, title])
+        events = []
+        for row in c.fetchall():
+            for matchKind, type, onChannel in engine.match(row[0], row[1], row[2], row[3]):
+                if matchKind == kind:
+                    events.append((self.source.KEY, row[0], row[2], kind, type, onChannel, row[1]))
+        self._insertScheduledEvents(c, events)
+
+    def _getScheduledPrograms(self, kind, types, daysLimit, flag):
+        """
+        Programmes matched by rules of one kind, read from scheduled_events.
+
+        Rules that repeat only list programmes ending within daysLimit days.
+        """
         start = datetime.datetime.now()
         end = start + datetime.timedelta(days=daysLimit)
-        programList = list()
         c = self.conn.cursor()
-        #once
-        c.execute("SELECT DISTINCT c.id, c.title as channel_title,c.lineup,c.logo,c.stream_url,c.visible,c.weight, p.* FROM programs p, channels c, notifications a WHERE c.id = p.channel AND a.type = 0 AND p.title = a.program_title AND a.start_date = p.start_date")
-        for row in c:
-            channel = Channel(row["id"], row["channel_title"], row['lineup'], row["logo"], row["stream_url"], row["visible"], row["weight"])
-            program = Program(channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
-                            description=row['description'], categories=row['categories'],
-                            imageLarge=row["image_large"],imageSmall=row["image_small"],
-                            season=row["season"],episode=row["episode"],is_new=row["is_new"],is_movie=row["is_movie"],language=row["language"],notificationScheduled=True)
-            programList.append(program)
-        #always
-        c.execute("SELECT DISTINCT c.id, c.title as channel_title,c.lineup,c.logo,c.stream_url,c.visible,c.weight, p.* FROM programs p, channels c, notifications a WHERE c.id = p.channel AND a.type = 1 AND p.title = a.program_title AND p.end_date >= ? AND p.end_date <= ?", [start,end])
-        #c.execute("SELECT DISTINCT c.id, c.title as channel_title,c.logo,c.stream_url,c.visible,c.weight, p.* FROM programs p, channels c, notifications a WHERE c.id = p.channel AND a.type = 1 AND p.title = a.program_title")
-        for row in c:
-            channel = Channel(row["id"], row["channel_title"], row['lineup'], row["logo"], row["stream_url"], row["visible"], row["weight"])
-            program = Program(channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
-                            description=row['description'], categories=row['categories'],
-                            imageLarge=row["image_large"],imageSmall=row["image_small"],
-                            season=row["season"],episode=row["episode"],is_new=row["is_new"],is_movie=row["is_movie"],language=row["language"],notificationScheduled=True)
-            programList.append(program)
-        #daily
-        c.execute("SELECT DISTINCT c.id, c.title as channel_title,c.lineup,c.logo,c.stream_url,c.visible,c.weight, p.* FROM programs p, channels c, notifications a WHERE c.id = p.channel AND a.type = 3 AND p.title = a.program_title AND p.end_date >= ? AND p.end_date <= ? AND time(a.start_date,'unixepoch')=time(p.start_date,'unixepoch')", [start,end])
-        for row in c:
-            channel = Channel(row["id"], row["channel_title"], row['lineup'], row["logo"], row["stream_url"], row["visible"], row["weight"])
-            program = Program(channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
-                            description=row['description'], categories=row['categories'],
-                            imageLarge=row["image_large"],imageSmall=row["image_small"],
-                            season=row["season"],episode=row["episode"],is_new=row["is_new"],is_movie=row["is_movie"],language=row["language"],notificationScheduled=True)
-            #log(row['title'])
-            programList.append(program)
-        #regex
-        c.execute("SELECT DISTINCT c.id, c.title as channel_title,c.lineup,c.logo,c.stream_url,c.visible,c.weight, p.* FROM programs p, channels c, notifications a WHERE c.id = p.channel AND a.type = 4 AND p.title LIKE a.program_title AND p.end_date >= ? AND p.end_date <= ?", [start,end])
-        #c.execute("SELECT DISTINCT c.id, c.title as channel_title,c.logo,c.stream_url,c.visible,c.weight, p.* FROM programs p, channels c, notifications a WHERE c.id = p.channel AND a.type = 1 AND p.title = a.program_title")
+        c.execute('SELECT DISTINCT c.id, c.title as channel_title,c.lineup,c.logo,c.stream_url,c.visible,c.weight, p.* FROM scheduled_events e '
+                  'JOIN programs p ON p.source = e.source AND p.channel = e.channel AND p.start_date = e.start_date '
+                  'JOIN channels c ON c.id = p.channel '
+                  'WHERE e.kind = ? AND e.type IN (%s) AND (e.type NOT IN (%s) OR (p.end_date >= ? AND p.end_date <= ?))'
+                  % (','.join(str(t) for t in types), ','.join(str(t) for t in WINDOWED_TYPES)),
+                  [kind, toEpoch(start), toEpoch(end)])
+        programList = list()
         for row in c:
             channel = Channel(row["id"], row["channel_title"], row['lineup'], row["logo"], row["stream_url"], row["visible"], row["weight"])
             program = Program(channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
                             description=row['description'], categories=row['categories'],
                             imageLarge=row["image_large"],imageSmall=row["image_small"],
-                            season=row["season"],episode=row["episode"],is_new=row["is_new"],is_movie=row["is_movie"],language=row["language"],notificationScheduled=True)
+                            season=row["season"],episode=row["episode"],is_new=row["is_new"],is_movie=row["is_movie"],language=row["language"],
+                            **{flag: True})
             programList.append(program)
         c.close()
         return programList
 
+    def getFullNotifications(self, daysLimit=5):
+        return self._invokeAndBlockForResult(self._getFullNotifications, daysLimit)
+
+    def _getFullNotifications(self, daysLimit):
+        return self._getScheduledPrograms('notification', Database.NOTIFICATION_RULES, daysLimit, 'notificationScheduled')
 
     def isNotificationRequiredForProgramStart(self, program):
         return self._invokeAndBlockForResult(self._isNotificationRequiredForProgramStart, program)
@@ -1787,6 +2367,7 @@ class Database(object):
     def _clearAllNotifications(self):
         c = self.conn.cursor()
         c.execute('DELETE FROM notifications')
+        c.execute('DELETE FROM scheduled_events WHERE kind=?', ['notification'])
         self.conn.commit()
         c.close()
 
@@ -1801,6 +2382,10 @@ class Database(object):
         c = self.conn.cursor()
         c.execute("INSERT INTO autoplays(channel, program_title, source, start_date, type) VALUES(?, ?, ?, ?, ?)",
                   [program.channel.id, program.title, self.source.KEY, program.startDate, type])
+        if str(type) == "4":
+            self._reschedule(c, 'autoplay')
+        else:
+            self._reschedule(c, 'autoplay', program.title)
         self.conn.commit()
         c.close()
 
@@ -1815,6 +2400,7 @@ class Database(object):
         c = self.conn.cursor()
         c.execute("DELETE FROM autoplays WHERE channel=? AND program_title=? AND source=?",
                   [program.channel.id, program.title, self.source.KEY])
+        self._reschedule(c, 'autoplay', program.title)
         self.conn.commit()
         c.close()
 
@@ -1822,42 +2408,7 @@ class Database(object):
         return self._invokeAndBlockForResult(self._getFullAutoplays, daysLimit)
 
     def _getFullAutoplays(self, daysLimit):
-        start = datetime.datetime.now()
-        end = start + datetime.timedelta(days=daysLimit)
-        programList = list()
-        c = self.conn.cursor()
-        if not c:
-            return
-        #once
-        c.execute("SELECT DISTINCT c.id, c.title as channel_title,c.lineup,c.logo,c.stream_url,c.visible,c.weight, p.* FROM programs p, channels c, autoplays a WHERE c.id = p.channel AND a.type = 0 AND p.title = a.program_title AND a.start_date = p.start_date")
-        for row in c:
-            channel = Channel(row["id"], row["channel_title"], row['lineup'], row["logo"], row["stream_url"], row["visible"], row["weight"])
-            program = Program(channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
-                            description=row['description'], categories=row['categories'],
-                            imageLarge=row["image_large"],imageSmall=row["image_small"],
-                            season=row["season"],episode=row["episode"],is_new=row["is_new"],is_movie=row["is_movie"],language=row["language"],autoplayScheduled=True)
-            programList.append(program)
-        #always
-        c.execute("SELECT DISTINCT c.id, c.title as channel_title,c.lineup,c.logo,c.stream_url,c.visible,c.weight, p.* FROM programs p, channels c, autoplays a WHERE c.id = p.channel AND a.type = 1 AND p.title = a.program_title AND p.end_date >= ? AND p.end_date <= ?", [start,end])
-        for row in c:
-            channel = Channel(row["id"], row["channel_title"], row['lineup'], row["logo"], row["stream_url"], row["visible"], row["weight"])
-            program = Program(channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
-                            description=row['description'], categories=row['categories'],
-                            imageLarge=row["image_large"],imageSmall=row["image_small"],
-                            season=row["season"],episode=row["episode"],is_new=row["is_new"],is_movie=row["is_movie"],language=row["language"],autoplayScheduled=True)
-            programList.append(program)
-        #daily
-        c.execute("SELECT DISTINCT c.id, c.title as channel_title,c.lineup,c.logo,c.stream_url,c.visible,c.weight, p.* FROM programs p, channels c, autoplays a WHERE c.id = p.channel AND a.type = 3 AND p.title = a.program_title AND p.end_date >= ? AND p.end_date <= ? AND time(a.start_date,'unixepoch')=time(p.start_date,'unixepoch')", [start,end])
-        for row in c:
-            channel = Channel(row["id"], row["channel_title"], row['lineup'], row["logo"], row["stream_url"], row["visible"], row["weight"])
-            program = Program(channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
-                            description=row['description'], categories=row['categories'],
-                            imageLarge=row["image_large"],imageSmall=row["image_small"],
-                            season=row["season"],episode=row["episode"],is_new=row["is_new"],is_movie=row["is_movie"],language=row["language"],autoplayScheduled=True)
-            #log(row['title'])
-            programList.append(program)
-        c.close()
-        return programList
+        return self._getScheduledPrograms('autoplay', Database.AUTOPLAY_RULES, daysLimit, 'autoplayScheduled')
 
     def addAutoplaywith(self, program, type):
         self._invokeAndBlockForResult(self._addAutoplaywith, program, type)
@@ -1870,6 +2421,10 @@ class Database(object):
         c = self.conn.cursor()
         c.execute("INSERT INTO autoplaywiths(channel, program_title, source, start_date, type) VALUES(?, ?, ?, ?, ?)",
                   [program.channel.id, program.title, self.source.KEY, program.startDate, type])
+        if str(type) == "4":
+            self._reschedule(c, 'autoplaywith')
+        else:
+            self._reschedule(c, 'autoplaywith', program.title)
         self.conn.commit()
         c.close()
 
@@ -1884,6 +2439,7 @@ class Database(object):
         c = self.conn.cursor()
         c.execute("DELETE FROM autoplaywiths WHERE channel=? AND program_title=? AND source=?",
                   [program.channel.id, program.title, self.source.KEY])
+        self._reschedule(c, 'autoplaywith', program.title)
         self.conn.commit()
         c.close()
 
@@ -1891,49 +2447,7 @@ class Database(object):
         return self._invokeAndBlockForResult(self._getFullAutoplaywiths, daysLimit)
 
     def _getFullAutoplaywiths(self, daysLimit):
-        start = datetime.datetime.now()
-        end = start + datetime.timedelta(days=daysLimit)
-        programList = list()
-        c = self.conn.cursor()
-        #once
-        c.execute("SELECT DISTINCT c.id, c.title as channel_title,c.lineup,c.logo,c.stream_url,c.visible,c.weight, p.* FROM programs p, channels c, autoplaywiths a WHERE c.id = p.channel AND a.type = 0 AND p.title = a.program_title AND a.start_date = p.start_date")
-        for row in c:
-            channel = Channel(row["id"], row["channel_title"], row["lineup"], row["logo"], row["stream_url"], row["visible"], row["weight"])
-            program = Program(channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
-                            description=row['description'], categories=row['categories'],
-                            imageLarge=row["image_large"],imageSmall=row["image_small"],
-                            season=row["season"],episode=row["episode"],is_new=row["is_new"],is_movie=row["is_movie"],language=row["language"],autoplaywithScheduled=True)
-            programList.append(program)
-        #always
-        c.execute("SELECT DISTINCT c.id, c.title as channel_title,c.lineup,c.logo,c.stream_url,c.visible,c.weight, p.* FROM programs p, channels c, autoplaywiths a WHERE c.id = p.channel AND a.type = 1 AND p.title = a.program_title AND p.end_date >= ? AND p.end_date <= ?", [start,end])
-        for row in c:
-            channel = Channel(row["id"], row["channel_title"], row['lineup'], row["logo"], row["stream_url"], row["visible"], row["weight"])
-            program = Program(channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
-                            description=row['description'], categories=row['categories'],
-                            imageLarge=row["image_large"],imageSmall=row["image_small"],
-                            season=row["season"],episode=row["episode"],is_new=row["is_new"],is_movie=row["is_movie"],language=row["language"],autoplaywithScheduled=True)
-            programList.append(program)
-        #new
-        c.execute("SELECT DISTINCT c.id, c.title as channel_title,c.lineup,c.logo,c.stream_url,c.visible,c.weight, p.* FROM programs p, channels c, autoplaywiths a WHERE c.id = p.channel AND a.type = 2 AND p.title = a.program_title AND p.is_new = 'New'")
-        for row in c:
-            channel = Channel(row["id"], row["channel_title"], row['lineup'], row["logo"], row["stream_url"], row["visible"], row["weight"])
-            program = Program(channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
-                            description=row['description'], categories=row['categories'],
-                            imageLarge=row["image_large"],imageSmall=row["image_small"],
-                            season=row["season"],episode=row["episode"],is_new=row["is_new"],is_movie=row["is_movie"],language=row["language"],autoplaywithScheduled=True)
-            programList.append(program)
-        #daily
-        c.execute("SELECT DISTINCT c.id, c.title as channel_title,c.lineup,c.logo,c.stream_url,c.visible,c.weight, p.* FROM programs p, channels c, autoplaywiths a WHERE c.id = p.channel AND a.type = 3 AND p.title = a.program_title AND p.end_date >= ? AND p.end_date <= ? AND time(a.start_date,'unixepoch')=time(p.start_date,'unixepoch')", [start,end])
-        for row in c:
-            channel = Channel(row["id"], row["channel_title"], row['lineup'], row["logo"], row["stream_url"], row["visible"], row["weight"])
-            program = Program(channel, title=row['title'], sub_title=row['sub_title'], startDate=row['start_date'], endDate=row['end_date'],
-                            description=row['description'], categories=row['categories'],
-                            imageLarge=row["image_large"],imageSmall=row["image_small"],
-                            season=row["season"],episode=row["episode"],is_new=row["is_new"],is_movie=row["is_movie"],language=row["language"],autoplaywithScheduled=True)
-
-            programList.append(program)
-        c.close()
-        return programList
+        return self._getScheduledPrograms('autoplaywith', Database.AUTOPLAYWITH_RULES, daysLimit, 'autoplaywithScheduled')
 
     def isAutoplayRequiredForProgram(self, program):
         return self._invokeAndBlockForResult(self._isAutoplayRequiredForProgram, program)
@@ -1957,6 +2471,7 @@ class Database(object):
     def _clearAllAutoplays(self):
         c = self.conn.cursor()
         c.execute('DELETE FROM autoplays')
+        c.execute('DELETE FROM scheduled_events WHERE kind=?', ['autoplay'])
         self.conn.commit()
         c.close()
 
@@ -1967,10 +2482,44 @@ class Database(object):
     def _clearAllAutoplaywiths(self):
         c = self.conn.cursor()
         c.execute('DELETE FROM autoplaywiths')
+        c.execute('DELETE FROM scheduled_events WHERE kind=?', ['autoplaywith'])
         self.conn.commit()
         c.close()
 
 
+class ScheduledEvents(object):
+    """
+    The programmes of the reminder and autoplay rules, read from
+    scheduled_events in source.db for the background service. Unlike
+    Database it creates no source, so nothing is fetched, and it runs no
+    event loop. The methods are those of Database with the same names.
+    """
+
+    def __init__(self):
+        """
+        @raise sqlite3.OperationalError: there is no source.db yet
+        """
+        path = os.path.join(xbmc.translatePath(ADDON.getAddonInfo('profile')), Database.SOURCE_DB)
+        if not os.path.exists(path):
+            raise sqlite3.OperationalError('no database at %s' % path)
+        self.conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+        self.conn.row_factory = sqlite3.Row
+
+    _getScheduledPrograms = Database._getScheduledPrograms
+
+    def getFullNotifications(self, daysLimit=5):
+        return self._getScheduledPrograms('notification', Database.NOTIFICATION_RULES, daysLimit, 'notificationScheduled')
+
+    def getFullAutoplays(self, daysLimit=5):
+        return self._getScheduledPrograms('autoplay', Database.AUTOPLAY_RULES, daysLimit, 'autoplayScheduled')
+
+    def getFullAutoplaywiths(self, daysLimit=5):
+        return self._getScheduledPrograms('autoplaywith', Database.AUTOPLAYWITH_RULES, daysLimit, 'autoplaywithScheduled')
+
+    def close(self):
+        self.conn.close()
+
+
 class Source(object):
     def getDataFromExternal(self, date, ch_list, progress_callback=None):
         """
@@ -1992,35 +2541,6 @@ class Source(object):
             return True
         return False
 
-def unescape2(text):
-    def fixup(m):
-        text = m.group(0)
-        if text[:2] == "&#":
-            # character reference
-            try:
-                if text[:3] == "&#x":
-                    return chr(int(text[3:-1], 16))
-                else:
-                    return chr(int(text[2:-1]))
-            except ValueError:
-                pass
-        else:
-            # named entity
-            try:
-                text = chr(html.entities.name2codepoint[text[1:-1]])
-                if text == "&":
-                    text = "&amp;"
-            except KeyError:
-                pass
-        return text # leave as is
-
-    text = re.sub(r"&#?\w+;", fixup, text)
-    text = re.sub(r"&([^;]*?<)", r"&amp;\1", text)
-    text = re.sub(r"<3", "HEART", text)
-
-    return text
-
-
 class XMLTVSource(Source):
     PLUGIN_DATA = xbmc.translatePath(os.path.join('special://profile', 'addon_data', 'script.tvguide.fullscreen'))
     KEY = 'xmltv'
@@ -2034,21 +2554,6 @@ class XMLTVSource(Source):
     CATEGORIES_TYPE_FILE = 0
     CATEGORIES_TYPE_URL = 1
 
-    def fix_xml(self, xmltvFile):
-        f = xbmcvfs.File(xmltvFile,'r')
-        data = f.read()
-        encoding = re.search('encoding="(.*?)"',data)
-        if encoding:
-            encoding = encoding.group(1)
-            data = data.decode(encoding)
-        f.close()
-        data = unescape2(data)
-        if encoding:
-            data = data.encode(encoding)
-        f = xbmcvfs.File(xmltvFile,'w')
-        f.write(data)
-        f.close()
-
     def __init__(self, addon, force):
         #gType = GuideTypes()
 
@@ -2089,11 +2594,8 @@ class XMLTVSource(Source):
         else:
             self.xmltvFile = self.updateLocalFile('xmltv.xml', addon.getSetting('xmltv.url'), addon, force=force)
 
-        if ADDON.getSetting('xmltv.and') == 'true':
-            self.fix_xml(self.xmltvFile)
-
         self.xmltv2File = ''
-        if ADDON.getSetting('xmltv2.enabled') == 'true':
+        if SETTINGS.getSetting('xmltv2.enabled') == 'true':
             if self.xmltv2Type == XMLTVSource.XMLTV_SOURCE_FILE:
                 '''
                 customFile = str(addon.getSetting('xmltv2.file'))
@@ -2111,11 +2613,8 @@ class XMLTVSource(Source):
             else:
                 self.xmltv2File = self.updateLocalFile('xmltv2.xml', addon.getSetting('xmltv2.url'), addon, force=force)
 
-            if ADDON.getSetting('xmltv.and') == 'true':
-                self.fix_xml(self.xmltv2File)
-
         self.xmltv3File = ''
-        if ADDON.getSetting('xmltv3.enabled') == 'true':
+        if SETTINGS.getSetting('xmltv3.enabled') == 'true':
             if self.xmltv3Type == XMLTVSource.XMLTV_SOURCE_FILE:
                 '''
                 customFile = str(addon.getSetting('xmltv3.file'))
@@ -2133,9 +2632,6 @@ class XMLTVSource(Source):
             else:
                 self.xmltv3File = self.updateLocalFile('xmltv3.xml', addon.getSetting('xmltv3.url'), addon, force=force)
 
-            if ADDON.getSetting('xmltv.and') == 'true':
-                self.fix_xml(self.xmltv3File)
-
 
         if not self.xmltvFile or not xbmcvfs.exists(self.xmltvFile):
             raise SourceNotConfiguredException()
@@ -2157,18 +2653,18 @@ class XMLTVSource(Source):
         return path
 
     def getDataFromExternal(self, date, ch_list, progress_callback=None):
-        time_offset = int(ADDON.getSetting('xmltv.offset'))
-        time_offset2 = int(ADDON.getSetting('xmltv2.offset'))
-        time_offset3 = int(ADDON.getSetting('xmltv3.offset'))
+        time_offset = int(SETTINGS.getSetting('xmltv.offset'))
+        time_offset2 = int(SETTINGS.getSetting('xmltv2.offset'))
+        time_offset3 = int(SETTINGS.getSetting('xmltv3.offset'))
         if not xbmcvfs.exists(self.xmltvFile):
             raise SourceNotConfiguredException()
-        if (ADDON.getSetting('xmltv3.enabled') == 'true') and xbmcvfs.exists(self.xmltv3File) and (ADDON.getSetting('xmltv2.enabled') == 'true') and xbmcvfs.exists(self.xmltv2File):
+        if (SETTINGS.getSetting('xmltv3.enabled') == 'true') and xbmcvfs.exists(self.xmltv3File) and (SETTINGS.getSetting('xmltv2.enabled') == 'true') and xbmcvfs.exists(self.xmltv2File):
             for v in chain(self.getDataFromExternal2(self.xmltvFile, date, ch_list, progress_callback, time_offset), self.getDataFromExternal2(self.xmltv2File, date, ch_list, progress_callback, time_offset2), self.getDataFromExternal2(self.xmltv3File, date, ch_list, progress_callback, time_offset3)):
                 yield v
-        elif (ADDON.getSetting('xmltv3.enabled') == 'true') and xbmcvfs.exists(self.xmltv3File):
+        elif (SETTINGS.getSetting('xmltv3.enabled') == 'true') and xbmcvfs.exists(self.xmltv3File):
             for v in chain(self.getDataFromExternal2(self.xmltvFile, date, ch_list, progress_callback, time_offset), self.getDataFromExternal2(self.xmltv3File, date, ch_list, progress_callback, time_offset2)):
                 yield v
-        elif (ADDON.getSetting('xmltv2.enabled') == 'true') and xbmcvfs.exists(self.xmltv2File):
+        elif (SETTINGS.getSetting('xmltv2.enabled') == 'true') and xbmcvfs.exists(self.xmltv2File):
             for v in chain(self.getDataFromExternal2(self.xmltvFile, date, ch_list, progress_callback, time_offset), self.getDataFromExternal2(self.xmltv2File, date, ch_list, progress_callback, time_offset)):
                 yield v
         else:
@@ -2179,8 +2675,11 @@ class XMLTVSource(Source):
         if xbmcvfs.exists(xmltvFile):
             f = FileWrapper(xmltvFile)
             if f:
-                context = ElementTree.iterparse(f, events=("start", "end"))
                 size = f.size
+                if SETTINGS.getSetting('xmltv.and') == 'true':
+                    # repairs the html entity errors on the way into the parser
+                    f = xmlfix.EntityFixer(f)
+                context = ElementTree.iterparse(f, events=("start", "end"))
                 return self.parseXMLTV(context, f, size, self.logoFolder, progress_callback, time_offset)
 
     def isUpdated(self, channelsLastUpdated, programLastUpdate):
@@ -2254,7 +2753,7 @@ class XMLTVSource(Source):
         if self.logoSource == XMLTVSource.LOGO_SOURCE_FOLDER:
             dirs, files = xbmcvfs.listdir(logoFolder)
             logos = [file[:-4] for file in files if file.endswith(".png")]
-        if ADDON.getSetting('update.progress') == 'true':
+        if SETTINGS.getSetting('update.progress') == 'true':
             d = xbmcgui.DialogProgressBG()
             d.create('TV Guide Fullscreen', "parsing xmltv")
         category_count = {}
@@ -2293,7 +2792,7 @@ class XMLTVSource(Source):
                                 category_count[txt] = 1
                             category_list.append(txt)
                     categories = ','.join(category_list)
-                    if ADDON.getSetting('xmltv.date') == 'true' and date and re.match("^[0-9]{4}$",date):
+                    if SETTINGS.getSetting('xmltv.date') == 'true' and date and re.match("^[0-9]{4}$",date):
                         is_movie = "Movie"
                         title = "%s (%s)" % (title,date)
                     title_tag = elem.find("title")
@@ -2355,7 +2854,7 @@ class XMLTVSource(Source):
                     cid = elem.get("id").replace("'", "").replace("=","-")  # Make ID safe to use as ' can cause crashes!
                     title = elem.findtext("display-name").replace("=","-")
                     use_thelogodb = False
-                    if ADDON.getSetting('thelogodb') == "2":
+                    if SETTINGS.getSetting('thelogodb') == "2":
                         use_thelogodb = True
                     else:
                         iconElement = elem.find("icon")
@@ -2363,7 +2862,7 @@ class XMLTVSource(Source):
                         if iconElement is not None:
                             icon = iconElement.get("src")
                         logo = ''
-                        if icon and ADDON.getSetting('xmltv.logos'):
+                        if icon and SETTINGS.getSetting('xmltv.logos'):
                             logo = icon
                         if logoFolder:
                             if self.logoSource == XMLTVSource.LOGO_SOURCE_URL:
@@ -2383,8 +2882,8 @@ class XMLTVSource(Source):
                                         logo = os.path.join(logoFolder, l + '.png')
                                         break
 
-                    if use_thelogodb or (not logo and ADDON.getSetting('thelogodb') == "1"):
-                        if ADDON.getSetting('logos.keep') == 'false':
+                    if use_thelogodb or (not logo and SETTINGS.getSetting('thelogodb') == "1"):
+                        if SETTINGS.getSetting('logos.keep') == 'false':
                             logo = getLogo(title,False,False)
 
                     streamElement = elem.find("stream")
@@ -2405,7 +2904,7 @@ class XMLTVSource(Source):
                     elements_parsed += 1
                     if progress_callback and elements_parsed % 500 == 0:
                         percent = 100.0 / size * f.tell()
-                        if ADDON.getSetting('update.progress') == 'true':
+                        if SETTINGS.getSetting('update.progress') == 'true':
                             d.update(int(percent), message=channel)
                         if not progress_callback(percent):
                             raise SourceUpdateCanceledException()
@@ -2413,7 +2912,7 @@ class XMLTVSource(Source):
 
             root.clear()
         f.close()
-        if ADDON.getSetting('update.progress') == 'true':
+        if SETTINGS.getSetting('update.progress') == 'true':
             d.update(100, message="Done")
             d.close()
         f = xbmcvfs.File('special://profile/addon_data/script.tvguide.fullscreen/category_count.ini',"wb")
@@ -2447,8 +2946,8 @@ class TVGUKSource(Source):
         self.done = False
 
     def getDataFromExternal(self, date, ch_list, progress_callback=None):
-        if ADDON.getSetting('fixtures') == 'true':
-            fixtures = FixturesSource(ADDON)
+        if SETTINGS.getSetting('fixtures') == 'true':
+            fixtures = FixturesSource(SETTINGS)
             for v in chain(self.getDataFromExternal2(date, ch_list, progress_callback), fixtures.getDataFromExternal(date, ch_list, progress_callback)):
                 yield v
         else:
@@ -2464,7 +2963,9 @@ class TVGUKSource(Source):
         @param progress_callback:
         @return:
         """
-        if ADDON.getSetting('update.progress') == 'true':
+        import requests
+        import resources.lib.pytz as pytz
+        if SETTINGS.getSetting('update.progress') == 'true':
             d = xbmcgui.DialogProgressBG()
             d.create('TV Guide Fullscreen', "grabbing tvguide.co.uk listings")
         systemid = {
@@ -2478,13 +2979,13 @@ class TVGUKSource(Source):
             "Virgin L":"24",
             "Freesat":"19",
         }
-        id = systemid[ADDON.getSetting('tvguide.co.uk.systemid')]
+        id = systemid[SETTINGS.getSetting('tvguide.co.uk.systemid')]
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 6.1; Win64; x64; rv:58.0) Gecko/20100101 Firefox/58.0',
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
         "Accept-Language": "en-GB,en;q=0.5",
         "Accept-Encoding": "gzip, deflate"}
 
-        email = ADDON.getSetting('tvguide.co.uk.email')
+        email = SETTINGS.getSetting('tvguide.co.uk.email')
         s = requests.Session()
         if email:
             r = s.post('http://www.tvguide.co.uk/mychannels.asp',
@@ -2580,9 +3081,9 @@ class TVGUKSource(Source):
                     yield program
             count = count + 1
             percent = 100.0 * float(total) / float(count)
-            if ADDON.getSetting('update.progress') == 'true':
+            if SETTINGS.getSetting('update.progress') == 'true':
                 d.update(int(percent), message=name)
-        if ADDON.getSetting('update.progress') == 'true':
+        if SETTINGS.getSetting('update.progress') == 'true':
             d.update(100, message="Done")
             d.close()
 
@@ -2607,6 +3108,8 @@ class TVGUKSource(Source):
             return -time.timezone
 
     def local_time(self,ttime,year,month,day):
+        import resources.lib.pytz as pytz
+        from resources.lib.pytz import timezone
         match = re.search(r'(.{1,2}):(.{2})(.{2})',ttime)
         if match:
             hour = int(match.group(1))
@@ -2636,6 +3139,7 @@ class YoSource(Source):
         self.channelsLastUpdated = None
 
     def get_url(self,url):
+        import requests
         headers = {'user-agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 9_1 like Mac OS X) AppleWebKit/601.1.46 (KHTML, like Gecko) Version/9.0 Mobile/13B143 Safari/601.1'}
         try:
             r = requests.get(url,headers=headers)
@@ -2652,6 +3156,7 @@ class YoSource(Source):
         @param progress_callback:
         @return:
         """
+        import requests
 
         if ch_list:
             visible_channels = [c.id for c in ch_list]
@@ -2674,7 +3179,7 @@ class YoSource(Source):
 
             s = requests.Session()
             headers = {'user-agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 9_1 like Mac OS X) AppleWebKit/601.1.46 (KHTML, like Gecko) Version/9.0 Mobile/13B143 Safari/601.1'}
-            headend = ADDON.getSetting("yo.%s.headend" % country_id)
+            headend = SETTINGS.getSetting("yo.%s.headend" % country_id)
             if headend:
                 r = s.get('http://%s.yo.tv/settings/headend/%s' % (country_id,headend),verify=False,stream=True,headers=headers)
             r = s.get('http://%s.yo.tv/' % country_id,verify=False,stream=True,headers=headers)
@@ -2802,7 +3307,7 @@ class YoSource(Source):
             return True
 
         update = False
-        interval = int(ADDON.getSetting('xmltv.interval'))
+        interval = int(SETTINGS.getSetting('xmltv.interval'))
         if interval == FileFetcher.INTERVAL_ALWAYS and self.start == True:
             self.start = False
             return True
@@ -2854,6 +3359,7 @@ class YoNowSource(Source):
 
     def get_url(self,url):
         #headers = {'user-agent': 'Mozilla/5.0 (BB10; Touch) AppleWebKit/537.10+ (KHTML, like Gecko) Version/10.0.9.2372 Mobile Safari/537.10+'}
+        import requests
         headers = {'user-agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 9_1 like Mac OS X) AppleWebKit/601.1.46 (KHTML, like Gecko) Version/9.0 Mobile/13B143 Safari/601.1'}
         try:
             r = requests.get(url,headers=headers)
@@ -2863,8 +3369,8 @@ class YoNowSource(Source):
             return ''
 
     def getDataFromExternal(self, date, ch_list, progress_callback=None):
-        if ADDON.getSetting('fixtures') == 'true':
-            fixtures = FixturesSource(ADDON)
+        if SETTINGS.getSetting('fixtures') == 'true':
+            fixtures = FixturesSource(SETTINGS)
             for v in chain(self.getDataFromExternal2(date, ch_list, progress_callback), fixtures.getDataFromExternal(date, ch_list, progress_callback)):
                 yield v
         else:
@@ -2880,6 +3386,7 @@ class YoNowSource(Source):
         @param progress_callback:
         @return:
         """
+        import requests
 
         filename = 'special://profile/addon_data/script.tvguide.fullscreen/yo.json'
         providers = {}
@@ -2890,13 +3397,13 @@ class YoNowSource(Source):
         except:
             pass
 
-        #country_ids = ADDON.getSetting("yo.countries").split(',')
+        #country_ids = SETTINGS.getSetting("yo.countries").split(',')
         for key in providers:
             (name,provider,country,headend) = providers[key]
             #html = self.get_url('http://%s.yo.tv/' % country_id)
             s = requests.Session()
             headers = {'user-agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 9_1 like Mac OS X) AppleWebKit/601.1.46 (KHTML, like Gecko) Version/9.0 Mobile/13B143 Safari/601.1'}
-            #headend = ADDON.getSetting("yo.%s.headend" % country)
+            #headend = SETTINGS.getSetting("yo.%s.headend" % country)
             if headend:
                 r = s.get('http://%s.yo.tv/settings/headend/%s' % (country,headend),verify=False,stream=True,headers=headers)
             r = s.get('http://%s.yo.tv/' % country,verify=False,stream=True,headers=headers)
@@ -2973,6 +3480,8 @@ class YoNowSource(Source):
         return False
 
     def local_time(self,ttime,year,month,day):
+        from dateutil import tz
+        from resources.lib.pytz import timezone
         match = re.search(r'(.{1,2}):(.{2}) ?(.{2})',ttime)
         if match:
             hour = int(match.group(1))
@@ -3047,7 +3556,7 @@ class DirectScheduleSource(Source):
         if self.force:
             return True
         update = False
-        interval = int(ADDON.getSetting('sd.interval'))
+        interval = int(SETTINGS.getSetting('sd.interval'))
         if interval == FileFetcher.INTERVAL_ALWAYS and self.start == True:
             self.start = False
             return True
@@ -3065,6 +3574,7 @@ class DirectScheduleSource(Source):
         return self.updateSchedules(ch_list, progress_callback)
 
     def updateSchedules(self, ch_list, progress_callback):
+        from sdAPI import SdAPI
         sd = SdAPI()
 
         station_ids = []
@@ -3123,6 +3633,7 @@ class BBCSource(Source):
 
     def get_url(self,url):
         #headers = {'user-agent': 'Mozilla/5.0 (BB10; Touch) AppleWebKit/537.10+ (KHTML, like Gecko) Version/10.0.9.2372 Mobile Safari/537.10+'}
+        import requests
         headers = {'user-agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 9_1 like Mac OS X) AppleWebKit/601.1.46 (KHTML, like Gecko) Version/9.0 Mobile/13B143 Safari/601.1'}
         try:
             r = requests.get(url,headers=headers)
@@ -3140,6 +3651,7 @@ class BBCSource(Source):
         @param progress_callback:
         @return:
         """
+        import requests
         channels = [
         ("BBC One", "http://www.bbc.co.uk/bbcone/programmes/schedules/hd/this_week.xml"),
         ("BBC Two", "http://www.bbc.co.uk/bbctwo/programmes/schedules/hd/this_week.xml"),
@@ -3162,11 +3674,11 @@ class BBCSource(Source):
         ("BBC Radio 6 Music", "http://www.bbc.co.uk/6music/programmes/schedules/this_week.xml"),
         ("BBC Radio Asian Network", "http://www.bbc.co.uk/asiannetwork/programmes/schedules/this_week.xml"),
         ]
-        self.logoSource = int(ADDON.getSetting('logos.source'))
+        self.logoSource = int(SETTINGS.getSetting('logos.source'))
         if self.logoSource == XMLTVSource.LOGO_SOURCE_FOLDER:
-            self.logoFolder = ADDON.getSetting('logos.folder')
+            self.logoFolder = SETTINGS.getSetting('logos.folder')
         elif self.logoSource == XMLTVSource.LOGO_SOURCE_URL:
-            self.logoFolder = ADDON.getSetting('logos.url')
+            self.logoFolder = SETTINGS.getSetting('logos.url')
         else:
             self.logoFolder = ""
         if self.logoSource == XMLTVSource.LOGO_SOURCE_FOLDER:
@@ -3266,7 +3778,7 @@ class BBCSource(Source):
             return True
 
         update = False
-        interval = int(ADDON.getSetting('xmltv.interval'))
+        interval = int(SETTINGS.getSetting('xmltv.interval'))
         if interval == FileFetcher.INTERVAL_ALWAYS and self.start == True:
             self.start = False
             return True
@@ -3316,15 +3828,17 @@ class FixturesSource(Source):
         @param progress_callback:
         @return:
         """
+        import requests
+        from bs4 import BeautifulSoup
 
         for day in ["today","tomorrow"]:
 
-            country = ADDON.getSetting('fixtures.country')
+            country = SETTINGS.getSetting('fixtures.country')
             url = 'http://www.getyourfixtures.com/%s/live/%s/anySport' % (country,day)
 
             parsed_uri = urlparse(url)
             domain = '{uri.scheme}://{uri.netloc}'.format(uri=parsed_uri)
-            timezone = ADDON.getSetting('fixtures.timezone')
+            timezone = SETTINGS.getSetting('fixtures.timezone')
             if timezone != "None":
                 s = requests.Session()
                 #r = s.get("http://www.getyourfixtures.com/setCookie.php?offset=%s" % timezone)
@@ -3419,6 +3933,8 @@ class FixturesSource(Source):
             return -time.timezone
 
     def local_time(self,ttime,year,month,day):
+        import resources.lib.pytz as pytz
+        from resources.lib.pytz import timezone
         match = re.search(r'(.{1,2}):(.{2})(.{2})',ttime)
         if match:
             hour = int(match.group(1))
@@ -3437,24 +3953,141 @@ class FixturesSource(Source):
             return utc_dt + datetime.timedelta(seconds=-time.timezone)
         return
 
+class GuideServerSource(Source):
+    """
+    The guide built by guideserver.py on another machine of the LAN. The
+    snapshot it publishes is downloaded when it changed and imported as it
+    is, nothing is fetched or parsed here.
+    """
+    KEY = 'guideserver'
+    PLUGIN_DATA = XMLTVSource.PLUGIN_DATA
+    SNAPSHOT = 'guideserver.db'
+
+    def __init__(self, addon):
+        self.needReset = False
+        self.url = addon.getSetting('guideserver.url').strip().rstrip('/')
+        if not self.url:
+            raise SourceNotConfiguredException()
+        if '://' not in self.url:
+            self.url = 'http://' + self.url
+        if not os.path.exists(GuideServerSource.PLUGIN_DATA):
+            os.makedirs(GuideServerSource.PLUGIN_DATA)
+        self.snapshotFile = os.path.join(GuideServerSource.PLUGIN_DATA, GuideServerSource.SNAPSHOT)
+        self.digestFile = self.snapshotFile + '.sha256'
+
+    def getServerInfo(self):
+        """
+        @return: dict with version, sha256 and size of the published snapshot,
+                 None if the server can not be reached
+        """
+        import requests
+        try:
+            r = requests.get(self.url + '/snapshot.json', timeout=10)
+            if r.status_code == requests.codes.ok:
+                return r.json()
+            xbmc.log('[script.tvguide.fullscreen] guide server %s: %s' % (self.url, r.status_code), xbmc.LOGERROR)
+        except (requests.exceptions.RequestException, ValueError) as detail:
+            xbmc.log('[script.tvguide.fullscreen] guide server %s: %s' % (self.url, detail), xbmc.LOGERROR)
+        return None
+
+    def getLocalDigest(self):
+        if not os.path.exists(self.snapshotFile):
+            return None
+        try:
+            with open(self.digestFile) as f:
+                return f.read().strip()
+        except IOError:
+            return None
+
+    def isUpdated(self, channelsLastUpdated, programsLastUpdated):
+        # channels_updated is reset to 0 by an import that failed or was cancelled
+        if channelsLastUpdated is None or channelsLastUpdated == datetime.datetime.fromtimestamp(0):
+            return True
+        info = self.getServerInfo()
+        return info is not None and info['sha256'] != self.getLocalDigest()
+
+    def fetchSnapshot(self):
+        """
+        Downloads the snapshot unless the one that is here is current.
+        """
+        import gzip
+        import hashlib
+        import shutil
+        import requests
+        headers = {}
+        digest = self.getLocalDigest()
+        if digest:
+            headers['If-None-Match'] = '"%s"' % digest
+        try:
+            r = requests.get(self.url + '/snapshot.db.gz', headers=headers, stream=True, timeout=30)
+            if r.status_code == 304:
+                return
+            if r.status_code != requests.codes.ok:
+                xbmc.log('[script.tvguide.fullscreen] guide server %s: %s' % (self.url, r.status_code), xbmc.LOGERROR)
+                return
+            compressed = self.snapshotFile + '.gz'
+            sha256 = hashlib.sha256()
+            with open(compressed, 'wb') as f:
+                for chunk in r.iter_content(64 * 1024):
+                    sha256.update(chunk)
+                    f.write(chunk)
+        except requests.exceptions.RequestException as detail:
+            xbmc.log('[script.tvguide.fullscreen] guide server %s: %s' % (self.url, detail), xbmc.LOGERROR)
+            return
+        etag = r.headers.get('ETag', '').strip('"')
+        if etag and etag != sha256.hexdigest():
+            xbmc.log('[script.tvguide.fullscreen] guide server %s: damaged snapshot' % self.url, xbmc.LOGERROR)
+            os.remove(compressed)
+            return
+        with gzip.open(compressed, 'rb') as source, open(self.snapshotFile + '.tmp', 'wb') as target:
+            shutil.copyfileobj(source, target)
+        os.remove(compressed)
+        os.replace(self.snapshotFile + '.tmp', self.snapshotFile)
+        with open(self.digestFile, 'w') as f:
+            f.write(sha256.hexdigest())
+
+    def getDataFromExternal(self, date, ch_list, progress_callback=None):
+        self.fetchSnapshot()
+        if not os.path.exists(self.snapshotFile):
+            return
+        conn = sqlite3.connect(self.snapshotFile)
+        try:
+            for id, title, logo, streamUrl, visible in conn.execute('SELECT id, title, logo, stream_url, visible FROM channels ORDER BY weight'):
+                yield Channel(id, title, '', logo, streamUrl, visible)
+
+            texts = dict(conn.execute('SELECT hash, text FROM texts'))
+            total = conn.execute('SELECT COUNT(*) FROM programs').fetchone()[0]
+            c = conn.execute('SELECT channel, title, sub_title, start_date, end_date, description_key, categories_key, image_large, '
+                             'image_small_key, season, episode, is_new, is_movie, language FROM programs')
+            for count, row in enumerate(c):
+                if progress_callback and count % 10000 == 0:
+                    if not progress_callback(100.0 * count / total):
+                        raise SourceUpdateCanceledException()
+                yield Program(row[0], row[1], row[2], row[3], row[4], texts.get(row[5]), texts.get(row[6]), row[7], texts.get(row[8]),
+                              season=row[9], episode=row[10], is_new=row[11], is_movie=row[12], language=row[13])
+        finally:
+            conn.close()
+
 
 def instantiateSource(force):
-    source_arg = ADDON.getSetting("source")
+    source_arg = SETTINGS.getSetting("source")
     if source_arg:
         source = source_arg
     else:
-        source = ADDON.getSetting("source.source")
+        source = SETTINGS.getSetting("source.source")
     if source == "xmltv":
-        return XMLTVSource(ADDON,force)
+        return XMLTVSource(SETTINGS,force)
     elif source == "tvguide.co.uk":
-        return TVGUKSource(ADDON)
+        return TVGUKSource(SETTINGS)
     elif source == "yo.tv":
-        return YoSource(ADDON)
+        return YoSource(SETTINGS)
     elif source == "yo.tv Now":
-        return YoNowSource(ADDON)
+        return YoNowSource(SETTINGS)
     elif source == "bbc":
-        return BBCSource(ADDON)
+        return BBCSource(SETTINGS)
     elif source == "fixtures":
-        return FixturesSource(ADDON)
+        return FixturesSource(SETTINGS)
+    elif source == "Guide Server":
+        return GuideServerSource(SETTINGS)
     else:
-        return DirectScheduleSource(ADDON,force)
+        return DirectScheduleSource(SETTINGS,force)
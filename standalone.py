@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+#
+#      Copyright (C) 2026 derandere
+#      Python 3 update by derandere
+#      moddet by derandere
+#
+#  This Program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This Program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this Program; see the file LICENSE.txt.  If not, write to
+#  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
+#  http://www.gnu.org/copyleft/gpl.html
+#
+"""
+The Kodi modules the guide import uses, for running it in a Python process
+of its own (see builder.py).
+
+install() registers xbmc, xbmcgui, xbmcvfs and xbmcaddon. special:// paths
+resolve into the Kodi directories given, the addon settings are read from
+the settings.xml Kodi keeps for the addon, with the defaults of
+resources/settings.xml for the rest. Dialogs do nothing and settings are
+never written back, Kodi owns them.
+"""
+import glob
+import os
+import shutil
+import sys
+import time
+import types
+from xml.etree import ElementTree
+
+ADDON_ID = 'script.tvguide.fullscreen.reborn'
+ADDON_PATH = os.path.dirname(os.path.abspath(__file__))
+
+LOGDEBUG, LOGINFO, LOGWARNING, LOGERROR, LOGFATAL, LOGNONE = 0, 1, 2, 3, 4, 5
+
+
+class KodiPaths(object):
+
+    def __init__(self, userdata, home):
+        self.roots = {
+            'profile': userdata,
+            'masterprofile': userdata,
+            'userdata': userdata,
+            'home': home,
+            'xbmc': home,
+            'temp': os.path.join(home, 'temp'),
+            'logpath': os.path.join(home, 'temp'),
+        }
+
+    def translate(self, path):
+        path = str(path)
+        if not path.startswith('special://'):
+            return path
+        root, _, rest = path[len('special://'):].partition('/')
+        translated = os.path.join(self.roots.get(root, self.roots['home']), *rest.split('/'))
+        return translated + os.sep if path.endswith('/') and not translated.endswith(os.sep) else translated
+
+
+def readSettings(userdata):
+    """
+    @return: dict of the addon settings, defaults first
+    """
+    settings = {}
+    for setting in ElementTree.parse(os.path.join(ADDON_PATH, 'resources', 'settings.xml')).iter('setting'):
+        if 'id' in setting.attrib:
+            settings[setting.attrib['id']] = setting.attrib.get('default', '')
+    path = os.path.join(userdata, 'addon_data', ADDON_ID, 'settings.xml')
+    if os.path.exists(path):
+        for setting in ElementTree.parse(path).iter('setting'):
+            if 'id' not in setting.attrib:
+                continue
+            # version 2 keeps the value as text, version 1 in a value attribute
+            value = setting.attrib.get('value', setting.text)
+            settings[setting.attrib['id']] = value or ''
+    return settings
+
+
+def readStrings():
+    strings = {}
+    path = os.path.join(ADDON_PATH, 'resources', 'language', 'English', 'strings.po')
+    if not os.path.exists(path):
+        return strings
+    id = None
+    with open(path, encoding='utf8') as f:
+        for line in f:
+            if line.startswith('msgctxt "#'):
+                id = int(line[len('msgctxt "#'):].split('"')[0])
+            elif line.startswith('msgid "') and id is not None:
+                strings[id] = line[len('msgid "'):].rstrip().rstrip('"')
+                id = None
+    return strings
+
+
+def install(userdata, home, verbose=False):
+    """
+    @param userdata: the Kodi userdata directory, special://profile
+    @param home: the Kodi home directory, special://home
+    """
+    paths = KodiPaths(userdata, home)
+    # script.module.* addons, e.g. requests
+    for lib in sorted(glob.glob(os.path.join(home, 'addons', 'script.module.*', 'lib'))):
+        sys.path.append(lib)
+    if ADDON_PATH not in sys.path:
+        sys.path.insert(0, ADDON_PATH)
+    sys.modules['xbmc'] = _xbmc(paths, LOGDEBUG if verbose else LOGWARNING)
+    sys.modules['xbmcgui'] = _xbmcgui()
+    sys.modules['xbmcvfs'] = _xbmcvfs(paths)
+    sys.modules['xbmcaddon'] = _xbmcaddon(readSettings(userdata), readStrings())
+    return paths
+
+
+def _xbmc(paths, threshold):
+    xbmc = types.ModuleType('xbmc')
+    xbmc.LOGDEBUG, xbmc.LOGINFO, xbmc.LOGWARNING, xbmc.LOGERROR, xbmc.LOGFATAL, xbmc.LOGNONE = (
+        LOGDEBUG, LOGINFO, LOGWARNING, LOGERROR, LOGFATAL, LOGNONE)
+    xbmc.LOGNOTICE = LOGINFO
+    xbmc.abortRequested = False
+
+    def log(msg, level=LOGDEBUG):
+        if level >= threshold:
+            sys.stderr.write('%s\n' % msg)
+
+    class Monitor(object):
+        def abortRequested(self):
+            return False
+
+        def waitForAbort(self, timeout=0):
+            time.sleep(timeout or 0)
+            return False
+
+    class Player(object):
+        def isPlaying(self):
+            return False
+
+    xbmc.log = log
+    xbmc.translatePath = paths.translate
+    xbmc.executebuiltin = lambda *args: None
+    xbmc.getCondVisibility = lambda condition: False
+    xbmc.getInfoLabel = lambda label: ''
+    xbmc.sleep = lambda ms: time.sleep(ms / 1000.0)
+    xbmc.Monitor = Monitor
+    xbmc.Player = Player
+    return xbmc
+
+
+def _xbmcgui():
+    xbmcgui = types.ModuleType('xbmcgui')
+    xbmcgui.NOTIFICATION_INFO, xbmcgui.NOTIFICATION_WARNING, xbmcgui.NOTIFICATION_ERROR = 'info', 'warning', 'error'
+
+    class Dialog(object):
+        def notification(self, *args, **kwargs):
+            pass
+
+        def ok(self, *args, **kwargs):
+            return True
+
+        def yesno(self, *args, **kwargs):
+            return False
+
+        def select(self, *args, **kwargs):
+            return -1
+
+    class DialogProgress(object):
+        def create(self, *args, **kwargs):
+            pass
+
+        def update(self, *args, **kwargs):
+            pass
+
+        def close(self):
+            pass
+
+        def iscanceled(self):
+            return False
+
+        def isFinished(self):
+            return False
+
+    xbmcgui.Dialog = Dialog
+    xbmcgui.DialogProgress = DialogProgress
+    xbmcgui.DialogProgressBG = DialogProgress
+    return xbmcgui
+
+
+def _xbmcvfs(paths):
+    xbmcvfs = types.ModuleType('xbmcvfs')
+    translate = paths.translate
+
+    class File(object):
+        def __init__(self, path, mode='r'):
+            self.path = translate(path)
+            self.handle = None
+            try:
+                if 'w' in mode:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    self.handle = open(self.path, 'wb')
+                else:
+                    self.handle = open(self.path, 'rb')
+            except IOError:
+                pass
+
+        def read(self, count=-1):
+            if self.handle is None:
+                return b''
+            return self.handle.read(count)
+
+        readBytes = read
+
+        def write(self, data):
+            if self.handle is None:
+                return False
+            self.handle.write(data.encode('utf8') if isinstance(data, str) else data)
+            return True
+
+        def seek(self, offset, whence=0):
+            return self.handle.seek(offset, whence) if self.handle is not None else 0
+
+        def tell(self):
+            return self.handle.tell() if self.handle is not None else 0
+
+        def size(self):
+            return os.path.getsize(self.path) if self.handle is not None else 0
+
+        def close(self):
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
+
+        def __bool__(self):
+            return self.handle is not None
+
+    class Stat(object):
+        def __init__(self, path):
+            self.stat = os.stat(translate(path))
+
+        def st_mtime(self):
+            return self.stat.st_mtime
+
+        def st_size(self):
+            return self.stat.st_size
+
+    def delete(path):
+        try:
+            os.remove(translate(path))
+            return True
+        except OSError:
+            return False
+
+    def copy(source, destination):
+        try:
+            shutil.copyfile(translate(source), translate(destination))
+            return True
+        except IOError:
+            return False
+
+    def mkdirs(path):
+        os.makedirs(translate(path), exist_ok=True)
+        return True
+
+    def rmdir(path):
+        try:
+            os.rmdir(translate(path))
+            return True
+        except OSError:
+            return False
+
+    def rename(source, destination):
+        try:
+            os.replace(translate(source), translate(destination))
+            return True
+        except OSError:
+            return False
+
+    def listdir(path):
+        path = translate(path)
+        if not os.path.isdir(path):
+            return [], []
+        names = os.listdir(path)
+        return ([n for n in names if os.path.isdir(os.path.join(path, n))],
+                [n for n in names if not os.path.isdir(os.path.join(path, n))])
+
+    xbmcvfs.File = File
+    xbmcvfs.Stat = Stat
+    xbmcvfs.exists = lambda path: os.path.exists(translate(path))
+    xbmcvfs.delete = delete
+    xbmcvfs.copy = copy
+    xbmcvfs.mkdir = mkdirs
+    xbmcvfs.mkdirs = mkdirs
+    xbmcvfs.rmdir = rmdir
+    xbmcvfs.rename = rename
+    xbmcvfs.listdir = listdir
+    xbmcvfs.translatePath = translate
+    return xbmcvfs
+
+
+def _xbmcaddon(settings, strings):
+    xbmcaddon = types.ModuleType('xbmcaddon')
+    info = {
+        'id': ADDON_ID,
+        'name': 'TV Guide Fullscreen',
+        'path': ADDON_PATH,
+        'profile': 'special://profile/addon_data/%s/' % ADDON_ID,
+        'icon': os.path.join(ADDON_PATH, 'icon.png'),
+        'version': '',
+    }
+
+    class Addon(object):
+        def __init__(self, id=None):
+            self.id = id or ADDON_ID
+
+        def getSetting(self, key):
+            return settings.get(key, '')
+
+        def getSettingBool(self, key):
+            return settings.get(key, '') == 'true'
+
+        def getSettingInt(self, key):
+            try:
+                return int(settings.get(key, ''))
+            except ValueError:
+                return 0
+
+        def setSetting(self, key, value):
+            # for this process only, Kodi owns settings.xml
+            settings[key] = value
+
+        def getAddonInfo(self, key):
+            return info.get(key, '')
+
+        def getLocalizedString(self, id):
+            return strings.get(id, '')
+
+    xbmcaddon.Addon = Addon
+    return xbmcaddon
@@ -19,63 +19,183 @@
 #  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
 #  http://www.gnu.org/copyleft/gpl.html
 #
-import xbmc,xbmcvfs
+import xbmc
 from xml.etree import ElementTree
-import configparser
+import bisect
 import os
 import re
 import xbmcaddon
+from inistore import IniStore
+
+
+NUMBER_WORDS = ["one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten"]
+
+
+def normalizeTitle(title):
+    title = re.sub(r' ', '', title.lower())
+    title = re.sub(re.compile(r'hd$', flags=re.I), '', title)
+    title = re.sub(re.compile(r'london$', flags=re.I), '', title)
+    title = re.sub(re.compile(r'england$', flags=re.I), '', title)
+    return title
+
+
+def numberWordVariants(label):
+    """
+    Spellings of label with number words turned into digits and back,
+    e.g. "BBC One" -> "bbc1". Spaces are removed like in normalizeTitle.
+    """
+    label = label.lower()
+    variants = set()
+    for num in range(1, 11):
+        word = NUMBER_WORDS[num - 1]
+        variants.add(label.replace(word, str(num)).replace(' ', ''))
+        variants.add(label.replace(str(num), word).replace(' ', ''))
+    return variants
+
+
+class StreamIndex(object):
+    """
+    Lookup tables over all streams of installed addons in addons.ini.
+
+    Exact matches are a dict lookup. Substring matches search one joined
+    string of all normalized labels and map hits back through the label
+    offsets, so a channel costs a few str.find calls instead of a regex per
+    label.
+    """
+    SEPARATOR = '\n'
+
+    def __init__(self, entries):
+        """
+        @param entries: (id, label, stream) of installed addons
+        """
+        self.entries = entries
+        self.exact = {}
+        self.byAddon = {}
+        for entry in entries:
+            self.exact.setdefault(entry[1].lower(), []).append(entry)
+            self.byAddon.setdefault(entry[0], []).append(entry)
+        self.labels = self._buildText([(entry, entry[1].lower().replace(' ', '')) for entry in entries])
+        variants = []
+        for entry in entries:
+            labelx = entry[1].lower().replace(' ', '')
+            for variant in numberWordVariants(entry[1]):
+                if variant != labelx:
+                    variants.append((entry, variant))
+        self.variants = self._buildText(variants)
+
+    def _buildText(self, items):
+        offsets = []
+        owners = []
+        parts = []
+        position = 0
+        for entry, text in items:
+            offsets.append(position)
+            owners.append(entry)
+            parts.append(text)
+            position += len(text) + 1
+        return (StreamIndex.SEPARATOR.join(parts), offsets, owners)
+
+    def _search(self, table, title):
+        text, offsets, owners = table
+        if not title:
+            return set(owners)
+        if StreamIndex.SEPARATOR in title:
+            return set()
+        found = set()
+        position = text.find(title)
+        while position >= 0:
+            index = bisect.bisect_right(offsets, position) - 1
+            found.add(owners[index])
+            # continue after the end of this label
+            if index + 1 < len(offsets):
+                position = text.find(title, offsets[index + 1])
+            else:
+                break
+        return found
+
+    def exactMatches(self, title):
+        return set(self.exact.get(title.lower(), []))
+
+    def subMatches(self, title):
+        return self._search(self.labels, normalizeTitle(title))
+
+    def numwordMatches(self, title):
+        return self._search(self.variants, normalizeTitle(title))
 
 
 class StreamsService(object):
     def __init__(self, addon):
         self.addon = addon
-        self.path = xbmc.translatePath(os.path.join('special://profile', 'addon_data', 'script.tvguide.fullscreen', 'addons.ini'))
-        self.addonsParser = configparser.ConfigParser(dict_type=OrderedDict)
-        self.addonsParser.optionxform = lambda option: option
-        try:
-            self.addonsParser.read(self.path)
-        except:
-            print('unable to parse addons.ini')
+        self.store = IniStore()
+        self.installed = {}
+        self.index = None
+        self.indexVersion = None
+        self.favourites = None
+        self.favouritesMtime = None
 
     def loadFavourites(self):
-        entries = list()
         path = xbmc.translatePath(os.path.join('special://profile', 'favourites.xml'))
-        if os.path.exists(path):
-            f = open(path)
-            xml = f.read()
-            f.close()
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return list()
+        if self.favourites is not None and mtime == self.favouritesMtime:
+            return self.favourites
 
-            try:
-                doc = ElementTree.fromstring(xml)
-                for node in doc.findall('favourite'):
-                    value = node.text
-                    if value[0:11] == 'PlayMedia("':
-                        value = value[11:-2]
-                    elif value[0:10] == 'PlayMedia(':
-                        value = value[10:-1]
-                    #elif value[0:22] == 'ActivateWindow(10025,"':
-                    #    value = value[22:-9]
-                    #elif value[0:21] == 'ActivateWindow(10025,':
-                    #    value = value[22:-8]
-                    #else:
-                    #    continue
-
-                    entries.append((node.get('name'), value))
-            except:
-                pass
+        entries = list()
+        f = open(path)
+        xml = f.read()
+        f.close()
 
+        try:
+            doc = ElementTree.fromstring(xml)
+            for node in doc.findall('favourite'):
+                value = node.text
+                if value[0:11] == 'PlayMedia("':
+                    value = value[11:-2]
+                elif value[0:10] == 'PlayMedia(':
+                    value = value[10:-1]
+                #elif value[0:22] == 'ActivateWindow(10025,"':
+                #    value = value[22:-9]
+                #elif value[0:21] == 'ActivateWindow(10025,':
+                #    value = value[22:-8]
+                #else:
+                #    continue
+
+                entries.append((node.get('name'), value))
+        except:
+            pass
+
+        self.favourites = entries
+        self.favouritesMtime = mtime
         return entries
 
     def getAddons(self):
-        return self.addonsParser.sections()
+        return self.store.getSections()
 
     def getAddonStreams(self, id):
-        return self.addonsParser.items(id)
+        return self.store.getStreams(id)
 
     def setAddonStream(self, section, id, stream):
-        self.addonsParser.set(section, id, stream)
-        self.addonsParser.write(xbmcvfs.File(self.path,"wb"))
+        self.store.setStream(section, id, stream)
+
+    def isInstalled(self, id):
+        if id not in self.installed:
+            try:
+                xbmcaddon.Addon(id)
+                self.installed[id] = True
+            except Exception:
+                self.installed[id] = False
+        return self.installed[id]
+
+    def getIndex(self):
+        version = self.store.getAddonsVersion()
+        if self.index is None or self.indexVersion != version:
+            self.indexVersion = version
+            # ignore addons that are not installed
+            entries = [entry for entry in self.store.getAllStreams() if self.isInstalled(entry[0])]
+            self.index = StreamIndex(entries)
+        return self.index
 
     def detectStream(self, channel, try_favourites=True):
         """
@@ -93,302 +213,39 @@ class StreamsService(object):
 
         # Second check all addons and return all matches
         matches = []
-        exact_matches = []
-        sub_matches = []
-        numword_matches = []
         if self.addon.getSetting('catchup.type') == "0":
             catchup = self.addon.getSetting('catchup.text')
         else:
             catchup = self.addon.getSetting('catchup.direct')
-        for id in self.getAddons():
-            try:
-                xbmcaddon.Addon(id)
-            except Exception:
-                continue # ignore addons that are not installed
-
-            for (label, stream) in self.getAddonStreams(id):
-                if type(stream) is list:
-                    stream = stream[0]
-                if id == "plugin.video.%s" % catchup.lower():
-                    label = channel.title
-                    stream = str(stream.replace("<channel>", channel.title.replace(" ","%20")))
-
-                if label.lower() == channel.title.lower(): #TODO unicode
-                    exact_matches.append((id, label, stream))
-                if int(self.addon.getSetting('addon.match')) > 0:
-                    labelx = re.sub(r' ','',label.lower())
-                    title = re.sub(r' ','',channel.title.lower())
-                    title = re.sub(re.compile(r'hd$',flags=re.I),'',title)
-                    title = re.sub(re.compile(r'london$',flags=re.I),'',title)
-                    title = re.sub(re.compile(r'england$',flags=re.I),'',title)
-                    titleRe = r".*%s.*" % re.escape(title)
-                    if re.match(titleRe,labelx):
-                        sub_matches.append((id, label, stream))
-                if int(self.addon.getSetting('addon.match')) > 1:
-                    title = re.sub(r' ','',channel.title.lower())
-                    title = re.sub(re.compile(r'hd$',flags=re.I),'',title)
-                    title = re.sub(re.compile(r'london$',flags=re.I),'',title)
-                    title = re.sub(re.compile(r'england$',flags=re.I),'',title)
-                    titleRe = r".*%s.*" % re.escape(title)
-                    numbers = ["one", "two", "three", "four", "five", "six", "seven", "eight", "nine" , "ten"]
-                    for num in range(1,11):
-                        word = numbers[num-1]
-                        labelnum = re.sub(word,str(num),label.lower())
-                        labelnum = re.sub(r' ','',labelnum)
-                        if re.match(titleRe,labelnum):
-                            numword_matches.append((id, label, stream))
-                    for num in range(1,11):
-                        word = numbers[num-1]
-                        labelnum = re.sub(str(num),word,label.lower())
-                        labelnum = re.sub(r' ','',labelnum)
-                        if re.match(titleRe,labelnum):
-                            numword_matches.append((id, label, stream))
-
-        exact_matches = set(exact_matches)
+        catchup_id = "plugin.video.%s" % catchup.lower()
+        match_level = int(self.addon.getSetting('addon.match'))
+        index = self.getIndex()
+
+        def notCatchup(matches):
+            return set(m for m in matches if m[0] != catchup_id)
+
+        # the catchup addon takes a channel placeholder, so all its streams match
+        exact_matches = notCatchup(index.exactMatches(channel.title))
+        for (id, label, stream) in index.byAddon.get(catchup_id, []):
+            exact_matches.add((id, channel.title, str(stream.replace("<channel>", channel.title.replace(" ","%20")))))
+        sub_matches = set()
+        numword_matches = set()
+        if match_level > 0:
+            sub_matches = notCatchup(index.subMatches(channel.title))
+        if match_level > 1:
+            numword_matches = notCatchup(index.numwordMatches(channel.title))
+
         sorted_exact_matches = sorted(exact_matches, key=lambda match: match[1])
-        sub_matches = set(sub_matches) - set(exact_matches)
+        sub_matches = sub_matches - exact_matches
         sorted_sub_matches = sorted(sub_matches, key=lambda match: match[1])
-        numword_matches = set(numword_matches) - set(sub_matches) - exact_matches
+        numword_matches = numword_matches - sub_matches - exact_matches
         sorted_numword_matches = sorted(numword_matches, key=lambda match: match[1])
         matches = sorted_exact_matches
-        if int(self.addon.getSetting('addon.match')) > 0:
+        if match_level > 0:
             matches = matches + sorted_sub_matches
-        if int(self.addon.getSetting('addon.match')) > 1:
+        if match_level > 1:
             matches = matches + sorted_numword_matches
         if len(matches) == 1:
             return matches[0][2]
         else:
             return matches
-
-
-class OrderedDict(dict):
-    # From: http://code.activestate.com/recipes/576693/
-    'Dictionary that remembers insertion order'
-    # An inherited dict maps keys to values.
-    # The inherited dict provides __getitem__, __len__, __contains__, and get.
-    # The remaining methods are order-aware.
-    # Big-O running times for all methods are the same as for regular dictionaries.
-
-    # The internal self.__map dictionary maps keys to links in a doubly linked list.
-    # The circular doubly linked list starts and ends with a sentinel element.
-    # The sentinel element never gets deleted (this simplifies the algorithm).
-    # Each link is stored as a list of length three:  [PREV, NEXT, KEY].
-
-    def __init__(self, *args, **kwds):
-        '''Initialize an ordered dictionary.  Signature is the same as for
-        regular dictionaries, but keyword arguments are not recommended
-        because their insertion order is arbitrary.
-
-        '''
-        if len(args) > 1:
-            raise TypeError('expected at most 1 arguments, got %d' % len(args))
-        try:
-            self.__root
-        except AttributeError:
-            self.__root = root = []                     # sentinel node
-            root[:] = [root, root, None]
-            self.__map = {}
-        self.__update(*args, **kwds)
-
-    def __setitem__(self, key, value, dict_setitem=dict.__setitem__):
-        'od.__setitem__(i, y) <==> od[i]=y'
-        # Setting a new item creates a new link which goes at the end of the linked
-        # list, and the inherited dictionary is updated with the new key/value pair.
-        if key not in self:
-            root = self.__root
-            last = root[0]
-            last[1] = root[0] = self.__map[key] = [last, root, key]
-        dict_setitem(self, key, value)
-
-    def __delitem__(self, key, dict_delitem=dict.__delitem__):
-        'od.__delitem__(y) <==> del od[y]'
-        # Deleting an existing item uses self.__map to find the link which is
-        # then removed by updating the links in the predecessor and successor nodes.
-        dict_delitem(self, key)
-        link_prev, link_next, key = self.__map.pop(key)
-        link_prev[1] = link_next
-        link_next[0] = link_prev
-
-    def __iter__(self):
-        'od.__iter__() <==> iter(od)'
-        root = self.__root
-        curr = root[1]
-        while curr is not root:
-            yield curr[2]
-            curr = curr[1]
-
-    def __reversed__(self):
-        'od.__reversed__() <==> reversed(od)'
-        root = self.__root
-        curr = root[0]
-        while curr is not root:
-            yield curr[2]
-            curr = curr[0]
-
-    def clear(self):
-        'od.clear() -> None.  Remove all items from od.'
-        try:
-            for node in self.__map.values():
-                del node[:]
-            root = self.__root
-            root[:] = [root, root, None]
-            self.__map.clear()
-        except AttributeError:
-            pass
-        dict.clear(self)
-
-    def popitem(self, last=True):
-        '''od.popitem() -> (k, v), return and remove a (key, value) pair.
-        Pairs are returned in LIFO order if last is true or FIFO order if false.
-
-        '''
-        if not self:
-            raise KeyError('dictionary is empty')
-        root = self.__root
-        if last:
-            link = root[0]
-            link_prev = link[0]
-            link_prev[1] = root
-            root[0] = link_prev
-        else:
-            link = root[1]
-            link_next = link[1]
-            root[1] = link_next
-            link_next[0] = root
-        key = link[2]
-        del self.__map[key]
-        value = dict.pop(self, key)
-        return key, value
-
-    # -- the following methods do not depend on the internal structure --
-
-    def keys(self):
-        'od.keys() -> list of keys in od'
-        return list(self)
-
-    def values(self):
-        'od.values() -> list of values in od'
-        return [self[key] for key in self]
-
-    def items(self):
-        'od.items() -> list of (key, value) pairs in od'
-        return [(key, self[key]) for key in self]
-
-    def iterkeys(self):
-        'od.iterkeys() -> an iterator over the keys in od'
-        return iter(self)
-
-    def itervalues(self):
-        'od.itervalues -> an iterator over the values in od'
-        for k in self:
-            yield self[k]
-
-    def iteritems(self):
-        'od.iteritems -> an iterator over the (key, value) items in od'
-        for k in self:
-            yield (k, self[k])
-
-    def update(*args, **kwds):
-        '''od.update(E, **F) -> None.  Update od from dict/iterable E and F.
-
-        If E is a dict instance, does:           for k in E: od[k] = E[k]
-        If E has a .keys() method, does:         for k in E.keys(): od[k] = E[k]
-        Or if E is an iterable of items, does:   for k, v in E: od[k] = v
-        In either case, this is followed by:     for k, v in F.items(): od[k] = v
-
-        '''
-        if len(args) > 2:
-            raise TypeError('update() takes at most 2 positional '
-                            'arguments (%d given)' % (len(args),))
-        elif not args:
-            raise TypeError('update() takes at least 1 argument (0 given)')
-        self = args[0]
-        # Make progressively weaker assumptions about "other"
-        other = ()
-        if len(args) == 2:
-            other = args[1]
-        if isinstance(other, dict):
-            for key in other:
-                self[key] = other[key]
-        elif hasattr(other, 'keys'):
-            for key in list(other.keys()):
-                self[key] = other[key]
-        else:
-            for key, value in other:
-                self[key] = value
-        for key, value in list(kwds.items()):
-            self[key] = value
-
-    __update = update  # let subclasses override update without breaking __init__
-
-    __marker = object()
-
-    def pop(self, key, default=__marker):
-        '''od.pop(k[,d]) -> v, remove specified key and return the corresponding value.
-        If key is not found, d is returned if given, otherwise KeyError is raised.
-
-        '''
-        if key in self:
-            result = self[key]
-            del self[key]
-            return result
-        if default is self.__marker:
-            raise KeyError(key)
-        return default
-
-    def setdefault(self, key, default=None):
-        'od.setdefault(k[,d]) -> od.get(k,d), also set od[k]=d if k not in od'
-        if key in self:
-            return self[key]
-        self[key] = default
-        return default
-
-    def __repr__(self, _repr_running={}):
-        'od.__repr__() <==> repr(od)'
-        call_key = id(self), _get_ident()
-        if call_key in _repr_running:
-            return '...'
-        _repr_running[call_key] = 1
-        try:
-            if not self:
-                return '%s()' % (self.__class__.__name__,)
-            return '%s(%r)' % (self.__class__.__name__, list(self.items()))
-        finally:
-            del _repr_running[call_key]
-
-    def __reduce__(self):
-        'Return state information for pickling'
-        items = [[k, self[k]] for k in self]
-        inst_dict = vars(self).copy()
-        for k in vars(OrderedDict()):
-            inst_dict.pop(k, None)
-        if inst_dict:
-            return (self.__class__, (items,), inst_dict)
-        return self.__class__, (items,)
-
-    def copy(self):
-        'od.copy() -> a shallow copy of od'
-        return self.__class__(self)
-
-    @classmethod
-    def fromkeys(cls, iterable, value=None):
-        '''OD.fromkeys(S[, v]) -> New ordered dictionary with keys from S
-        and values equal to v (which defaults to None).
-
-        '''
-        d = cls()
-        for key in iterable:
-            d[key] = value
-        return d
-
-    def __eq__(self, other):
-        '''od.__eq__(y) <==> od==y.  Comparison to another OD is order-sensitive
-        while comparison to a regular mapping is order-insensitive.
-
-        '''
-        if isinstance(other, OrderedDict):
-            return len(self)==len(other) and list(self.items()) == list(other.items())
-        return dict.__eq__(self, other)
-
-    def __ne__(self, other):
-        return not self == other
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+#
+#      Copyright (C) 2026 derandere
+#      Python 3 update by derandere
+#      moddet by derandere
+#
+#  This Program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This Program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this Program; see the file LICENSE.txt.  If not, write to
+#  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
+#  http://www.gnu.org/copyleft/gpl.html
+#
+import hashlib
+
+# texts table: description, category and icon strings shared by many programmes
+# are stored once and referenced from program_rows by their content hash
+
+
+def textKey(text):
+    """
+    @return: signed 64 bit content hash of text, its key in the texts table,
+             None for None
+    """
+    if text is None:
+        return None
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'big', signed=True)
+
+
+class TextWriter(object):
+    """
+    Collects the texts an import references, each distinct text only once,
+    and writes them to the texts table in batches.
+    """
+    def __init__(self):
+        self.seen = set()
+        self.pending = []
+
+    def key(self, text):
+        key = textKey(text)
+        if key is not None and key not in self.seen:
+            self.seen.add(key)
+            self.pending.append((key, text))
+        return key
+
+    def flush(self, c):
+        if self.pending:
+            c.executemany('INSERT OR IGNORE INTO texts(hash, text) VALUES(?, ?)', self.pending)
+            self.pending = []
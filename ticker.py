@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+#
+#      Copyright (C) 2026 derandere
+#      Python 3 update by derandere
+#      moddet by derandere
+#
+#  This Program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This Program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this Program; see the file LICENSE.txt.  If not, write to
+#  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
+#  http://www.gnu.org/copyleft/gpl.html
+#
+import threading
+from collections import OrderedDict
+
+import xbmc
+
+
+def log(x):
+    xbmc.log(repr(x), xbmc.LOGERROR)
+
+
+class UiTicker(object):
+    """
+    One long-lived thread running the periodic GUI updates (timebars, OSD
+    progress) instead of a new threading.Timer per update every second.
+
+    Callbacks use changed() to skip calls into Kodi when the value they
+    would set is the one already shown.
+    """
+    INTERVAL = 1.0
+
+    def __init__(self, interval=INTERVAL):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.callbacks = OrderedDict()
+        self.shown = {}
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def register(self, name, callback):
+        with self.lock:
+            self.callbacks[name] = callback
+
+    def unregister(self, name):
+        with self.lock:
+            self.callbacks.pop(name, None)
+
+    def changed(self, key, value):
+        """
+        @return: True if value differs from the last value seen for key
+        """
+        with self.lock:
+            if key in self.shown and self.shown[key] == value:
+                return False
+            self.shown[key] = value
+            return True
+
+    def forget(self, key):
+        """
+        Make the next changed() for key report a change, e.g. after the
+        control was recreated.
+        """
+        with self.lock:
+            self.shown.pop(key, None)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='UiTicker')
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def _run(self):
+        monitor = xbmc.Monitor()
+        while not self.stopped.wait(self.interval):
+            if monitor.abortRequested():
+                break
+            with self.lock:
+                callbacks = list(self.callbacks.values())
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    log(e)
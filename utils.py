@@ -2,13 +2,14 @@
 #
 # utils.py – Python 3 cleaned drop-in version by Sarturn
 #
+import datetime
 import json
 import os
 import re
+import time
 from itertools import zip_longest
 from typing import Any, Iterable
 
-import requests
 import xbmc
 import xbmcgui
 import xbmcvfs
@@ -16,6 +17,7 @@ from xbmcvfs import translatePath
 import xml.etree.ElementTree as ET
 
 from strings import ADDON
+from settings import SETTINGS
 
 LOGO_TYPE_DEFAULT = 0
 LOGO_TYPE_CUSTOM = 1
@@ -42,6 +44,49 @@ class SourceNotConfiguredException(SourceException):
 # Models
 # ============================================================================
 
+def toEpoch(date):
+    """
+    Seconds since the epoch of a naive local datetime, as the programs table
+    stores start and end times.
+    """
+    return int(time.mktime(date.timetuple()))
+
+
+def fromEpoch(seconds):
+    return datetime.datetime.fromtimestamp(seconds)
+
+
+class ProgramTime:
+    """
+    Start or end time of a Program. Kept as it was given, a datetime or the
+    integer epoch read from the database, and converted on first access so
+    rows scanned for a listing only build the datetimes the GUI looks at.
+    """
+    def __init__(self, name, epoch=False):
+        self.name = '_' + name
+        self.epoch = epoch
+
+    def __get__(self, program, owner):
+        if program is None:
+            return self
+        date, seconds = getattr(program, self.name)
+        if self.epoch:
+            if seconds is None and date is not None:
+                seconds = toEpoch(date)
+                setattr(program, self.name, (date, seconds))
+            return seconds
+        if date is None and seconds is not None:
+            date = fromEpoch(seconds)
+            setattr(program, self.name, (date, seconds))
+        return date
+
+    def __set__(self, program, value):
+        if isinstance(value, int):
+            setattr(program, self.name, (None, value))
+        else:
+            setattr(program, self.name, (value, None))
+
+
 class Channel:
     def __init__(self, id, title, lineup, logo=None, streamUrl=None, visible=True, weight=-1):
         self.id = id
@@ -72,6 +117,11 @@ class Channel:
 
 
 class Program:
+    startDate = ProgramTime('start')
+    endDate = ProgramTime('end')
+    startEpoch = ProgramTime('start', epoch=True)
+    endEpoch = ProgramTime('end', epoch=True)
+
     def __init__(
         self,
         channel,
@@ -183,10 +233,10 @@ def save_setting(key, value, is_list=False):
                     if value not in cur_values:
                         cur_values.append(value)
                 item.attrib["value"] = json.dumps(cur_values)
-                ADDON.setSetting(key, json.dumps(cur_values))
+                SETTINGS.setSetting(key, json.dumps(cur_values))
             else:
                 item.attrib["value"] = str(value)
-                ADDON.setSetting(key, str(value))
+                SETTINGS.setSetting(key, str(value))
             updated = True
 
     if updated:
@@ -223,7 +273,7 @@ def generate_settings_file(target_path):
 
 
 def get_setting(key, is_list=False):
-    value = ADDON.getSetting(key)
+    value = SETTINGS.getSetting(key)
     if is_list:
         return _safe_json_load(value, [])
     return value
@@ -235,12 +285,12 @@ def get_setting(key, is_list=False):
 
 def get_logo(channel):
     logo = channel.logo
-    logo_type = int(ADDON.getSetting("logos.source"))
+    logo_type = int(SETTINGS.getSetting("logos.source"))
 
     if logo and logo_type == LOGO_TYPE_DEFAULT:
         return logo
 
-    logo_location = ADDON.getSetting("logos.folder")
+    logo_location = SETTINGS.getSetting("logos.folder")
 
     if not logo and logo_type == LOGO_TYPE_DEFAULT:
         logo = DEFAULT_LOGO_URL + "s" + str(channel.id) + "_h3_aa.png"
@@ -281,10 +331,10 @@ def autocrop_image(image, border=0):
     cropped_image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
     cropped_image.paste(image, (border, border))
 
-    logo_height = 450 // int(ADDON.getSetting("channels.per.page"))
+    logo_height = 450 // int(SETTINGS.getSetting("channels.per.page"))
     logo_height -= 2
 
-    if not ADDON.getSettingBool("program.channel.logo"):
+    if not SETTINGS.getBool("program.channel.logo"):
         cropped_image = cropped_image.resize(
             (int(logo_height * ratio), logo_height),
             Image.ANTIALIAS,
@@ -294,6 +344,7 @@ def autocrop_image(image, border=0):
 
 
 def getLogo(title, ask=False, force=True):
+    import requests
     infile = translatePath(
         "special://profile/addon_data/script.tvguide.fullscreen/logos/temp.png"
     )
@@ -376,10 +427,10 @@ def getLogo(title, ask=False, force=True):
                     if value not in cur_values:
                         cur_values.append(value)
                 item.attrib['value'] = json.dumps(cur_values)
-                ADDON.setSetting(key, cur_values)
+                SETTINGS.setSetting(key, cur_values)
             else:
                 item.attrib['value'] = value
-                ADDON.setSetting(key, value)
+                SETTINGS.setSetting(key, value)
             updated = True
     if updated:
         tree.write(file_path)
@@ -406,7 +457,7 @@ def generate_settings_file(target_path):
 
 
 def get_setting(key, is_list=False):
-    value = ADDON.getSetting(key)
+    value = SETTINGS.getSetting(key)
     if value and is_list:
         value = json.loads(value)
     elif is_list:
@@ -422,11 +473,11 @@ def grouper(n, iterable, fillvalue=None):
 #TODO this is wrong
 def get_logo(channel):
     logo = channel.logo
-    logo_type = int(ADDON.getSetting('logos.source'))
+    logo_type = int(SETTINGS.getSetting('logos.source'))
     if logo and logo_type == LOGO_TYPE_DEFAULT:
         return logo
 
-    logo_location = ADDON.getSetting('logos.folder')
+    logo_location = SETTINGS.getSetting('logos.folder')
     if not logo and logo_type == LOGO_TYPE_DEFAULT:
         logo = DEFAULT_LOGO_URL + 's' + channel.id + '_h3_aa.png'
     elif logo_type == LOGO_TYPE_CUSTOM and not logo.startswith(logo_location):
@@ -460,13 +511,14 @@ def autocrop_image(image, border = 0):
     cropped_image = Image.new("RGBA", (width, height), (0,0,0,0))
     cropped_image.paste(image, (border, border))
     #TODO find epg height
-    logo_height = 450 / int(ADDON.getSetting('channels.per.page'))
+    logo_height = 450 / int(SETTINGS.getSetting('channels.per.page'))
     logo_height = logo_height - 2
-    if ADDON.getSetting('program.channel.logo') == "false":
+    if SETTINGS.getSetting('program.channel.logo') == "false":
         cropped_image = cropped_image.resize((int(logo_height*ratio), logo_height),Image.ANTIALIAS)
     return cropped_image
 
 def getLogo(title,ask=False,force=True):
+    import requests
     infile = xbmc.translatePath("special://profile/addon_data/script.tvguide.fullscreen/logos/temp.png")
     outfile = xbmc.translatePath("special://profile/addon_data/script.tvguide.fullscreen/logos/%s.png" % title)
     if not force and xbmcvfs.exists(outfile):
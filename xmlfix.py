@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+#
+#      Copyright (C) 2026 derandere
+#      Python 3 update by derandere
+#      moddet by derandere
+#
+#  This Program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This Program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this Program; see the file LICENSE.txt.  If not, write to
+#  the Free Software Foundation, 675 Mass Ave, Cambridge, MA 02139, USA.
+#  http://www.gnu.org/copyleft/gpl.html
+#
+import html.entities
+import re
+
+CHUNK_SIZE = 64 * 1024
+
+# entity and character references, or an & that starts none
+REFERENCE_RE = re.compile(rb'&(?:(#[0-9]+|#[xX][0-9a-fA-F]+|\w+);)?')
+# an & this close to the end of a chunk may start a reference the next chunk completes
+LONGEST_REFERENCE = 40
+XML_ENTITIES = frozenset([b'lt', b'gt', b'amp', b'quot', b'apos'])
+
+
+def _fixReference(match):
+    name = match.group(1)
+    if name is None:
+        return b'&amp;'
+    if name[:1] == b'#' or name in XML_ENTITIES:
+        return match.group(0)
+    codepoint = html.entities.name2codepoint.get(name.decode('ascii', 'ignore'))
+    if codepoint is None:
+        return b'&amp;' + name + b';'
+    # a character reference needs no knowledge of the document encoding
+    return b'&#%d;' % codepoint
+
+
+def fixEntities(data):
+    """
+    Repairs the entity errors of the XMLTV feeds that are HTML escaped:
+    HTML entities become character references, undefined entities and
+    ampersands that start no reference are escaped, <3 becomes HEART.
+
+    @type data: bytes of an ASCII compatible encoding
+    """
+    return REFERENCE_RE.sub(_fixReference, data).replace(b'<3', b'HEART')
+
+
+class EntityFixer(object):
+    """
+    Reads a file through fixEntities, a chunk at a time, for the XML parser.
+    tell() and size are those of the file that is read. Text read from the
+    file is returned as text.
+    """
+
+    def __init__(self, f, chunkSize=CHUNK_SIZE):
+        self.f = f
+        self.size = getattr(f, 'size', 0)
+        self.chunkSize = chunkSize
+        self.rest = b''
+        self.output = b''
+        self.eof = False
+        self.text = False
+
+    def _fill(self):
+        chunk = self.f.read(self.chunkSize)
+        if isinstance(chunk, str):
+            # references are ASCII, the rest passes through unchanged
+            self.text = True
+            chunk = chunk.encode('utf-8', 'surrogatepass')
+        chunk = bytes(chunk)
+        data = self.rest + chunk
+        if not chunk:
+            self.eof = True
+            self.rest = b''
+        else:
+            # keep what a reference or <3 split by the chunk end may begin with
+            cut = len(data)
+            ampersand = data.rfind(b'&', max(0, len(data) - LONGEST_REFERENCE))
+            if ampersand >= 0:
+                cut = ampersand
+            if data.endswith(b'<'):
+                cut = min(cut, len(data) - 1)
+            data, self.rest = data[:cut], data[cut:]
+        self.output += fixEntities(data)
+
+    def read(self, byteCount=-1):
+        while not self.eof and (byteCount < 0 or len(self.output) < byteCount):
+            self._fill()
+        if byteCount < 0:
+            byteCount = len(self.output)
+        if self.text:
+            # whole characters only
+            while byteCount < len(self.output) and 0x80 <= self.output[byteCount] < 0xC0:
+                byteCount += 1
+        data, self.output = self.output[:byteCount], self.output[byteCount:]
+        if self.text:
+            return data.decode('utf-8', 'surrogatepass')
+        return data
+
+    def tell(self):
+        return self.f.tell()
+
+    def close(self):
+        self.f.close()